@@ -0,0 +1,274 @@
+# Pruebas de rendimiento reproducibles del procesador de precios.
+# Genera archivos maestros (TXT de ancho fijo) y catálogos CSV sintéticos con una
+# semilla fija, mide la lectura, la comparación, la exportación y el llenado de la
+# tabla de resultados, y guarda los tiempos en JSON para comparar entre versiones:
+#
+#   python benchmark_precios.py --out resultados.json
+#   python benchmark_precios.py --filas 10000 --comparar resultados.json
+#
+# Los archivos generados se guardan en --datos y se reutilizan en las siguientes
+# corridas (el contenido depende solo de la semilla y la cantidad de filas).
+import os
+import io
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+import platform
+import datetime
+
+import motor_precios
+from motor_precios import MIN_LINE_LENGTH, DESC_SLICE_APPROX
+from procesar_maestros import write_results, format_result_row, RESULT_HEADERS
+
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+DEFAULT_TARGETS = (30, 1_000, 50_000)
+DEFAULT_SEED = 20250701
+DEFAULT_TOLERANCE = 1.25 # Más lento que la base en este factor cuenta como regresión
+RESULTS_FILE = 'benchmark_resultados.json' # Nombre de los resultados en la carpeta de --datos
+
+# Palabras para armar descripciones parecidas a las reales
+DESCRIPTION_WORDS = (
+    'IBUPROFENO', 'PARACETAMOL', 'AMOXICILINA', 'DICLOFENAC', 'OMEPRAZOL', 'LORATADINA',
+    'ASPIRINETAS', 'ENALAPRIL', 'ATENOLOL', 'CLONAZEPAM', 'SHAMPOO', 'CREMA', 'JARABE',
+)
+DESCRIPTION_FORMS = ('CMP', 'CAPS', 'SOB', 'GTS', 'ML', 'GR', 'COMP REC')
+LABORATORIES = ('BAGO', 'ROEMMERS', 'ELEA', 'GADOR', 'BAYER', 'NOVARTIS FARMA', 'ABBOTT LABORATORIOS ARG.E')
+
+CSV_HEADER = (
+    "Troquel, Codigo de barras, Codigo de barras 2, Descripcion, Descripcion extendida, Rubro,"
+    " SubRubro, Cod.Labo, Laboratorio, Costo s/IVA, Vigencia, Fecha Alta\n"
+)
+
+# --- Generadores de datos ---
+def synthetic_barcode(index):
+    """Código de barras de 13 dígitos del producto número index (el mismo en todos los archivos)"""
+    return f"779{index:010d}"
+
+def synthetic_description(rng):
+    """Descripción de producto al azar, de hasta 30 caracteres"""
+    return f"{rng.choice(DESCRIPTION_WORDS)} {rng.randrange(1, 1000)} {rng.choice(DESCRIPTION_FORMS)} X{rng.randrange(1, 60)}"[:30]
+
+def txt_record(index, rng):
+    """
+    Registro 'D' de ancho fijo de un archivo maestros: descripción en las posiciones
+    20 a 49, código HE/UC de 13 dígitos y dos precios de 13 dígitos que empiezan con 0
+    (costo y precio público, que es el que se usa).
+    """
+    prefix = 'HE' if index % 2 else 'UC'
+    costo = rng.randrange(10_000, 5_000_000)
+    publico = costo * rng.randrange(110, 160) // 100
+    line = (
+        f"D{index:08d}".ljust(DESC_SLICE_APPROX.start)
+        + synthetic_description(rng).ljust(DESC_SLICE_APPROX.stop - DESC_SLICE_APPROX.start)
+        + f"{prefix}{synthetic_barcode(index)}  {costo:013d}  {publico:013d}"
+    )
+    return line.ljust(MIN_LINE_LENGTH + 10) + "\n"
+
+def write_txt_catalog(filename, rows, seed=DEFAULT_SEED):
+    """Escribe un archivo maestros con rows registros 'D' (y una línea de encabezado que se ignora)"""
+    rng = random.Random(seed)
+    with open(filename, 'w', encoding='latin-1', newline='') as outfile:
+        outfile.write("H MAESTRO DE PRODUCTOS".ljust(MIN_LINE_LENGTH) + "\n")
+        for index in range(rows):
+            outfile.write(txt_record(index, rng))
+
+def csv_record(index, rng):
+    """Fila de un catálogo CSV con el formato de los archivos de 'Precios de drogueria'"""
+    barcode = synthetic_barcode(index)
+    return (
+        f"{rng.randrange(1000, 99999)}, {barcode}, {barcode}, {synthetic_description(rng)}, ,"
+        f" ESPECIALIDADES, , {rng.randrange(1, 300)}, {rng.choice(LABORATORIES)},"
+        f" {rng.randrange(10_000, 5_000_000) / 100:.3f}, 01/07/2025, \n"
+    )
+
+def write_csv_catalog(filename, rows, seed=DEFAULT_SEED, missing=0.1):
+    """
+    Escribe un catálogo CSV de hasta rows productos. Cada producto falta con
+    probabilidad missing, así la comparación tiene códigos de una sola droguería.
+    """
+    rng = random.Random(seed + 1)
+    with open(filename, 'w', encoding='utf-8', newline='') as outfile:
+        outfile.write(CSV_HEADER)
+        for index in range(rows):
+            if rng.random() >= missing:
+                outfile.write(csv_record(index, rng))
+
+def synthetic_divisors(rows, targets, seed=DEFAULT_SEED, missing=0.1):
+    """
+    Tabla de divisores con targets códigos: la mayoría está en los catálogos de rows
+    productos y una fracción missing no está en ninguno.
+    """
+    rng = random.Random(seed + targets)
+    universe = range(int(rows * (1 + missing)))
+    indexes = rng.sample(universe, min(targets, len(universe)))
+    return {synthetic_barcode(index): {'divisor': rng.choice((1, 2, 10, 20, 30))} for index in indexes}
+
+def ensure_data_files(directory, rows, seed=DEFAULT_SEED):
+    """Devuelve (txt, csv) de rows productos en directory, generándolos si no existen"""
+    os.makedirs(directory, exist_ok=True)
+    # Los nombres hacen que se detecten como Asoprofarma (TXT) y Del Sud (CSV)
+    txt_file = os.path.join(directory, f"asopro_{rows}_{seed}.txt")
+    csv_file = os.path.join(directory, f"delsud_{rows}_{seed}.csv")
+    for filename, writer in ((txt_file, write_txt_catalog), (csv_file, write_csv_catalog)):
+        if not os.path.exists(filename):
+            temporary = filename + ".tmp"
+            writer(temporary, rows, seed)
+            os.replace(temporary, filename)
+    return txt_file, csv_file
+
+# --- Mediciones ---
+def measure(function, repeats):
+    """Ejecuta function repeats veces y devuelve (mejor tiempo en segundos, último resultado)"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def populate_treeview(rows):
+    """Llena una tabla de resultados como la de la ventana principal y devuelve cuántas filas insertó"""
+    import tkinter as tk
+    from tkinter import ttk
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        tree = ttk.Treeview(root, columns=RESULT_HEADERS, show='headings')
+        for item in rows:
+            tag = 'no_disponible' if not item.disponible else ('precio_alto' if item.es_precio_alto else 'disponible')
+            tree.insert('', 'end', values=format_result_row(item), tags=(tag,))
+        root.update_idletasks()
+        return len(tree.get_children())
+    finally:
+        root.destroy()
+
+def treeview_unavailable_reason():
+    """Motivo por el que no se puede medir la tabla (None si hay pantalla y tkinter)"""
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+    except Exception as e: # ImportError o TclError sin pantalla
+        return str(e)
+    return None
+
+def run_benchmarks(rows_list, targets_list, data_dir, repeats=3, seed=DEFAULT_SEED, treeview=True):
+    """Corre todas las mediciones y devuelve la lista de resultados"""
+    results = []
+    tree_reason = treeview_unavailable_reason() if treeview else "desactivada con --sin-tabla"
+
+    def record(benchmark, rows, targets, seconds, **extra):
+        entry = {'benchmark': benchmark, 'filas': rows, 'codigos': targets, 'segundos': seconds}
+        entry.update(extra)
+        results.append(entry)
+        detail = f"{seconds:.4f} s" if seconds is not None else f"omitido ({extra.get('omitido')})"
+        print(f"{benchmark:<10} filas={rows:>9} codigos={targets:>6}  {detail}", file=sys.stderr)
+
+    for rows in rows_list:
+        txt_file, csv_file = ensure_data_files(data_dir, rows, seed)
+        for targets in targets_list:
+            divisores = synthetic_divisors(rows, targets, seed)
+
+            seconds, asopro = measure(lambda: motor_precios.process_txt_file_for_drugstore(txt_file, divisores), repeats)
+            record('txt', rows, targets, seconds, configurados=len(divisores), encontrados=len(asopro))
+            seconds, sud = measure(lambda: motor_precios.process_csv_file_for_drugstore(csv_file, divisores), repeats)
+            record('csv', rows, targets, seconds, encontrados=len(sud))
+
+            seconds, compared = measure(lambda: motor_precios.compare_drugstore_results(asopro, sud), repeats)
+            record('compare', rows, targets, seconds, filas_resultado=len(compared))
+
+            # Exportar a CSV y copiar al portapapeles (TSV) escriben lo mismo con otro separador
+            for benchmark, delimiter in (('export', ','), ('clipboard', '\t')):
+                seconds, _ = measure(lambda: write_results(compared, io.StringIO(), delimiter), repeats)
+                record(benchmark, rows, targets, seconds)
+
+            if tree_reason is None:
+                seconds, _ = measure(lambda: populate_treeview(compared), repeats)
+                record('treeview', rows, targets, seconds)
+            else:
+                record('treeview', rows, targets, None, omitido=tree_reason)
+    return results
+
+def environment_info():
+    """Datos del entorno para interpretar los resultados"""
+    numpy = motor_precios.load_numpy()
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'nucleos': os.cpu_count(),
+        'numpy': numpy.__version__ if numpy is not None else None,
+    }
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Mediciones que tardaron más que tolerance veces lo de la base: (resultado, tiempo base)"""
+    base_times = {
+        (entry['benchmark'], entry['filas'], entry['codigos']): entry['segundos']
+        for entry in baseline.get('resultados', ())
+    }
+    regressions = []
+    for entry in results:
+        base = base_times.get((entry['benchmark'], entry['filas'], entry['codigos']))
+        if base and entry['segundos'] is not None and entry['segundos'] > base * tolerance:
+            regressions.append((entry, base))
+    return regressions
+
+# --- Línea de comandos ---
+def build_arg_parser():
+    """Construye el parser de argumentos de las pruebas de rendimiento"""
+    parser = argparse.ArgumentParser(
+        prog="benchmark_precios",
+        description="Pruebas de rendimiento con archivos maestros y catálogos sintéticos."
+    )
+    parser.add_argument('--filas', type=int, nargs='+', default=list(DEFAULT_ROWS),
+                        help="Productos por archivo generado (por defecto 10000 100000 1000000)")
+    parser.add_argument('--codigos', type=int, nargs='+', default=list(DEFAULT_TARGETS),
+                        help="Cantidad de códigos configurados a buscar (por defecto 30 1000 50000)")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Repeticiones por medición (se toma la mejor)")
+    parser.add_argument('--semilla', type=int, default=DEFAULT_SEED, help="Semilla de los generadores")
+    parser.add_argument('--datos', default=os.path.join(tempfile.gettempdir(), 'precios_benchmark'),
+                        help="Carpeta de los archivos generados (se reutilizan)")
+    parser.add_argument('--out', help=f"Archivo JSON de resultados ('-' para la salida estándar; por defecto "
+                                      f"{RESULTS_FILE} en la carpeta de --datos)")
+    parser.add_argument('--comparar', metavar='BASE.json', help="Resultados anteriores contra los que buscar regresiones")
+    parser.add_argument('--tolerancia', type=float, default=DEFAULT_TOLERANCE,
+                        help="Factor de tiempo sobre la base que cuenta como regresión")
+    parser.add_argument('--sin-tabla', action='store_true', help="No medir el llenado de la tabla (Treeview)")
+    return parser
+
+def main(argv=None):
+    """Corre las pruebas, guarda el JSON y devuelve 1 si hubo regresiones contra --comparar"""
+    args = build_arg_parser().parse_args(argv)
+    results = run_benchmarks(args.filas, args.codigos, args.datos, args.repeticiones,
+                             args.semilla, treeview=not args.sin_tabla)
+    report = dict(environment_info(), semilla=args.semilla, repeticiones=args.repeticiones, resultados=results)
+
+    if args.out == '-':
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        # Por defecto junto a los datos generados, no en la carpeta desde donde se corre
+        out = args.out or os.path.join(args.datos, RESULTS_FILE)
+        with open(out, 'w', encoding='utf-8') as outfile:
+            json.dump(report, outfile, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {out}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as infile:
+            baseline = json.load(infile)
+        regressions = find_regressions(results, baseline, args.tolerancia)
+        for entry, base in regressions:
+            print(f"Regresión: {entry['benchmark']} filas={entry['filas']} codigos={entry['codigos']}: "
+                  f"{entry['segundos']:.4f} s contra {base:.4f} s", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
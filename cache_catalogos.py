@@ -0,0 +1,355 @@
+# Cache persistente de archivos de droguerías ya procesados (SQLite).
+# Un archivo se identifica por el hash de su contenido; la ruta, el tamaño y la fecha
+# de modificación solo sirven para no recalcular el hash si el archivo no cambió.
+# Se guarda el precio_base de cada código: si solo cambian los divisores en
+# divisores_config.json, los precios unitarios se recalculan sin volver a leer el archivo.
+# También se guardan los precios inválidos encontrados, así un archivo leído del cache
+# informa las mismas advertencias que al procesarlo.
+# Un archivo guardado con su catálogo completo sirve para cualquier tabla de divisores.
+# Los catálogos completos se guardan además como instantáneas binarias (instantanea_precios)
+# en una carpeta junto al cache: se abren con mmap sin leer filas de SQLite, y la GUI, la
+# CLI y el servicio de consulta comparten las mismas páginas en memoria.
+import os
+import re
+import hashlib
+import sqlite3
+import logging
+import contextlib
+
+import motor_precios
+from motor_precios import ArticuloCatalogo, CatalogoProveedor, detect_drugstore_from_filename
+from instantanea_precios import InstantaneaCatalogo, write_catalog_snapshot, FORMAT_VERSION as SNAPSHOT_FORMAT_VERSION
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = 'cache_catalogos.sqlite3'
+CACHE_FORMAT_VERSION = 4 # Incrementar si cambia lo que guardan los procesadores o el esquema
+HASH_BLOCK_SIZE = 1024 * 1024
+SNAPSHOT_SUFFIX = '_instantaneas' # Carpeta de instantáneas: nombre del cache + este sufijo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rutas (
+    ruta TEXT PRIMARY KEY,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archivos (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    drugstore TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    completo INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (hash, drugstore)
+);
+-- Códigos de barras que se buscaron al procesar el archivo (encontrados o no)
+CREATE TABLE IF NOT EXISTS codigos (
+    archivo_id INTEGER NOT NULL,
+    barcode TEXT NOT NULL,
+    PRIMARY KEY (archivo_id, barcode)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS productos (
+    archivo_id INTEGER NOT NULL,
+    barcode TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    precio_base REAL NOT NULL,
+    troquel TEXT NOT NULL DEFAULT '',
+    laboratorio TEXT NOT NULL DEFAULT '',
+    vigencia TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (archivo_id, barcode)
+) WITHOUT ROWID;
+-- Códigos con precio inválido en el archivo y el mensaje de la advertencia
+CREATE TABLE IF NOT EXISTS errores (
+    archivo_id INTEGER NOT NULL,
+    barcode TEXT NOT NULL,
+    mensaje TEXT NOT NULL,
+    PRIMARY KEY (archivo_id, barcode)
+) WITHOUT ROWID;
+"""
+
+def default_cache_path():
+    """Ruta del cache junto al programa, igual que divisores_config.json"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_FILE)
+
+def file_hash(filename):
+    """Hash del contenido del archivo"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as infile:
+        for block in iter(lambda: infile.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class CacheCatalogos:
+    """Cache en disco de los archivos procesados, compartido entre ejecuciones de la GUI y la CLI"""
+
+    def __init__(self, path=None):
+        self.path = path or default_cache_path()
+        self.snapshot_dir = os.path.splitext(self.path)[0] + SNAPSHOT_SUFFIX
+        with self._connect() as conn:
+            # Un cache de otra versión del esquema se descarta: se vuelve a llenar solo
+            if conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_FORMAT_VERSION:
+                conn.executescript(
+                    "DROP TABLE IF EXISTS rutas; DROP TABLE IF EXISTS archivos;"
+                    " DROP TABLE IF EXISTS codigos; DROP TABLE IF EXISTS productos; DROP TABLE IF EXISTS errores;"
+                )
+                conn.execute(f"PRAGMA user_version = {CACHE_FORMAT_VERSION}")
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Abre una conexión por operación (la GUI procesa en un hilo secundario) y confirma al salir"""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _hash_for(self, conn, filename):
+        """Hash del archivo, reutilizando el guardado si no cambiaron tamaño ni fecha de modificación"""
+        ruta = os.path.abspath(filename)
+        stat = os.stat(ruta)
+        row = conn.execute(
+            "SELECT hash FROM rutas WHERE ruta = ? AND tamano = ? AND mtime_ns = ?",
+            (ruta, stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        digest = file_hash(ruta)
+        conn.execute(
+            "INSERT OR REPLACE INTO rutas (ruta, tamano, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+            (ruta, stat.st_size, stat.st_mtime_ns, digest)
+        )
+        return digest
+
+    def _find_file(self, conn, filename, drugstore):
+        """Devuelve (id, completo, hash) del archivo de la droguería en el cache, o None si no está"""
+        digest = self._hash_for(conn, filename)
+        row = conn.execute(
+            "SELECT id, completo FROM archivos WHERE hash = ? AND drugstore = ? AND version = ?",
+            (digest, drugstore, CACHE_FORMAT_VERSION)
+        ).fetchone()
+        return row + (digest,) if row else None
+
+    def _snapshot_path(self, digest, drugstore):
+        """Ruta de la instantánea del catálogo completo de un archivo (otro formato de instantánea, otra ruta)"""
+        name = re.sub(r'[^0-9A-Za-z]+', '_', drugstore)
+        return os.path.join(
+            self.snapshot_dir, f"{digest}_{name}_v{CACHE_FORMAT_VERSION}.{SNAPSHOT_FORMAT_VERSION}.snap")
+
+    def _open_snapshot(self, digest, drugstore):
+        """Abre la instantánea del catálogo, o devuelve None si no existe o no sirve (se usa SQLite)"""
+        path = self._snapshot_path(digest, drugstore)
+        if not os.path.exists(path):
+            return None
+        try:
+            instantanea = InstantaneaCatalogo(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Instantánea %s no disponible (%s), leyendo el cache", path, e)
+            return None
+        if instantanea.drugstore != drugstore:
+            instantanea.close()
+            return None
+        return instantanea
+
+    def _write_snapshot(self, digest, catalogo):
+        """Guarda la instantánea del catálogo si todavía no existe (el contenido depende solo del hash)"""
+        path = self._snapshot_path(digest, catalogo.drugstore)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            write_catalog_snapshot(path, catalogo)
+        except OSError as e:
+            logger.warning("No se pudo guardar la instantánea %s: %s", path, e)
+
+    def _read_catalog(self, conn, archivo_id, drugstore):
+        """Arma el CatalogoProveedor con los productos y los precios inválidos guardados de un archivo"""
+        catalogo = CatalogoProveedor(drugstore, errores=dict(conn.execute(
+            "SELECT barcode, mensaje FROM errores WHERE archivo_id = ?", (archivo_id,)
+        )))
+        for barcode, descripcion, precio_base, troquel, laboratorio, vigencia in conn.execute(
+            "SELECT barcode, descripcion, precio_base, troquel, laboratorio, vigencia FROM productos WHERE archivo_id = ?",
+            (archivo_id,)
+        ):
+            catalogo.articulos[barcode] = ArticuloCatalogo(
+                barcode=barcode,
+                descripcion=descripcion,
+                precio_base=precio_base,
+                drugstore=drugstore,
+                troquel=troquel,
+                laboratorio=laboratorio,
+                vigencia=vigencia
+            )
+        return catalogo
+
+    def _write_file(self, conn, filename, drugstore, articulos, errores, completo):
+        """Reemplaza lo guardado de un archivo por los artículos y errores ({barcode: mensaje}) dados y devuelve su id"""
+        digest = self._hash_for(conn, filename)
+        row = conn.execute(
+            "SELECT id FROM archivos WHERE hash = ? AND drugstore = ?", (digest, drugstore)
+        ).fetchone()
+        if row:
+            archivo_id = row[0]
+            conn.execute(
+                "UPDATE archivos SET version = ?, completo = ? WHERE id = ?",
+                (CACHE_FORMAT_VERSION, int(completo), archivo_id)
+            )
+        else:
+            archivo_id = conn.execute(
+                "INSERT INTO archivos (hash, drugstore, version, completo) VALUES (?, ?, ?, ?)",
+                (digest, drugstore, CACHE_FORMAT_VERSION, int(completo))
+            ).lastrowid
+        conn.execute("DELETE FROM codigos WHERE archivo_id = ?", (archivo_id,))
+        conn.execute("DELETE FROM productos WHERE archivo_id = ?", (archivo_id,))
+        conn.execute("DELETE FROM errores WHERE archivo_id = ?", (archivo_id,))
+        conn.executemany(
+            "INSERT INTO productos (archivo_id, barcode, descripcion, precio_base, troquel, laboratorio, vigencia)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((archivo_id, a.barcode, a.descripcion, a.precio_base, a.troquel, a.laboratorio, a.vigencia)
+             for a in articulos)
+        )
+        conn.executemany(
+            "INSERT INTO errores (archivo_id, barcode, mensaje) VALUES (?, ?, ?)",
+            ((archivo_id, barcode, mensaje) for barcode, mensaje in errores.items())
+        )
+        return archivo_id
+
+    def lookup(self, filename, divisores, drugstore=None):
+        """Devuelve los productos del archivo desde el cache, o None si hay que procesarlo"""
+        drugstore = drugstore or detect_drugstore_from_filename(filename)
+        with self._connect() as conn:
+            row = self._find_file(conn, filename, drugstore)
+            if row is None:
+                return None
+            archivo_id, completo, digest = row
+
+            # Sirve si se guardó el catálogo completo o si todos los códigos
+            # configurados ya se buscaron en el archivo
+            if not completo:
+                covered = {barcode for (barcode,) in conn.execute(
+                    "SELECT barcode FROM codigos WHERE archivo_id = ?", (archivo_id,)
+                )}
+                if not covered.issuperset(divisores):
+                    return None
+            else:
+                instantanea = self._open_snapshot(digest, drugstore)
+                if instantanea is not None:
+                    with instantanea:
+                        return instantanea.apply_divisors(divisores)
+
+            return self._read_catalog(conn, archivo_id, drugstore).apply_divisors(divisores)
+
+    def load_catalog(self, filename, drugstore=None):
+        """
+        Devuelve el catálogo completo del archivo desde el cache, o None si no está guardado
+        completo. Si tiene instantánea se devuelve la InstantaneaCatalogo abierta (se consulta
+        igual que un CatalogoProveedor); si no, se lee de SQLite y se guarda la instantánea.
+        """
+        drugstore = drugstore or detect_drugstore_from_filename(filename)
+        with self._connect() as conn:
+            row = self._find_file(conn, filename, drugstore)
+            if row is None or not row[1]:
+                return None
+            archivo_id, _, digest = row
+            instantanea = self._open_snapshot(digest, drugstore)
+            if instantanea is not None:
+                return instantanea
+            catalogo = self._read_catalog(conn, archivo_id, drugstore)
+        self._write_snapshot(digest, catalogo)
+        return catalogo
+
+    def store(self, filename, divisores, results, drugstore=None, errores=None):
+        """
+        Guarda los productos procesados de un archivo junto con los códigos buscados y los
+        precios inválidos encontrados entre ellos (errores, {barcode: mensaje})
+        """
+        drugstore = drugstore or detect_drugstore_from_filename(filename)
+        with self._connect() as conn:
+            row = self._find_file(conn, filename, drugstore)
+            if row is not None and row[1]:
+                return # Ya está el catálogo completo, que cubre cualquier código
+            articulos = (
+                ArticuloCatalogo(barcode=p.barcode, descripcion=p.descripcion, precio_base=p.precio_base, drugstore=drugstore)
+                for p in results.values()
+            )
+            archivo_id = self._write_file(conn, filename, drugstore, articulos, errores or {}, completo=False)
+            # Los códigos con divisor cero no se pudieron calcular: no cuentan como buscados
+            conn.executemany(
+                "INSERT INTO codigos (archivo_id, barcode) VALUES (?, ?)",
+                ((archivo_id, barcode) for barcode, info in divisores.items() if info.get('divisor', 1) != 0)
+            )
+
+    def store_catalog(self, filename, catalogo):
+        """Guarda el catálogo completo de un archivo (con la droguería del catálogo)"""
+        with self._connect() as conn:
+            self._write_file(conn, filename, catalogo.drugstore, catalogo.articulos.values(), catalogo.errores,
+                             completo=True)
+            digest = self._hash_for(conn, filename)
+        self._write_snapshot(digest, catalogo)
+
+    def process_files(self, filenames, divisores, chunk_workers=1, drugstores=None):
+        """
+        Igual que motor_precios.process_files_parallel, pero los archivos que ya están en
+        el cache se devuelven de inmediato y solo se procesan los demás.
+        """
+        filenames = list(filenames)
+        drugstores = list(drugstores) if drugstores is not None else [None] * len(filenames)
+        pending = []
+        for position, filename in enumerate(filenames):
+            try:
+                results = self.lookup(filename, divisores, drugstores[position])
+            except sqlite3.Error as e:
+                logger.warning("Cache no disponible (%s), procesando %s", e, filename)
+                results = None
+            if results is None:
+                pending.append(position)
+            else:
+                yield position, results
+
+        # Se leen los catálogos de los códigos configurados (igual que process_files_parallel)
+        # para guardar también sus precios inválidos
+        parsed = motor_precios.load_catalogs_parallel(
+            [filenames[position] for position in pending], chunk_workers=chunk_workers,
+            drugstores=[drugstores[position] for position in pending], wanted=divisores
+        )
+        for index, catalogo in parsed:
+            position = pending[index]
+            results = catalogo.apply_divisors(divisores)
+            try:
+                self.store(filenames[position], divisores, results, drugstores[position], catalogo.errores)
+            except sqlite3.Error as e:
+                logger.warning("No se pudo guardar %s en el cache: %s", filenames[position], e)
+            yield position, results
+
+    def load_catalogs(self, filenames, chunk_workers=1, drugstores=None):
+        """
+        Igual que motor_precios.load_catalogs_parallel, pero los catálogos que ya están
+        completos en el cache se devuelven de inmediato y solo se leen los demás.
+        """
+        filenames = list(filenames)
+        drugstores = list(drugstores) if drugstores is not None else [None] * len(filenames)
+        pending = []
+        for position, filename in enumerate(filenames):
+            try:
+                catalogo = self.load_catalog(filename, drugstores[position])
+            except sqlite3.Error as e:
+                logger.warning("Cache no disponible (%s), procesando %s", e, filename)
+                catalogo = None
+            if catalogo is None:
+                pending.append(position)
+            else:
+                yield position, catalogo
+
+        parsed = motor_precios.load_catalogs_parallel(
+            [filenames[position] for position in pending], chunk_workers=chunk_workers,
+            drugstores=[drugstores[position] for position in pending]
+        )
+        for index, catalogo in parsed:
+            position = pending[index]
+            try:
+                self.store_catalog(filenames[position], catalogo)
+            except sqlite3.Error as e:
+                logger.warning("No se pudo guardar %s en el cache: %s", filenames[position], e)
+            yield position, catalogo
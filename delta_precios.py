@@ -0,0 +1,221 @@
+# Modo delta: diferencias entre dos versiones del archivo de una misma droguería.
+# Las droguerías reenvían el archivo completo aunque cambien unos cientos de precios.
+# En lugar de leer y comparar los dos catálogos enteros, se calcula un hash por línea
+# de cada versión y solo se interpretan las líneas que no están en la otra. De esas
+# líneas salen los códigos tocados; como un código puede repetirse en otras líneas que
+# no cambiaron, su valor se vuelve a tomar de los dos archivos completos leyendo solo
+# esos códigos (con el filtrado previo, sin armar los demás artículos). Así salen los
+# productos dados de alta, de baja y con precio cambiado, y las variaciones grandes se
+# marcan como anomalías.
+import os
+import re
+import logging
+import tempfile
+
+from motor_precios import (
+    Registro, detect_file_type, detect_drugstore_from_filename, read_catalog_file,
+    build_product, compare_supplier_products
+)
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_THRESHOLD = 0.5 # Variación relativa (50 %) a partir de la cual un cambio de precio es sospechoso
+
+# Línea de CSV completa: cada campo entre comillas se cierra en la misma línea. Igual
+# que el módulo csv, una comilla que no abre el campo es un carácter más.
+_CSV_FIELD = rb'(?:"(?:[^"\r\n]|"")*"(?:[^,"\r\n][^,\r\n]*)?|[^,"\r\n][^,\r\n]*|)'
+CSV_COMPLETE_LINE_PATTERN = re.compile(rb'%s(?:,%s)*\r?\n?' % (_CSV_FIELD, _CSV_FIELD))
+
+# Tipos de cambio
+ADDED = 'alta'
+REMOVED = 'baja'
+REPRICED = 'precio'
+DESCRIBED = 'descripcion' # Mismo precio con otra descripción: no es un cambio de precio pero cambia la comparación
+
+class CambioCatalogo(Registro):
+    """Producto que cambió entre dos versiones del archivo: anterior y nuevo son ArticuloCatalogo o None"""
+    __slots__ = ('barcode', 'tipo', 'anterior', 'nuevo')
+
+    def __init__(self, barcode, tipo, anterior, nuevo):
+        self.barcode = barcode
+        self.tipo = tipo
+        self.anterior = anterior
+        self.nuevo = nuevo
+
+    @property
+    def descripcion(self):
+        return (self.nuevo or self.anterior).descripcion
+
+    @property
+    def variacion(self):
+        """Variación relativa del precio base (None en altas, bajas o si el precio anterior era cero)"""
+        if self.tipo != REPRICED or not self.anterior.precio_base:
+            return None
+        return self.nuevo.precio_base / self.anterior.precio_base - 1
+
+    def is_anomaly(self, threshold=ANOMALY_THRESHOLD):
+        """True si el precio cambió en threshold o más (en más o en menos), o bajó a cero"""
+        if self.tipo != REPRICED:
+            return False
+        if not self.nuevo.precio_base:
+            return True
+        variacion = self.variacion
+        return variacion is not None and abs(variacion) >= threshold
+
+class DiferenciaCatalogo:
+    """Cambios entre dos versiones del catálogo de una droguería, por código de barras"""
+
+    def __init__(self, drugstore, cambios=None):
+        self.drugstore = drugstore
+        self.cambios = cambios if cambios is not None else {} # barcode -> CambioCatalogo
+
+    def __len__(self):
+        return len(self.cambios)
+
+    def __contains__(self, barcode):
+        return barcode in self.cambios
+
+    def of_type(self, tipo):
+        """Cambios de un tipo (ADDED, REMOVED, REPRICED o DESCRIBED), ordenados por código"""
+        return [self.cambios[barcode] for barcode in sorted(self.cambios) if self.cambios[barcode].tipo == tipo]
+
+    def anomalies(self, threshold=ANOMALY_THRESHOLD):
+        """Cambios de precio sospechosos (ver CambioCatalogo.is_anomaly), ordenados por código"""
+        return [self.cambios[barcode] for barcode in sorted(self.cambios) if self.cambios[barcode].is_anomaly(threshold)]
+
+    def apply(self, results, divisores):
+        """
+        Actualiza los productos ({barcode: Producto}) calculados con la versión anterior del
+        archivo para que correspondan a la nueva: quita las bajas y recalcula las altas y
+        los demás cambios que estén en divisores. Devuelve un dict nuevo.
+        """
+        updated = dict(results)
+        for barcode, cambio in self.cambios.items():
+            updated.pop(barcode, None)
+            info = divisores.get(barcode)
+            if cambio.nuevo is None or info is None:
+                continue
+            producto = build_product(barcode, cambio.nuevo.descripcion, cambio.nuevo.precio_base,
+                                     self.drugstore, info.get('divisor', 1))
+            if producto is not None:
+                updated[barcode] = producto
+        return updated
+
+def diff_catalogs(anterior, nuevo, barcodes=None):
+    """
+    Diferencia entre dos catálogos de la misma droguería (CatalogoProveedor), en una
+    pasada sobre los códigos de barcodes (por defecto, los de ambos). Los productos que
+    solo cambiaron en troquel, laboratorio o vigencia no cuentan como cambio.
+    """
+    if barcodes is None:
+        barcodes = anterior.articulos.keys() | nuevo.articulos.keys()
+    diferencia = DiferenciaCatalogo(nuevo.drugstore)
+    for barcode in barcodes:
+        old = anterior.get(barcode)
+        new = nuevo.get(barcode)
+        if old is None and new is not None:
+            diferencia.cambios[barcode] = CambioCatalogo(barcode, ADDED, None, new)
+        elif new is None and old is not None:
+            diferencia.cambios[barcode] = CambioCatalogo(barcode, REMOVED, old, None)
+        elif old is not None and old.precio_base != new.precio_base:
+            diferencia.cambios[barcode] = CambioCatalogo(barcode, REPRICED, old, new)
+        elif old is not None and old.descripcion != new.descripcion:
+            diferencia.cambios[barcode] = CambioCatalogo(barcode, DESCRIBED, old, new)
+    return diferencia
+
+def _line_hashes(filename, is_csv):
+    """
+    Hash de cada línea del archivo en orden (sin el encabezado de los CSV), el encabezado y, en
+    los CSV, si alguna línea deja abierto un campo entre comillas: un campo con saltos
+    de línea reparte un registro en varias líneas, que no se pueden interpretar por separado.
+    """
+    hashes = []
+    quoted_breaks = False
+    with open(filename, 'rb') as infile:
+        header = infile.readline() if is_csv else b''
+        for line in infile:
+            hashes.append(hash(line.rstrip(b'\r\n')))
+            if is_csv and not quoted_breaks and b'"' in line:
+                quoted_breaks = CSV_COMPLETE_LINE_PATTERN.fullmatch(line) is None
+    return hashes, header, quoted_breaks
+
+def _changed_lines(filename, skip_header, other_hashes):
+    """Líneas del archivo cuyo hash no está en other_hashes"""
+    with open(filename, 'rb') as infile:
+        if skip_header:
+            infile.readline()
+        return [line for line in infile if hash(line.rstrip(b'\r\n')) not in other_hashes]
+
+def _read_lines(lines, header, filename, drugstore):
+    """Interpreta solo las líneas dadas con el lector del tipo de archivo, mediante un archivo temporal"""
+    suffix = '.csv' if detect_file_type(filename) == 'csv' else '.txt'
+    descriptor, path = tempfile.mkstemp(prefix='precios_delta_', suffix=suffix)
+    try:
+        with open(descriptor, 'wb') as outfile:
+            outfile.write(header)
+            for line in lines:
+                outfile.write(line if line.endswith(b'\n') else line + b'\n')
+        return read_catalog_file(path, drugstore=drugstore)
+    finally:
+        os.remove(path)
+
+def diff_files(anterior, nuevo, drugstore=None):
+    """
+    Diferencia entre la versión anterior y la nueva del archivo de una droguería. Solo se
+    interpretan las líneas que no aparecen idénticas en la otra versión, para saber qué
+    códigos tocaron; esos códigos se leen después de los dos archivos completos, así un
+    código repetido en otras líneas vale lo mismo que al leer el catálogo entero (su
+    última aparición). Si cambió el encabezado de un CSV (las columnas pueden estar en
+    otro lugar), algún registro ocupa varias líneas o las líneas que no cambiaron están
+    en otro orden, se comparan los catálogos completos.
+    """
+    drugstore = drugstore or detect_drugstore_from_filename(nuevo)
+    is_csv = detect_file_type(nuevo) == 'csv'
+    old_order, old_header, old_breaks = _line_hashes(anterior, is_csv)
+    new_order, new_header, new_breaks = _line_hashes(nuevo, is_csv)
+    old_hashes, new_hashes = set(old_order), set(new_order)
+    motivo = None
+    if old_header != new_header:
+        motivo = "cambió el encabezado"
+    elif old_breaks or new_breaks:
+        motivo = "hay registros de varias líneas"
+    elif [h for h in old_order if h in new_hashes] != [h for h in new_order if h in old_hashes]:
+        # Con las líneas comunes en otro orden puede cambiar cuál aparición de un código es la última
+        motivo = "cambió el orden de las líneas"
+    if motivo:
+        logger.info("En %s %s: se comparan los catálogos completos", nuevo, motivo)
+        return diff_catalogs(read_catalog_file(anterior, drugstore=drugstore),
+                             read_catalog_file(nuevo, drugstore=drugstore))
+
+    removed_lines = _changed_lines(anterior, is_csv, new_hashes)
+    added_lines = _changed_lines(nuevo, is_csv, old_hashes)
+    touched = set()
+    for catalogo in (_read_lines(removed_lines, old_header, anterior, drugstore),
+                     _read_lines(added_lines, new_header, nuevo, drugstore)):
+        touched.update(catalogo.articulos, catalogo.errores) # Un precio inválido también cambia el producto
+
+    diferencia = DiferenciaCatalogo(drugstore)
+    if touched:
+        diferencia = diff_catalogs(read_catalog_file(anterior, touched, drugstore=drugstore),
+                                   read_catalog_file(nuevo, touched, drugstore=drugstore), touched)
+    logger.info("Delta %s: %d líneas distintas, %d altas, %d bajas, %d cambios de precio",
+                drugstore, len(removed_lines) + len(added_lines), len(diferencia.of_type(ADDED)),
+                len(diferencia.of_type(REMOVED)), len(diferencia.of_type(REPRICED)))
+    return diferencia
+
+def update_comparison(resultado, barcodes, results):
+    """
+    Recalcula en resultado (ResultadoComparacion) solo los códigos dados. results tiene,
+    por droguería en el orden de resultado.drugstores, los productos actuales
+    ({barcode: Producto}) de al menos esos códigos. Los códigos que ya no están en
+    ninguna droguería se quitan. Devuelve la cantidad de códigos recalculados.
+    """
+    count = 0
+    for barcode in barcodes:
+        datos = [products.get(barcode) for products in results]
+        if all(data is None for data in datos):
+            resultado.discard(barcode)
+        else:
+            resultado.set_product(barcode, compare_supplier_products(barcode, datos, resultado.drugstores))
+        count += 1
+    return count
@@ -0,0 +1,137 @@
+# Procesamiento en flujo para archivos enormes (modo por lotes).
+# En lugar de leer cada archivo a un dict y ordenar la comparación completa en memoria,
+# cada archivo se convierte en un flujo de productos ordenado por código de barras
+# (con ordenamiento externo en archivos temporales cuando no entra en un bloque), los
+# flujos de todas las droguerías se unen por código y cada fila comparada se escribe
+# apenas se calcula. La memoria usada depende del tamaño de bloque, no del catálogo.
+# Las filas salen en orden de código de barras, no de descripción.
+import os
+import csv
+import heapq
+import logging
+import operator
+import itertools
+import tempfile
+
+from motor_precios import (
+    TRACE, detect_file_type, detect_drugstore_from_filename, supplier_name,
+    iter_csv_catalog, iter_txt_file, build_product, compare_supplier_products
+)
+
+logger = logging.getLogger(__name__)
+
+SORT_CHUNK_SIZE = 100_000 # Artículos que se ordenan en memoria antes de volcarlos a un archivo temporal
+
+def iter_catalog_file(filename, wanted=None, drugstore=None, errores=None):
+    """Detecta el tipo de archivo y genera sus artículos en el orden del archivo"""
+    if detect_file_type(filename) == 'csv':
+        return iter_csv_catalog(filename, wanted, drugstore=drugstore, errores=errores)
+    return iter_txt_file(filename, wanted, drugstore)
+
+def _write_run(records, directory):
+    """Vuelca un bloque ordenado de (barcode, orden, descripcion, precio_base) a un archivo temporal"""
+    descriptor, path = tempfile.mkstemp(prefix='precios_', suffix='.run', dir=directory)
+    with open(descriptor, 'w', encoding='utf-8', newline='') as outfile:
+        csv.writer(outfile).writerows(records)
+    return path
+
+def _read_run(path):
+    """Lee un bloque volcado por _write_run, en el mismo orden"""
+    with open(path, 'r', encoding='utf-8', newline='') as infile:
+        for barcode, sequence, descripcion, precio_base in csv.reader(infile):
+            yield barcode, int(sequence), descripcion, float(precio_base)
+
+def sorted_articles(articulos, chunk_size=SORT_CHUNK_SIZE, directory=None):
+    """
+    Ordena por código de barras un flujo de ArticuloCatalogo y genera una tupla
+    (barcode, descripcion, precio_base) por código: la de su última aparición, igual
+    que al leer el archivo a un dict. Hasta chunk_size artículos se ordenan en memoria;
+    con más, cada bloque ordenado se vuelca a un archivo temporal en directory y los
+    bloques se mezclan al final (ordenamiento externo).
+    """
+    runs = []
+    readers = []
+    try:
+        chunk = []
+        for sequence, articulo in enumerate(articulos):
+            chunk.append((articulo.barcode, sequence, articulo.descripcion, articulo.precio_base))
+            if len(chunk) >= chunk_size:
+                chunk.sort()
+                runs.append(_write_run(chunk, directory))
+                chunk = []
+        chunk.sort()
+
+        if runs:
+            if chunk:
+                runs.append(_write_run(chunk, directory))
+                chunk = None
+            readers = [_read_run(path) for path in runs]
+            merged = heapq.merge(*readers)
+        else:
+            merged = iter(chunk)
+
+        # Dentro de cada código el orden de aparición es creciente: vale el último
+        for barcode, group in itertools.groupby(merged, key=operator.itemgetter(0)):
+            for last in group:
+                pass
+            yield barcode, last[2], last[3]
+    finally:
+        for reader in readers:
+            reader.close()
+        for path in runs:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("No se pudo borrar el archivo temporal %s: %s", path, e)
+
+def sorted_product_stream(filename, divisores, drugstore=None, chunk_size=SORT_CHUNK_SIZE, directory=None):
+    """
+    Productos de un archivo ordenados por código de barras, con el divisor aplicado.
+    Con divisores None se generan todos los productos del archivo con divisor 1.
+    """
+    drugstore = drugstore or detect_drugstore_from_filename(filename)
+    errores = {}
+    articulos = iter_catalog_file(filename, divisores, drugstore, errores)
+    for barcode, descripcion, precio_base in sorted_articles(articulos, chunk_size, directory):
+        divisor = divisores[barcode].get('divisor', 1) if divisores is not None else 1
+        producto = build_product(barcode, descripcion, precio_base, drugstore, divisor)
+        if producto is not None:
+            yield producto
+    for error in errores.values():
+        logger.warning("%s", error)
+
+def _tag_stream(stream, position):
+    """Agrega la posición de la droguería a cada producto del flujo, para la unión"""
+    for producto in stream:
+        yield producto.barcode, position, producto
+
+def merge_supplier_streams(streams, drugstore_names, trace=None):
+    """
+    Une por código de barras los flujos ordenados de cada droguería (en el orden de
+    drugstore_names) y genera las filas comparadas de cada código, en orden de código.
+    """
+    if trace is None:
+        trace = logger.isEnabledFor(TRACE)
+    tagged = [_tag_stream(stream, position) for position, stream in enumerate(streams)]
+    merged = heapq.merge(*tagged, key=operator.itemgetter(0))
+    for barcode, group in itertools.groupby(merged, key=operator.itemgetter(0)):
+        datos = [None] * len(streams)
+        for _, position, producto in group:
+            datos[position] = producto
+        yield from compare_supplier_products(barcode, datos, drugstore_names, trace)
+
+def stream_comparison(filenames, divisores, claves, drugstores=None, chunk_size=SORT_CHUNK_SIZE, directory=None):
+    """
+    Compara los archivos de varias droguerías en flujo y genera las FilaComparacion en
+    orden de código de barras. claves es la droguería de cada archivo para las columnas
+    de la comparación; drugstores (opcional) la que se usa para leerlo (None la detecta
+    por el nombre). Con divisores None se comparan los catálogos completos con divisor 1.
+    """
+    filenames = list(filenames)
+    drugstores = list(drugstores) if drugstores is not None else [None] * len(filenames)
+    drugstore_names = tuple(supplier_name(clave) for clave in claves)
+    streams = [
+        sorted_product_stream(filename, divisores, drugstore, chunk_size, directory)
+        for filename, drugstore in zip(filenames, drugstores)
+    ]
+    return merge_supplier_streams(streams, drugstore_names)
@@ -0,0 +1,271 @@
+# Historial de precios de las droguerías (SQLite).
+# Cada catálogo importado se agrega al historial por código de barras, droguería y fecha
+# de vigencia (la columna Vigencia del catálogo; los archivos que no la traen usan la
+# fecha del archivo). Solo se guarda un punto cuando el precio cambia respecto del último
+# conocido, así años de catálogos diarios ocupan lo que cambió y no el catálogo entero
+# por día. La trayectoria de un código se lee por la clave primaria y "qué cambió desde
+# tal fecha" recorre el índice por fecha de vigencia.
+import os
+import sqlite3
+import logging
+import datetime
+import contextlib
+
+from motor_precios import Registro, read_catalog_file, detect_drugstore_from_filename
+from cache_catalogos import file_hash
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = 'historial_precios.sqlite3'
+VIGENCIA_FORMATS = ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d') # Como viene en los catálogos; se guarda AAAA-MM-DD
+
+SCHEMA = """
+-- Cada archivo importado (un mismo contenido se importa una sola vez por droguería)
+CREATE TABLE IF NOT EXISTS importaciones (
+    id INTEGER PRIMARY KEY,
+    hash TEXT,
+    drugstore TEXT NOT NULL,
+    archivo TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    productos INTEGER NOT NULL,
+    cambios INTEGER NOT NULL,
+    UNIQUE (hash, drugstore)
+);
+-- Un punto por cambio de precio; precio_anterior es NULL la primera vez que aparece el código
+CREATE TABLE IF NOT EXISTS precios (
+    barcode TEXT NOT NULL,
+    drugstore TEXT NOT NULL,
+    vigencia TEXT NOT NULL,
+    precio_base REAL NOT NULL,
+    precio_anterior REAL,
+    descripcion TEXT NOT NULL,
+    importacion_id INTEGER NOT NULL,
+    PRIMARY KEY (barcode, drugstore, vigencia)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS precios_por_vigencia ON precios (vigencia, drugstore);
+-- Último precio conocido de cada código, para comparar al importar sin recorrer el historial
+CREATE TABLE IF NOT EXISTS ultimos (
+    drugstore TEXT NOT NULL,
+    barcode TEXT NOT NULL,
+    vigencia TEXT NOT NULL,
+    precio_base REAL NOT NULL,
+    PRIMARY KEY (drugstore, barcode)
+) WITHOUT ROWID;
+"""
+
+def default_history_path():
+    """Ruta del historial junto al programa, igual que el cache de catálogos"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_FILE)
+
+def parse_vigencia(text, default):
+    """Fecha de vigencia como AAAA-MM-DD, o default si el texto está vacío o no es una fecha"""
+    text = text.strip()
+    if text:
+        for date_format in VIGENCIA_FORMATS:
+            try:
+                return datetime.datetime.strptime(text, date_format).date().isoformat()
+            except ValueError:
+                pass
+    return default
+
+def file_date(filename):
+    """Fecha de modificación del archivo como AAAA-MM-DD"""
+    return datetime.date.fromtimestamp(os.stat(filename).st_mtime).isoformat()
+
+class PuntoHistorial(Registro):
+    """Cambio de precio de un código en una droguería, vigente desde la fecha indicada"""
+    __slots__ = ('barcode', 'drugstore', 'vigencia', 'precio_base', 'precio_anterior', 'descripcion')
+
+    def __init__(self, barcode, drugstore, vigencia, precio_base, precio_anterior, descripcion):
+        self.barcode = barcode
+        self.drugstore = drugstore
+        self.vigencia = vigencia
+        self.precio_base = precio_base
+        self.precio_anterior = precio_anterior
+        self.descripcion = descripcion
+
+    @property
+    def variacion(self):
+        """Variación relativa respecto del precio anterior (None si es la primera aparición)"""
+        if not self.precio_anterior:
+            return None
+        return self.precio_base / self.precio_anterior - 1
+
+class HistorialPrecios:
+    """Historial en disco de los precios de cada droguería, compartido entre la GUI y la CLI"""
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Abre una conexión por operación y confirma al salir (igual que el cache de catálogos)"""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_catalog(self, catalogo, fecha, archivo='', digest=None):
+        """
+        Agrega al historial los precios de un CatalogoProveedor. fecha (AAAA-MM-DD) es la
+        vigencia de los artículos que no traen la suya. Devuelve la cantidad de códigos
+        cuyo historial cambió. Los catálogos se pueden importar en cualquier orden: un
+        precio anterior al último conocido se intercala en la trayectoria (corrigiendo el
+        precio anterior del punto que le sigue) y no reemplaza al último.
+        """
+        drugstore = catalogo.drugstore
+        with self._connect() as conn:
+            ultimos = {
+                barcode: (vigencia, precio_base) for barcode, vigencia, precio_base in conn.execute(
+                    "SELECT barcode, vigencia, precio_base FROM ultimos WHERE drugstore = ?", (drugstore,)
+                )
+            }
+            importacion_id = conn.execute(
+                "INSERT INTO importaciones (hash, drugstore, archivo, fecha, productos, cambios)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (digest, drugstore, archivo, fecha, len(catalogo))
+            ).lastrowid
+
+            puntos = []
+            nuevos_ultimos = []
+            intercalados = 0
+            for barcode, articulo in catalogo.articulos.items():
+                anterior = ultimos.get(barcode)
+                vigencia = parse_vigencia(articulo.vigencia, fecha)
+                if anterior is not None and vigencia <= anterior[0] and fecha <= anterior[0]:
+                    # No es posterior al último precio conocido: se intercala en la trayectoria
+                    intercalados += self._merge_point(
+                        conn, barcode, drugstore, vigencia, fecha, articulo.precio_base,
+                        articulo.descripcion, importacion_id
+                    )
+                    continue
+                if anterior is not None and anterior[1] == articulo.precio_base:
+                    continue # Sin cambio de precio
+                if anterior is not None and vigencia <= anterior[0]:
+                    # Cambió el precio sin cambiar la vigencia: se toma la fecha de la importación
+                    vigencia = fecha
+                puntos.append((
+                    barcode, drugstore, vigencia, articulo.precio_base,
+                    anterior[1] if anterior is not None else None, articulo.descripcion, importacion_id
+                ))
+                nuevos_ultimos.append((drugstore, barcode, vigencia, articulo.precio_base))
+
+            # Puntos posteriores al último de cada código: se agregan al final de la trayectoria
+            conn.executemany(
+                "INSERT INTO precios"
+                " (barcode, drugstore, vigencia, precio_base, precio_anterior, descripcion, importacion_id)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", puntos
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO ultimos (drugstore, barcode, vigencia, precio_base) VALUES (?, ?, ?, ?)",
+                nuevos_ultimos
+            )
+            cambios = len(puntos) + intercalados
+            conn.execute("UPDATE importaciones SET cambios = ? WHERE id = ?", (cambios, importacion_id))
+        logger.info("Historial %s: %d productos, %d cambios de precio", drugstore, len(catalogo), cambios)
+        return cambios
+
+    @staticmethod
+    def _merge_point(conn, barcode, drugstore, vigencia, fecha, precio_base, descripcion, importacion_id):
+        """
+        Intercala un precio que no es posterior al último conocido del código y vuelve a
+        escribir su trayectoria: solo quedan los puntos donde el precio cambia, cada uno
+        con el precio del punto anterior, y el último pasa a la tabla de últimos. Si ya hay
+        un punto con esa vigencia y otro precio, el precio cambió sin cambiar la vigencia y
+        se toma la fecha de la importación; si esa fecha tampoco es posterior, queda el
+        último importado. Devuelve 1 si la trayectoria cambió y 0 si no.
+        """
+        filas = conn.execute(
+            "SELECT vigencia, precio_base, precio_anterior, descripcion, importacion_id FROM precios"
+            " WHERE barcode = ? AND drugstore = ? ORDER BY vigencia", (barcode, drugstore)
+        ).fetchall()
+        precios = {vig: (precio, desc, origen) for vig, precio, _, desc, origen in filas}
+        existente = precios.get(vigencia)
+        if existente is not None and existente[0] != precio_base and fecha > vigencia:
+            vigencia = fecha
+            existente = precios.get(vigencia)
+        if existente is not None and existente[0] == precio_base:
+            return 0
+        precios[vigencia] = (precio_base, descripcion, importacion_id)
+
+        trayectoria = []
+        precio_anterior = None
+        for vig in sorted(precios):
+            precio, desc, origen = precios[vig]
+            if precio != precio_anterior:
+                trayectoria.append((vig, precio, precio_anterior, desc, origen))
+                precio_anterior = precio
+        if trayectoria == filas:
+            return 0
+
+        conn.execute("DELETE FROM precios WHERE barcode = ? AND drugstore = ?", (barcode, drugstore))
+        conn.executemany(
+            "INSERT INTO precios"
+            " (barcode, drugstore, vigencia, precio_base, precio_anterior, descripcion, importacion_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(barcode, drugstore) + punto for punto in trayectoria]
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO ultimos (drugstore, barcode, vigencia, precio_base) VALUES (?, ?, ?, ?)",
+            (drugstore, barcode, trayectoria[-1][0], trayectoria[-1][1])
+        )
+        return 1
+
+    def import_file(self, filename, drugstore=None, fecha=None, workers=1):
+        """
+        Lee el catálogo completo del archivo y lo agrega al historial. Un archivo con el
+        mismo contenido que uno ya importado para la droguería no se vuelve a leer (devuelve
+        None); si no, devuelve la cantidad de cambios. fecha es la vigencia de los artículos
+        que no traen la suya (por defecto, la fecha de modificación del archivo).
+        """
+        drugstore = drugstore or detect_drugstore_from_filename(filename)
+        digest = file_hash(filename)
+        with self._connect() as conn:
+            if conn.execute(
+                "SELECT 1 FROM importaciones WHERE hash = ? AND drugstore = ?", (digest, drugstore)
+            ).fetchone():
+                logger.info("Historial %s: %s ya estaba importado", drugstore, filename)
+                return None
+        catalogo = read_catalog_file(filename, workers=workers, drugstore=drugstore)
+        return self.record_catalog(catalogo, fecha or file_date(filename), os.path.abspath(filename), digest)
+
+    def trajectory(self, barcode, drugstore=None):
+        """Cambios de precio del código (en una droguería o en todas), del más antiguo al más reciente"""
+        query = ("SELECT barcode, drugstore, vigencia, precio_base, precio_anterior, descripcion"
+                 " FROM precios WHERE barcode = ?")
+        params = [barcode]
+        if drugstore is not None:
+            query += " AND drugstore = ?"
+            params.append(drugstore)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY vigencia, drugstore", params).fetchall()
+        return [PuntoHistorial(*row) for row in rows]
+
+    def changed_since(self, fecha, drugstore=None, include_new=False):
+        """
+        Cambios de precio con vigencia desde fecha (AAAA-MM-DD, inclusive), ordenados por
+        vigencia y código. Los códigos que aparecen por primera vez solo se incluyen con
+        include_new.
+        """
+        query = ("SELECT barcode, drugstore, vigencia, precio_base, precio_anterior, descripcion"
+                 " FROM precios WHERE vigencia >= ?")
+        params = [fecha]
+        if drugstore is not None:
+            query += " AND drugstore = ?"
+            params.append(drugstore)
+        if not include_new:
+            query += " AND precio_anterior IS NOT NULL"
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY vigencia, barcode, drugstore", params).fetchall()
+        return [PuntoHistorial(*row) for row in rows]
+
+    def imports(self):
+        """Archivos importados: (droguería, archivo, fecha, productos, cambios), del más antiguo al más reciente"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT drugstore, archivo, fecha, productos, cambios FROM importaciones ORDER BY id"
+            ).fetchall()
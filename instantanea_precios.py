@@ -0,0 +1,313 @@
+# Instantáneas binarias de catálogos y comparaciones, para abrir con mmap.
+# Un archivo guarda los códigos de barras ordenados en un arreglo de ancho fijo, los
+# precios en un arreglo de float64 por registro y los textos en un bloque aparte con
+# la posición de cada uno. Abrirlo no lee ni convierte nada: cada consulta es una búsqueda
+# binaria sobre el archivo mapeado, y varios procesos del mismo equipo (GUI, CLI,
+# servicio de consulta) comparten las mismas páginas en memoria.
+#
+# Estructura: 'PRCSNAP1', posición y largo (uint64) del pie, secciones alineadas a 8
+# bytes (códigos, números, posiciones de textos, textos) y al final el pie en JSON con
+# el tipo de instantánea, la cantidad de registros y dónde empieza cada sección.
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import tempfile
+
+from motor_precios import ArticuloCatalogo, FilaComparacion, CatalogoProveedor, ResultadoComparacion
+
+MAGIC = b'PRCSNAP1'
+FORMAT_VERSION = 4 # Incrementar si cambia la estructura del archivo o lo que guarda cada registro
+PREFIX = struct.Struct('<QQ') # Posición y largo del pie
+KIND_CATALOG = 'catalogo'
+KIND_COMPARISON = 'comparacion'
+CATALOG_TEXTS = 4 # Por artículo: descripción, troquel, laboratorio y vigencia (cada uno con su posición)
+COMPARISON_VALUES = 4 # Por droguería: precio_base, precio_unitario, precio_sugerido, ranking
+
+def _write_snapshot(path, meta, keys, numbers, texts):
+    """
+    Escribe una instantánea. keys son los códigos ya ordenados, numbers los float de
+    todos los registros uno detrás de otro y texts los str de todos los registros (la
+    misma cantidad por registro, meta['textos']) uno detrás de otro. Cada texto tiene su
+    posición, así ningún carácter del texto hace falta reservarlo como separador. Se
+    escribe en un archivo temporal que reemplaza al final al anterior, así un lector
+    nunca ve un archivo a medio escribir.
+    """
+    encoded_keys = [key.encode('utf-8') for key in keys]
+    width = max((len(key) for key in encoded_keys), default=1)
+    encoded_texts = [text.encode('utf-8') for text in texts]
+    offsets = array.array('Q', [0])
+    for text in encoded_texts:
+        offsets.append(offsets[-1] + len(text))
+
+    sections = {}
+    # Un nombre temporal único: dos hilos del mismo proceso pueden publicar a la vez
+    descriptor, temporary = tempfile.mkstemp(
+        prefix=os.path.basename(path) + '.', suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+        with open(descriptor, 'wb') as outfile: # Desde acá el archivo cierra el descriptor
+            os.chmod(temporary, 0o644) # mkstemp lo crea legible solo por el usuario; lo leen otros procesos
+            outfile.write(MAGIC + PREFIX.pack(0, 0))
+
+            def write_section(name, data):
+                outfile.write(b'\0' * (-outfile.tell() % 8))
+                sections[name] = [outfile.tell(), len(data)]
+                outfile.write(data)
+
+            # El relleno con ceros conserva el orden de los códigos de distinto largo
+            write_section('codigos', b''.join(key.ljust(width, b'\0') for key in encoded_keys))
+            write_section('numeros', array.array('d', numbers).tobytes())
+            write_section('posiciones', offsets.tobytes())
+            write_section('textos', b''.join(encoded_texts))
+
+            footer = json.dumps(dict(
+                meta, formato=FORMAT_VERSION, cantidad=len(encoded_keys), ancho_codigo=width,
+                orden_bytes=sys.byteorder, secciones=sections
+            ), ensure_ascii=False).encode('utf-8')
+            footer_position = outfile.tell()
+            outfile.write(footer)
+            outfile.seek(len(MAGIC))
+            outfile.write(PREFIX.pack(footer_position, len(footer)))
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+def write_catalog_snapshot(path, catalogo):
+    """Guarda un CatalogoProveedor como instantánea"""
+    barcodes = sorted(catalogo.articulos)
+    articulos = [catalogo.articulos[barcode] for barcode in barcodes]
+    _write_snapshot(
+        path,
+        {'tipo': KIND_CATALOG, 'drugstore': catalogo.drugstore, 'errores': catalogo.errores,
+         'valores': 1, 'textos': CATALOG_TEXTS},
+        barcodes,
+        [articulo.precio_base for articulo in articulos],
+        [
+            text for articulo in articulos
+            for text in (articulo.descripcion, articulo.troquel, articulo.laboratorio, articulo.vigencia)
+        ]
+    )
+
+def write_comparison_snapshot(path, resultado):
+    """Guarda un ResultadoComparacion como instantánea"""
+    barcodes = sorted(resultado.productos)
+    numbers = []
+    texts = []
+    float_divisors = [] # Registros cuyo divisor es float: al leer, el resto vuelve como int
+    for index, barcode in enumerate(barcodes):
+        filas = resultado.productos[barcode]
+        if isinstance(filas[0].divisor, float):
+            float_divisors.append(index)
+        numbers.append(filas[0].divisor)
+        for fila in filas:
+            numbers.extend((fila.precio_base, fila.precio_unitario, fila.precio_sugerido, fila.ranking))
+        texts.append(filas[0].descripcion)
+    _write_snapshot(
+        path,
+        {'tipo': KIND_COMPARISON, 'droguerias': list(resultado.drugstores),
+         'valores': 1 + COMPARISON_VALUES * len(resultado.drugstores), 'textos': 1,
+         'divisores_float': float_divisors},
+        barcodes, numbers, texts
+    )
+
+class _Instantanea:
+    """Base de los lectores: abre el archivo con mmap y busca códigos por búsqueda binaria"""
+    kind = None
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Archivo vacío
+            self._file.close()
+            raise ValueError(f"{path} no es una instantánea de precios")
+        try:
+            self._open_sections()
+        except Exception:
+            self.close()
+            raise
+
+    def _open_sections(self):
+        """Valida el archivo y ubica cada sección"""
+        buffer = self._buffer
+        if len(buffer) < len(MAGIC) + PREFIX.size or buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} no es una instantánea de precios")
+        footer_position, footer_length = PREFIX.unpack_from(buffer, len(MAGIC))
+        self.meta = json.loads(buffer[footer_position:footer_position + footer_length].decode('utf-8'))
+        if self.meta.get('formato') != FORMAT_VERSION or self.meta.get('tipo') != self.kind:
+            raise ValueError(f"{self.path} no es una instantánea de {self.kind} de esta versión")
+
+        self._count = self.meta['cantidad']
+        self._width = self.meta['ancho_codigo']
+        self._values = self.meta['valores']
+        self._texts = self.meta['textos']
+        sections = self.meta['secciones']
+        self._keys_start = sections['codigos'][0]
+        self._texts_start = sections['textos'][0]
+
+        numbers_start, numbers_length = sections['numeros']
+        offsets_start, offsets_length = sections['posiciones']
+        if self.meta['orden_bytes'] == sys.byteorder:
+            # Sin copiar: los arreglos se leen directamente del archivo mapeado
+            view = memoryview(buffer)
+            self._numbers = view[numbers_start:numbers_start + numbers_length].cast('d')
+            self._offsets = view[offsets_start:offsets_start + offsets_length].cast('Q')
+        else:
+            self._numbers = array.array('d', buffer[numbers_start:numbers_start + numbers_length])
+            self._offsets = array.array('Q', buffer[offsets_start:offsets_start + offsets_length])
+            self._numbers.byteswap()
+            self._offsets.byteswap()
+
+    def close(self):
+        """Libera el mapeo y el archivo"""
+        for name in ('_numbers', '_offsets'):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, barcode):
+        return self._find(barcode) >= 0
+
+    def _key(self, index):
+        """Código de barras (en bytes, con el relleno) del registro index"""
+        start = self._keys_start + index * self._width
+        return self._buffer[start:start + self._width]
+
+    def _find(self, barcode):
+        """Posición del código en la instantánea o -1 si no está"""
+        try:
+            key = barcode.encode('utf-8')
+        except AttributeError:
+            return -1
+        if len(key) > self._width:
+            return -1
+        key = key.ljust(self._width, b'\0')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self._count and self._key(low) == key else -1
+
+    def _record_texts(self, index):
+        """Textos del registro index"""
+        first = index * self._texts
+        start = self._texts_start
+        return [
+            self._buffer[start + self._offsets[position]:start + self._offsets[position + 1]].decode('utf-8')
+            for position in range(first, first + self._texts)
+        ]
+
+    def _record_values(self, index):
+        """Números del registro index"""
+        start = index * self._values
+        return self._numbers[start:start + self._values]
+
+    def barcodes(self):
+        """Todos los códigos, en orden"""
+        for index in range(self._count):
+            yield self._key(index).rstrip(b'\0').decode('utf-8')
+
+class InstantaneaCatalogo(_Instantanea):
+    """
+    Catálogo de una droguería abierto desde una instantánea. Se usa igual que un
+    CatalogoProveedor para consultar (get, in, len, apply_divisors) sin cargarlo en memoria.
+    """
+    kind = KIND_CATALOG
+
+    def _open_sections(self):
+        super()._open_sections()
+        self.drugstore = self.meta['drugstore']
+        self.errores = self.meta.get('errores', {})
+
+    def _article(self, index, barcode):
+        """Arma el ArticuloCatalogo del registro index"""
+        descripcion, troquel, laboratorio, vigencia = self._record_texts(index)
+        return ArticuloCatalogo(
+            barcode=barcode,
+            descripcion=descripcion,
+            precio_base=self._numbers[index],
+            drugstore=self.drugstore,
+            troquel=troquel,
+            laboratorio=laboratorio,
+            vigencia=vigencia
+        )
+
+    def get(self, barcode):
+        """Devuelve el artículo del código o None si no está en el catálogo"""
+        index = self._find(barcode)
+        return self._article(index, barcode) if index >= 0 else None
+
+    apply_divisors = CatalogoProveedor.apply_divisors # Solo usa get y errores
+
+    def to_catalog(self):
+        """Carga la instantánea completa en un CatalogoProveedor"""
+        catalogo = CatalogoProveedor(self.drugstore, errores=dict(self.errores))
+        for index, barcode in enumerate(self.barcodes()):
+            catalogo.articulos[barcode] = self._article(index, barcode)
+        return catalogo
+
+class InstantaneaComparacion(_Instantanea):
+    """Resultado de una comparación abierto desde una instantánea: get devuelve las filas de un código"""
+    kind = KIND_COMPARISON
+
+    def _open_sections(self):
+        super()._open_sections()
+        self.drugstores = tuple(self.meta['droguerias'])
+        self._float_divisors = frozenset(self.meta['divisores_float'])
+
+    def _rows(self, index, barcode):
+        """Arma las FilaComparacion del registro index"""
+        values = self._record_values(index)
+        descripcion, = self._record_texts(index)
+        # El divisor conserva su tipo: 2 y 2.0 se muestran distinto en la comparación
+        divisor = values[0] if index in self._float_divisors else int(values[0])
+        filas = []
+        for position, name in enumerate(self.drugstores):
+            start = 1 + position * COMPARISON_VALUES
+            precio_base, precio_unitario, precio_sugerido, ranking = values[start:start + COMPARISON_VALUES]
+            ranking = int(ranking)
+            if not ranking: # No disponible: _build_row deja los precios en cero (int)
+                precio_base = precio_unitario = 0
+            filas.append(FilaComparacion(
+                barcode=barcode,
+                descripcion=descripcion,
+                divisor=divisor,
+                precio_base=precio_base,
+                precio_unitario=precio_unitario,
+                precio_sugerido=int(precio_sugerido),
+                drugstore=name,
+                disponible=ranking > 0,
+                es_precio_alto=ranking == 1,
+                ranking=ranking
+            ))
+        return tuple(filas)
+
+    def get(self, barcode):
+        """Devuelve las filas del código o None si no está en el resultado"""
+        index = self._find(barcode)
+        return self._rows(index, barcode) if index >= 0 else None
+
+    def to_result(self):
+        """Carga la instantánea completa en un ResultadoComparacion"""
+        resultado = ResultadoComparacion(self.drugstores)
+        for index, barcode in enumerate(self.barcodes()):
+            resultado.set_product(barcode, self._rows(index, barcode))
+        return resultado
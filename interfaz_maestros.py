@@ -0,0 +1,1320 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import threading # Para que la interfaz no se congele al procesar
+import sys
+import csv # Lo usaremos para formatear la salida para el portapapeles
+import os # Para mostrar nombres de archivo
+import shutil # Para guardar una copia de la lista publicada antes de actualizarla
+import time # Para medir lo que tarda en mostrarse la tabla
+
+try:
+    import pyperclip # Para copiar al portapapeles
+except ImportError:
+    pyperclip = None
+
+from procesar_maestros import (
+    CONFIG, TARGET_DIVISORS, RESULT_HEADERS, save_config, detect_file_type,
+    load_catalogs_parallel, build_comparison, compare_product, format_result_row, open_cache,
+    ResultadoComparacion, configure_logging, timed_stage, record_stage
+)
+from lista_precios import (
+    ItemLista, ListaPrecios, read_price_list, write_price_list, changed_items, merge_price_lists,
+    changes_filename, backup_filename, same_file
+)
+
+RESULT_VISIBLE_ROWS = 20 # Filas de la tabla principal de resultados (se reciclan al desplazarse)
+PRICE_GRID_VISIBLE_ROWS = 22 # Filas de widgets de la ventana de selección de precios (se reciclan al desplazarse)
+
+# --- Clase de la Aplicación GUI ---
+class App:
+    def __init__(self, root):
+        """Inicializa la interfaz gráfica de usuario."""
+        self.root = root
+        self.root.title("Procesador de Precios - Comparador de Droguerías v2.0")
+        self.root.geometry("1200x700")
+        
+        # Cargar configuración
+        self.config = CONFIG
+        # Cache de archivos procesados: reprocesar tras editar divisores no relee los archivos
+        self.cache = open_cache()
+        # Catálogos completos en memoria: ruta -> ((tamaño, mtime_ns), CatalogoProveedor).
+        # Los divisores se aplican al comparar, así agregar códigos no relee los archivos
+        self.catalogs = {}
+        # Resultados mostrados en la tabla, para actualizar un solo código sin reprocesar:
+        # archivos comparados, el resultado por código y todas las filas en el orden de la tabla
+        self.processing_files = None
+        self.compared_files = None
+        self.results = ResultadoComparacion()
+        self.result_rows = []
+        self.result_first = 0  # Posición de la fila que se muestra primera en la tabla
+        self.color_asopro = self.config['configuracion']['color_asoprofarma']
+        self.color_sud = self.config['configuracion']['color_delsud']
+
+        # Variables de Tkinter para archivos separados
+        self.filepath_asopro = tk.StringVar()
+        self.filepath_sud = tk.StringVar()
+        self.status_text = tk.StringVar()
+        self.status_text.set("Seleccione archivos para ambas droguerías (TXT o CSV).")
+
+        # --- Frame superior para selección de archivos ---
+        top_frame = ttk.Frame(root, padding="10")
+        top_frame.pack(fill=tk.X)
+
+        # Archivo Asoprofarma
+        asopro_frame = ttk.Frame(top_frame)
+        asopro_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(asopro_frame, text="Archivo Asoprofarma:", width=20).pack(side=tk.LEFT, padx=5)
+        self.file_entry_asopro = ttk.Entry(asopro_frame, textvariable=self.filepath_asopro, width=50, state='readonly')
+        self.file_entry_asopro.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        self.select_button_asopro = ttk.Button(asopro_frame, text="Seleccionar...", command=self.select_file_asopro)
+        self.select_button_asopro.pack(side=tk.LEFT, padx=5)
+        
+        # Archivo Del Sud
+        sud_frame = ttk.Frame(top_frame)
+        sud_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(sud_frame, text="Archivo Del Sud:", width=20).pack(side=tk.LEFT, padx=5)
+        self.file_entry_sud = ttk.Entry(sud_frame, textvariable=self.filepath_sud, width=50, state='readonly')
+        self.file_entry_sud.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        self.select_button_sud = ttk.Button(sud_frame, text="Seleccionar...", command=self.select_file_sud)
+        self.select_button_sud.pack(side=tk.LEFT, padx=5)
+
+        # --- Frame de botones ---
+        button_frame = ttk.Frame(root, padding="5")
+        button_frame.pack(fill=tk.X)
+        
+        self.process_button = ttk.Button(button_frame, text="Procesar y Comparar", command=self.start_processing, state=tk.DISABLED)
+        self.process_button.pack(side=tk.LEFT, padx=5)
+        
+        self.config_button = ttk.Button(button_frame, text="Configurar Códigos", command=self.open_config_window)
+        self.config_button.pack(side=tk.LEFT, padx=5)
+
+        # --- Frame de leyenda de colores ---
+        legend_frame = ttk.Frame(root, padding="5")
+        legend_frame.pack(fill=tk.X)
+        
+        tk.Label(legend_frame, text="Leyenda:", font=('Arial', 10, 'bold')).pack(side=tk.LEFT, padx=5)
+        tk.Label(legend_frame, text="PRECIO ALTO", bg='#E8F5E9', fg="black", padx=10, pady=2, font=('Arial', 9, 'underline')).pack(side=tk.LEFT, padx=5)
+        tk.Label(legend_frame, text="DISPONIBLE", bg='#F0F8FF', fg="black", padx=10, pady=2).pack(side=tk.LEFT, padx=5)
+        tk.Label(legend_frame, text="(Precio sugerido redondeado hacia arriba)", font=('Arial', 9, 'italic')).pack(side=tk.LEFT, padx=10)
+
+        # --- Frame para la tabla de resultados ---
+        tree_frame = ttk.Frame(root, padding="10")
+        tree_frame.pack(expand=True, fill=tk.BOTH)
+
+        # Crear la tabla con columnas para mostrar ambas droguerías incluyendo precio base
+        columns = ("Descripción", "Divisor", "Precio Base", "Precio Unitario", "Droguería", "Precio Sugerido")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=RESULT_VISIBLE_ROWS)
+        
+        # Configurar encabezados
+        self.tree.heading("Descripción", text="Descripción del Producto")
+        self.tree.heading("Divisor", text="Divisor")
+        self.tree.heading("Precio Base", text="Precio Base")
+        self.tree.heading("Precio Unitario", text="Precio Unitario")
+        self.tree.heading("Droguería", text="Droguería")
+        self.tree.heading("Precio Sugerido", text="Precio Sugerido")
+
+        # Ajustar ancho de columnas
+        self.tree.column("Descripción", width=300, anchor=tk.W)
+        self.tree.column("Divisor", width=70, anchor=tk.CENTER)
+        self.tree.column("Precio Base", width=100, anchor=tk.E)
+        self.tree.column("Precio Unitario", width=110, anchor=tk.E)
+        self.tree.column("Droguería", width=100, anchor=tk.CENTER)
+        self.tree.column("Precio Sugerido", width=110, anchor=tk.E)
+        
+        # Configurar tags para colores simplificados
+        self.tree.tag_configure('disponible', background='#F0F8FF', font=('Arial', 9))
+        self.tree.tag_configure('precio_alto', background='#E8F5E9', font=('Arial', 9, 'underline'))
+        self.tree.tag_configure('no_disponible', background='#F5F5F5', font=('Arial', 9), foreground='#999999')
+
+        # Tabla virtual: un conjunto fijo de ítems que se vuelven a llenar al desplazarse,
+        # así mostrar miles de códigos tarda lo mismo que mostrar unos pocos
+        self.result_slots = [self.tree.insert('', tk.END) for _ in range(RESULT_VISIBLE_ROWS)]
+        self.tree.detach(*self.result_slots)
+
+        # Scrollbar (mueve la ventana de filas visibles, no los ítems de la tabla)
+        self.result_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.scroll_results)
+
+        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        self.result_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.show_results_from(0)
+
+        # Rueda del mouse sobre la tabla (Windows/macOS y Linux)
+        self.tree.bind("<MouseWheel>", self.on_results_mousewheel)
+        self.tree.bind("<Button-4>", self.on_results_mousewheel)
+        self.tree.bind("<Button-5>", self.on_results_mousewheel)
+
+        # --- Frame de botones inferiores ---
+        bottom_frame = ttk.Frame(root, padding="5")
+        bottom_frame.pack(fill=tk.X)
+        
+        self.copy_button = ttk.Button(bottom_frame, text="Copiar al Portapapeles", command=self.copy_to_clipboard, state=tk.DISABLED)
+        self.copy_button.pack(side=tk.LEFT, padx=5)
+        
+        self.export_button = ttk.Button(bottom_frame, text="Exportar a CSV", command=self.open_price_selection_window, state=tk.DISABLED)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+
+        # --- Barra de estado ---
+        status_bar = ttk.Label(root, textvariable=self.status_text, relief=tk.SUNKEN, anchor=tk.W, padding="2 5")
+        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def select_file_asopro(self):
+        """Abre el diálogo para seleccionar archivo de Asoprofarma."""
+        filename = filedialog.askopenfilename(
+            title="Seleccionar archivo de Asoprofarma",
+            filetypes=(
+                ("Archivos soportados", "*.txt;*.csv"),
+                ("Archivos de Texto", "*.txt"),
+                ("Archivos CSV", "*.csv"),
+                ("Todos los archivos", "*.*")
+            )
+        )
+        if filename:
+            self.filepath_asopro.set(filename)
+            file_type = detect_file_type(filename)
+            self.update_status_and_buttons()
+            # Limpiar resultados anteriores
+            self.clear_results()
+    
+    def select_file_sud(self):
+        """Abre el diálogo para seleccionar archivo de Del Sud."""
+        filename = filedialog.askopenfilename(
+            title="Seleccionar archivo de Del Sud",
+            filetypes=(
+                ("Archivos soportados", "*.txt;*.csv"),
+                ("Archivos de Texto", "*.txt"),
+                ("Archivos CSV", "*.csv"),
+                ("Todos los archivos", "*.*")
+            )
+        )
+        if filename:
+            self.filepath_sud.set(filename)
+            file_type = detect_file_type(filename)
+            self.update_status_and_buttons()
+            # Limpiar resultados anteriores
+            self.clear_results()
+    
+    def update_status_and_buttons(self):
+        """Actualiza el estado de la interfaz según los archivos seleccionados."""
+        asopro_file = self.filepath_asopro.get()
+        sud_file = self.filepath_sud.get()
+        
+        if asopro_file and sud_file:
+            self.status_text.set(f"Archivos listos: Asopro ({os.path.basename(asopro_file)}) - Sud ({os.path.basename(sud_file)})")
+            self.process_button.config(state=tk.NORMAL)
+        elif asopro_file:
+            self.status_text.set(f"Archivo Asoprofarma seleccionado: {os.path.basename(asopro_file)} - Falta Del Sud")
+            self.process_button.config(state=tk.DISABLED)
+        elif sud_file:
+            self.status_text.set(f"Archivo Del Sud seleccionado: {os.path.basename(sud_file)} - Falta Asoprofarma")
+            self.process_button.config(state=tk.DISABLED)
+        else:
+            self.status_text.set("Seleccione archivos para ambas droguerías (TXT o CSV).")
+            self.process_button.config(state=tk.DISABLED)
+        
+        # Deshabilitar botones de exportación hasta que se procesen los archivos
+        self.copy_button.config(state=tk.DISABLED)
+        self.export_button.config(state=tk.DISABLED)
+
+    def start_processing(self):
+        """Inicia el procesamiento de ambos archivos en un hilo separado."""
+        asopro_file = self.filepath_asopro.get()
+        sud_file = self.filepath_sud.get()
+        
+        if not asopro_file or not sud_file:
+            messagebox.showwarning("Archivos incompletos", "Por favor, seleccione archivos para ambas droguerías.")
+            return
+
+        # Deshabilitar botones durante el procesamiento
+        self.select_button_asopro.config(state=tk.DISABLED)
+        self.select_button_sud.config(state=tk.DISABLED)
+        self.process_button.config(state=tk.DISABLED)
+        self.copy_button.config(state=tk.DISABLED)
+        self.export_button.config(state=tk.DISABLED)
+        self.status_text.set("Procesando archivos... por favor espere.")
+        self.root.update_idletasks()
+
+        # Limpiar tabla
+        self.clear_results()
+        self.processing_files = (asopro_file, sud_file)
+
+        # Ejecutar procesamiento en hilo separado
+        thread = threading.Thread(target=self.run_processing_thread, args=(asopro_file, sud_file), daemon=True)
+        thread.start()
+
+    def run_processing_thread(self, asopro_file, sud_file):
+        """Función que se ejecuta en el hilo secundario. Procesa ambos archivos."""
+        try:
+            # Leer solo los catálogos que no están en memoria o cambiaron, en paralelo
+            # (un proceso por archivo), e ir guardando cada uno a medida que termina
+            filenames = [asopro_file, sud_file]
+            catalogs = {position: self.loaded_catalog(filename) for position, filename in enumerate(filenames)}
+            pending = [position for position, catalog in catalogs.items() if catalog is None]
+            with timed_stage('parse'):
+                if pending:
+                    keys = {position: self.catalog_key(filenames[position]) for position in pending}
+                    load_catalogs = self.cache.load_catalogs if self.cache else load_catalogs_parallel
+                    for index, catalog in load_catalogs([filenames[position] for position in pending]):
+                        position = pending[index]
+                        catalogs[position] = catalog
+                        self.catalogs[filenames[position]] = (keys[position], catalog)
+                        remaining = sum(1 for catalog in catalogs.values() if catalog is None)
+                        status = f"Procesado {os.path.basename(filenames[position])}"
+                        if remaining:
+                            status += f" - faltan {remaining} archivo(s)..."
+                        self.root.after(0, self.status_text.set, status)
+
+            # Aplicar los divisores actuales sobre los catálogos en memoria
+            asopro_results = catalogs[0].apply_divisors(TARGET_DIVISORS)
+            sud_results = catalogs[1].apply_divisors(TARGET_DIVISORS)
+
+            # Comparar resultados
+            compared_results = build_comparison(asopro_results, sud_results)
+            
+            # Actualizar GUI
+            self.root.after(0, self.update_gui_with_results, compared_results, None)
+        except Exception as e:
+            self.root.after(0, self.update_gui_with_results, ResultadoComparacion(), e)
+
+    def clear_results(self):
+        """Vacía la tabla de resultados y olvida qué archivos se compararon"""
+        self.compared_files = None
+        self.results = ResultadoComparacion()
+        self.result_rows = []
+        self.show_results_from(0)
+
+    def catalog_key(self, filename):
+        """Tamaño y fecha de modificación del archivo, para saber si el catálogo en memoria sigue vigente"""
+        stat = os.stat(filename)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def loaded_catalog(self, filename):
+        """Catálogo en memoria del archivo, o None si no se leyó o el archivo cambió desde entonces"""
+        entry = self.catalogs.get(filename)
+        if entry is None:
+            return None
+        try:
+            key = self.catalog_key(filename)
+        except OSError:
+            return None
+        return entry[1] if entry[0] == key else None
+
+    def describe_live_price(self, barcode, divisor_text):
+        """Precio actual de un código en los catálogos cargados, para la ventana de configuración"""
+        if len(barcode) != 13:
+            return ""
+        try:
+            divisor = float(divisor_text)
+        except ValueError:
+            divisor = 0
+
+        descripcion = None
+        parts = []
+        for name, filename in (("ASOPRO", self.filepath_asopro.get()), ("DEL SUD", self.filepath_sud.get())):
+            catalog = self.loaded_catalog(filename) if filename else None
+            if catalog is None:
+                continue
+            articulo = catalog.get(barcode)
+            if articulo is None:
+                parts.append(f"{name}: no disponible")
+                continue
+            descripcion = descripcion or articulo.descripcion
+            if divisor > 0:
+                parts.append(f"{name}: ${articulo.precio_base:.2f} /{divisor:g} = ${articulo.precio_base / divisor:.2f}")
+            else:
+                parts.append(f"{name}: ${articulo.precio_base:.2f}")
+
+        if not parts:
+            return "Procese los archivos para ver el precio actual."
+        if descripcion:
+            parts.insert(0, descripcion)
+        return " | ".join(parts)
+
+    def update_gui_with_results(self, processed_results, error):
+        """
+        Actualiza la GUI con los resultados o muestra un mensaje de error.
+        Esta función SIEMPRE se ejecuta en el hilo principal de Tkinter.
+        """
+        if error:
+            messagebox.showerror("Error durante el procesamiento", f"Ocurrió un error:\n{error}")
+            self.status_text.set("Error durante el procesamiento.")
+        else:
+            # Solo se formatean las filas visibles; el resto se muestra al desplazarse
+            self.compared_files = self.processing_files
+            self.results = processed_results
+            self.result_rows = processed_results.rows()
+            render_started = time.perf_counter()
+            self.show_results_from(0)
+            record_stage('render', time.perf_counter() - render_started)
+            self.show_summary()
+
+        # Rehabilitar botones
+        self.select_button_asopro.config(state=tk.NORMAL)
+        self.select_button_sud.config(state=tk.NORMAL)
+        self.process_button.config(state=tk.NORMAL)
+
+
+    def render_results(self):
+        """Llena los ítems visibles de la tabla con las filas que les toca mostrar"""
+        for slot, iid in enumerate(self.result_slots):
+            position = self.result_first + slot
+            if position < len(self.result_rows):
+                item = self.result_rows[position]
+                self.tree.item(iid, values=format_result_row(item), tags=(self.tag_for_row(item),))
+                self.tree.move(iid, '', slot)
+            else:
+                self.tree.detach(iid)
+
+    def show_results_from(self, first):
+        """Desplaza la tabla para que la primera fila visible sea la de la posición first"""
+        total = len(self.result_rows)
+        visible = len(self.result_slots)
+        self.result_first = max(0, min(first, total - visible))
+        self.render_results()
+        if total > visible:
+            self.result_scrollbar.set(self.result_first / total, (self.result_first + visible) / total)
+        else:
+            self.result_scrollbar.set(0, 1)
+
+    def scroll_results(self, *args):
+        """Comando de la barra de desplazamiento ('moveto', fracción) o ('scroll', n, 'units'|'pages')"""
+        if args[0] == 'moveto':
+            self.show_results_from(int(round(float(args[1]) * len(self.result_rows))))
+        elif args[0] == 'scroll':
+            step = len(self.result_slots) if args[2] == 'pages' else 1
+            self.show_results_from(self.result_first + int(args[1]) * step)
+
+    def on_results_mousewheel(self, event):
+        """Desplaza la tabla de resultados con la rueda del mouse"""
+        if event.num == 4 or event.delta > 0:
+            self.show_results_from(self.result_first - 3)
+        else:
+            self.show_results_from(self.result_first + 3)
+        return "break" # La tabla no tiene más ítems que los visibles: no hay nada que desplazar adentro
+
+    def tag_for_row(self, item):
+        """Tag de color de una fila comparada"""
+        if not item.disponible:
+            return 'no_disponible'
+        elif item.es_precio_alto:
+            return 'precio_alto'
+        return 'disponible'
+
+    def show_summary(self):
+        """Actualiza la barra de estado con las estadísticas de la tabla y habilita la exportación"""
+        if not self.results:
+            self.status_text.set("Proceso completado. No se encontraron productos en la lista de códigos configurados.")
+            self.copy_button.config(state=tk.DISABLED)
+            self.export_button.config(state=tk.DISABLED)
+            return
+
+        productos_procesados = len(self.results)
+        asopro_count, sud_count = self.results.available_counts()
+        productos_disponibles = asopro_count + sud_count
+
+        self.status_text.set(
+            f"Procesados {productos_procesados} productos | "
+            f"Disponibles: {productos_disponibles} | "
+            f"ASOPRO: {asopro_count} | DEL SUD: {sud_count}"
+        )
+        self.copy_button.config(state=tk.NORMAL)
+        self.export_button.config(state=tk.NORMAL)
+
+    def find_insert_index(self, descripcion):
+        """Posición de result_rows donde va un producto nuevo para mantener el orden por descripción"""
+        low, high = 0, len(self.result_rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self.result_rows[middle].descripcion <= descripcion:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def refresh_product(self, barcode):
+        """
+        Recalcula solo las dos filas de un código agregado, eliminado o con otro divisor
+        y las actualiza en la tabla, sin reprocesar ni volver a ordenar todas las filas.
+        """
+        if self.compared_files is None:
+            return
+        catalogs = [self.loaded_catalog(filename) for filename in self.compared_files]
+        if None in catalogs:
+            return # Algún archivo cambió: hace falta volver a procesar
+
+        divisores = {barcode: TARGET_DIVISORS[barcode]} if barcode in TARGET_DIVISORS else {}
+        asopro_data = catalogs[0].apply_divisors(divisores).get(barcode)
+        sud_data = catalogs[1].apply_divisors(divisores).get(barcode)
+
+        previous = self.results.productos.get(barcode)
+        if previous:
+            # Quitar las filas anteriores del código: están juntas entre las de su descripción
+            end = self.find_insert_index(previous[0].descripcion)
+            start = end
+            while start > 0 and self.result_rows[start - 1].descripcion == previous[0].descripcion:
+                start -= 1
+            self.result_rows[start:end] = [row for row in self.result_rows[start:end] if row.barcode != barcode]
+        self.results.discard(barcode)
+
+        # Si ya no está configurado o no aparece en ninguna droguería, solo se quita
+        if asopro_data is not None or sud_data is not None:
+            rows = compare_product(barcode, asopro_data, sud_data)
+            index = self.find_insert_index(rows[0].descripcion)
+            self.result_rows[index:index] = rows
+            self.results.set_product(barcode, rows)
+
+        self.show_results_from(self.result_first)
+        self.show_summary()
+
+    def copy_to_clipboard(self):
+        """Copia el contenido de la tabla al portapapeles con formato para Excel."""
+        if not self.results:
+            messagebox.showinfo("Nada que copiar", "La tabla de resultados está vacía.")
+            return
+
+        # Agregar encabezados
+        headers = RESULT_HEADERS
+        output_lines = ["\t".join(headers)]
+        
+        # Agregar datos
+        for item in self.results.rows():
+            row_string = "\t".join(str(v) for v in format_result_row(item))
+            output_lines.append(row_string)
+
+        output_string = "\n".join(output_lines)
+
+        try:
+            pyperclip.copy(output_string)
+            messagebox.showinfo("Copiado", "¡Tabla copiada al portapapeles!\nPuede pegarla en Excel (Ctrl+V).")
+            self.status_text.set("Resultados copiados al portapapeles.")
+        except Exception as e:
+            messagebox.showerror("Error al copiar", f"No se pudo copiar al portapapeles:\n{e}")
+            self.status_text.set("Error al copiar al portapapeles.")
+    
+    def export_to_csv(self):
+        """Exporta los resultados a un archivo CSV."""
+        if not self.results:
+            messagebox.showinfo("Nada que exportar", "La tabla de resultados está vacía.")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Guardar resultados como CSV",
+            defaultextension=".csv",
+            filetypes=(("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*"))
+        )
+        
+        if filename:
+            try:
+                with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                    writer = csv.writer(csvfile)
+                    # Escribir encabezados
+                    writer.writerow(RESULT_HEADERS)
+                    
+                    # Escribir datos
+                    for item in self.results.rows():
+                        writer.writerow(format_result_row(item))
+                
+                messagebox.showinfo("Exportación exitosa", f"Resultados exportados a:\n{filename}")
+                self.status_text.set(f"Resultados exportados a {os.path.basename(filename)}")
+            except Exception as e:
+                messagebox.showerror("Error al exportar", f"No se pudo exportar el archivo:\n{e}")
+    
+    def open_config_window(self):
+        """Abre la ventana de configuración de códigos de barras."""
+        config_window = tk.Toplevel(self.root)
+        config_window.title("Configuración de Códigos de Barras")
+        config_window.geometry("800x600")
+        
+        # Frame para la lista de códigos
+        list_frame = ttk.Frame(config_window, padding="10")
+        list_frame.pack(expand=True, fill=tk.BOTH)
+        
+        # Crear Treeview para mostrar códigos
+        columns = ("Código", "Divisor", "Descripción")
+        config_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=15)
+        
+        config_tree.heading("Código", text="Código de Barras")
+        config_tree.heading("Divisor", text="Divisor")
+        config_tree.heading("Descripción", text="Descripción")
+        
+        config_tree.column("Código", width=150)
+        config_tree.column("Divisor", width=100, anchor=tk.CENTER)
+        config_tree.column("Descripción", width=400)
+        
+        # Cargar códigos actuales
+        for barcode, info in TARGET_DIVISORS.items():
+            config_tree.insert('', tk.END, iid=barcode, values=(
+                barcode,
+                info.get('divisor', 1),
+                info.get('descripcion', 'Sin descripción')
+            ))
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=config_tree.yview)
+        config_tree.configure(yscrollcommand=scrollbar.set)
+        
+        config_tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Frame para agregar nuevo código
+        add_frame = ttk.LabelFrame(config_window, text="Agregar Nuevo Código", padding="10")
+        add_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        # Campos de entrada
+        ttk.Label(add_frame, text="Código de Barras:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        barcode_entry = ttk.Entry(add_frame, width=20)
+        barcode_entry.grid(row=0, column=1, padx=5, pady=5)
+        
+        ttk.Label(add_frame, text="Divisor:").grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+        divisor_entry = ttk.Entry(add_frame, width=10)
+        divisor_entry.grid(row=0, column=3, padx=5, pady=5)
+        
+        ttk.Label(add_frame, text="Descripción:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        desc_entry = ttk.Entry(add_frame, width=40)
+        desc_entry.grid(row=1, column=1, columnspan=3, padx=5, pady=5, sticky=tk.W+tk.E)
+
+        # Precio actual del código en los catálogos ya leídos, sin volver a procesar
+        live_price_text = tk.StringVar()
+        ttk.Label(add_frame, textvariable=live_price_text).grid(row=2, column=0, columnspan=4, padx=5, pady=5, sticky=tk.W)
+
+        def refresh_live_price(event=None):
+            live_price_text.set(self.describe_live_price(barcode_entry.get().strip(), divisor_entry.get().strip()))
+
+        def show_selected_price(event=None):
+            selected = config_tree.selection()
+            if selected:
+                live_price_text.set(self.describe_live_price(
+                    config_tree.set(selected[0], "Código"), config_tree.set(selected[0], "Divisor")
+                ))
+
+        barcode_entry.bind('<KeyRelease>', refresh_live_price)
+        divisor_entry.bind('<KeyRelease>', refresh_live_price)
+        config_tree.bind('<<TreeviewSelect>>', show_selected_price)
+        
+        def add_barcode():
+            barcode = barcode_entry.get().strip()
+            try:
+                divisor = float(divisor_entry.get())
+            except ValueError:
+                messagebox.showerror("Error", "El divisor debe ser un número válido.")
+                return
+            
+            if not barcode or len(barcode) != 13:
+                messagebox.showerror("Error", "El código de barras debe tener 13 dígitos.")
+                return
+            
+            if divisor <= 0:
+                messagebox.showerror("Error", "El divisor debe ser mayor que cero.")
+                return
+            
+            # Agregar al diccionario
+            TARGET_DIVISORS[barcode] = {
+                'divisor': divisor,
+                'descripcion': desc_entry.get() or 'Sin descripción'
+            }
+            
+            # Actualizar configuración global
+            CONFIG['divisores'] = TARGET_DIVISORS
+            
+            # Guardar configuración
+            if save_config(CONFIG, on_error=show_config_error):
+                # Actualizar árbol (si el código ya existía, se reemplaza su fila)
+                values = (barcode, divisor, desc_entry.get() or 'Sin descripción')
+                if config_tree.exists(barcode):
+                    config_tree.item(barcode, values=values)
+                else:
+                    config_tree.insert('', tk.END, iid=barcode, values=values)
+
+                # Actualizar solo las filas de este código en la tabla de resultados
+                self.refresh_product(barcode)
+                
+                # Limpiar campos
+                barcode_entry.delete(0, tk.END)
+                divisor_entry.delete(0, tk.END)
+                desc_entry.delete(0, tk.END)
+                refresh_live_price()
+                
+                messagebox.showinfo("Éxito", "Código agregado correctamente.")
+        
+        def delete_barcode():
+            selected = config_tree.selection()
+            if not selected:
+                messagebox.showwarning("Selección", "Por favor seleccione un código para eliminar.")
+                return
+            
+            # Leer el código como texto: 'values' lo convierte a número y pierde los ceros iniciales
+            barcode = config_tree.set(selected[0], "Código")
+            
+            if messagebox.askyesno("Confirmar", f"¿Está seguro de eliminar el código {barcode}?"):
+                # Eliminar del diccionario
+                if barcode in TARGET_DIVISORS:
+                    del TARGET_DIVISORS[barcode]
+                    CONFIG['divisores'] = TARGET_DIVISORS
+                    
+                    if save_config(CONFIG, on_error=show_config_error):
+                        config_tree.delete(selected[0])
+                        self.refresh_product(barcode)
+                        messagebox.showinfo("Éxito", "Código eliminado correctamente.")
+        
+        # Botones
+        button_frame = ttk.Frame(add_frame)
+        button_frame.grid(row=3, column=0, columnspan=4, pady=10)
+        
+        ttk.Button(button_frame, text="Agregar Código", command=add_barcode).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Eliminar Seleccionado", command=delete_barcode).pack(side=tk.LEFT, padx=5)
+        
+        # Botón cerrar
+        ttk.Button(config_window, text="Cerrar", command=config_window.destroy).pack(pady=10)
+
+    def open_price_selection_window(self):
+        """Abre la ventana compacta de selección de precios para exportar CSV."""
+        if not self.results:
+            messagebox.showinfo("Nada que exportar", "La tabla de resultados está vacía.")
+            return
+
+        # Procesar datos de la tabla actual para obtener información completa
+        self.products_data = self.prepare_products_for_selection()
+
+        # Estado de la selección en listas paralelas, una posición por producto en orden
+        # alfabético; los widgets de la tabla solo muestran las filas visibles
+        self.product_keys = sorted(self.products_data, key=lambda barcode: (self.products_data[barcode]['descripcion'], barcode))
+        self.product_rows = [self.products_data[barcode] for barcode in self.product_keys]
+        self.product_positions = {barcode: position for position, barcode in enumerate(self.product_keys)}
+        self.price_selections = [self.initial_price_selection(data) for data in self.product_rows]
+        self.custom_prices = [0.0] * len(self.product_keys)
+        
+        # Crear ventana modal compacta con tamaño auto-ajustable
+        self.price_window = tk.Toplevel(self.root)
+        self.price_window.title("🎯 Selección de Precios para Exportar")
+        self.price_window.transient(self.root)
+        self.price_window.grab_set()
+        self.price_window.configure(bg='#f8f9fa')
+        
+        # --- Header compacto ---
+        header_frame = tk.Frame(self.price_window, bg='#2c3e50', height=40)
+        header_frame.pack(fill=tk.X)
+        header_frame.pack_propagate(False)
+        
+        title_label = tk.Label(header_frame, text="Configuración de Exportación de Precios", 
+                              font=('Arial', 12, 'bold'), fg='white', bg='#2c3e50')
+        title_label.pack(pady=8)
+        
+        # --- Frame principal ---
+        main_container = tk.Frame(self.price_window, bg='#f8f9fa')
+        main_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # --- Configuración del archivo compacta ---
+        config_frame = tk.LabelFrame(main_container, text="⚙️ Configuración", 
+                                    font=('Arial', 9, 'bold'), bg='#f8f9fa', fg='#2c3e50')
+        config_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        config_inner = tk.Frame(config_frame, bg='#f8f9fa')
+        config_inner.pack(fill=tk.X, padx=5, pady=5)
+        
+        # Campos de configuración horizontales
+        tk.Label(config_inner, text="📅 Fecha:", font=('Arial', 9), bg='#f8f9fa').grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        self.export_date = tk.StringVar(value="20-feb")
+        date_entry = tk.Entry(config_inner, textvariable=self.export_date, width=12, font=('Arial', 9))
+        date_entry.grid(row=0, column=1, padx=(0, 15), sticky=tk.W)
+        
+        tk.Label(config_inner, text="📍 Ubicación:", font=('Arial', 9), bg='#f8f9fa').grid(row=0, column=2, sticky=tk.W, padx=(0, 5))
+        self.export_location = tk.StringVar(value="San Luis")
+        location_entry = tk.Entry(config_inner, textvariable=self.export_location, width=12, font=('Arial', 9))
+        location_entry.grid(row=0, column=3, sticky=tk.W)
+        
+        # --- Botones de selección masiva compactos ---
+        bulk_frame = tk.Frame(main_container, bg='#f8f9fa')
+        bulk_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        tk.Label(bulk_frame, text="🚀 Selección Rápida:", font=('Arial', 9, 'bold'), 
+                bg='#f8f9fa', fg='#2c3e50').pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Botones más compactos
+        asopro_btn = tk.Button(bulk_frame, text="✓ ASOPRO", font=('Arial', 8, 'bold'),
+                              bg='#27ae60', fg='white', relief=tk.FLAT, padx=12, pady=4,
+                              command=lambda: self.bulk_select_modern('ASOPROFARMA'))
+        asopro_btn.pack(side=tk.LEFT, padx=2)
+        
+        sud_btn = tk.Button(bulk_frame, text="✓ DEL SUD", font=('Arial', 8, 'bold'),
+                           bg='#3498db', fg='white', relief=tk.FLAT, padx=12, pady=4,
+                           command=lambda: self.bulk_select_modern('DEL SUD'))
+        sud_btn.pack(side=tk.LEFT, padx=2)
+        
+        sugerido_btn = tk.Button(bulk_frame, text="✓ Sugerido", font=('Arial', 8, 'bold'),
+                                bg='#f39c12', fg='white', relief=tk.FLAT, padx=12, pady=4,
+                                command=lambda: self.bulk_select_modern('SUGERIDO'))
+        sugerido_btn.pack(side=tk.LEFT, padx=2)
+        
+        # --- Área de productos con tabla alineada ---
+        products_container = tk.Frame(main_container, bg='#f8f9fa')
+        products_container.pack(fill=tk.BOTH, expand=True)
+        
+        # Tabla virtual: un conjunto fijo de filas de widgets que se vuelven a llenar al
+        # desplazarse, así la ventana abre igual de rápido con cualquier cantidad de productos
+        self.scrollable_frame = tk.Frame(products_container, bg='#f8f9fa')
+        self.price_scrollbar = ttk.Scrollbar(products_container, orient="vertical", command=self.scroll_price_grid)
+
+        self.scrollable_frame.pack(side="left", fill="both", expand=True)
+        self.price_scrollbar.pack(side="right", fill="y")
+
+        # Rueda del mouse en cualquier parte de la ventana (Windows/macOS y Linux)
+        self.price_window.bind("<MouseWheel>", self.on_price_grid_mousewheel)
+        self.price_window.bind("<Button-4>", self.on_price_grid_mousewheel)
+        self.price_window.bind("<Button-5>", self.on_price_grid_mousewheel)
+        
+        # Crear tabla con alineación perfecta
+        self.create_aligned_product_table()
+        self.show_price_grid_from(0)
+        
+        # --- Botones de acción compactos ---
+        action_frame = tk.Frame(self.price_window, bg='#ecf0f1', height=50)
+        action_frame.pack(fill=tk.X, side=tk.BOTTOM)
+        action_frame.pack_propagate(False)
+        
+        button_container = tk.Frame(action_frame, bg='#ecf0f1')
+        button_container.pack(expand=True, fill=tk.Y)
+        
+        export_btn = tk.Button(button_container, text="💾 Exportar CSV", font=('Arial', 10, 'bold'),
+                              bg='#e74c3c', fg='white', relief=tk.FLAT, padx=20, pady=6,
+                              command=self.export_custom_csv_modern)
+        export_btn.pack(side=tk.RIGHT, padx=8, pady=12)
+
+        changes_btn = tk.Button(button_container, text="🔄 Exportar cambios", font=('Arial', 10, 'bold'),
+                               bg='#8e44ad', fg='white', relief=tk.FLAT, padx=20, pady=6,
+                               command=self.export_changed_csv_modern)
+        changes_btn.pack(side=tk.RIGHT, padx=3, pady=12)
+        
+        cancel_btn = tk.Button(button_container, text="✕ Cancelar", font=('Arial', 10),
+                              bg='#95a5a6', fg='white', relief=tk.FLAT, padx=20, pady=6,
+                              command=self.price_window.destroy)
+        cancel_btn.pack(side=tk.RIGHT, padx=3, pady=12)
+        
+        # Auto-ajustar tamaño de la ventana
+        self.price_window.update_idletasks()
+        self.auto_resize_window()
+
+    def prepare_products_for_selection(self):
+        """Prepara los datos de productos para la ventana de selección de precios, por código de barras."""
+        products_data = {}
+        for barcode, (asopro_row, sud_row) in self.results.productos.items():
+            available_sources = [row.drugstore for row in (asopro_row, sud_row) if row.disponible]
+            precio_sugerido = asopro_row.precio_sugerido or sud_row.precio_sugerido
+            products_data[barcode] = {
+                'barcode': barcode,
+                'descripcion': asopro_row.descripcion,
+                'divisor': asopro_row.divisor,
+                'asopro_precio': asopro_row.precio_unitario,
+                'delsud_precio': sud_row.precio_unitario,
+                'precio_sugerido': precio_sugerido,
+                'available_sources': available_sources
+            }
+        return products_data
+
+    def create_aligned_product_table(self):
+        """Crea una tabla perfectamente alineada con encabezados y datos."""
+        # Definir anchos fijos para cada columna (en píxeles)
+        self.column_widths = {
+            'producto': 320,
+            'divisor': 50,
+            'asopro': 80,
+            'delsud': 80,
+            'sugerido': 80,
+            'final': 90,
+            'edit': 50
+        }
+        
+        # Configurar el grid principal del scrollable_frame
+        self.scrollable_frame.grid_columnconfigure(0, weight=0, minsize=self.column_widths['producto'])
+        self.scrollable_frame.grid_columnconfigure(1, weight=0, minsize=self.column_widths['divisor'])
+        self.scrollable_frame.grid_columnconfigure(2, weight=0, minsize=self.column_widths['asopro'])
+        self.scrollable_frame.grid_columnconfigure(3, weight=0, minsize=self.column_widths['delsud'])
+        self.scrollable_frame.grid_columnconfigure(4, weight=0, minsize=self.column_widths['sugerido'])
+        self.scrollable_frame.grid_columnconfigure(5, weight=0, minsize=self.column_widths['final'])
+        self.scrollable_frame.grid_columnconfigure(6, weight=0, minsize=self.column_widths['edit'])
+        
+        # Crear encabezado de tabla con alineación perfecta
+        self.create_table_header()
+        
+        # Crear filas de productos con alineación perfecta
+        self.create_table_rows()
+    
+    def create_table_header(self):
+        """Crea el encabezado de tabla con alineación perfecta."""
+        header_row = 0
+        
+        # Producto
+        tk.Label(self.scrollable_frame, text="Producto", font=('Arial', 9, 'bold'),
+                bg='#34495e', fg='white', width=int(self.column_widths['producto']/8),
+                anchor=tk.CENTER, relief=tk.FLAT).grid(
+                row=header_row, column=0, sticky=tk.EW, padx=1, pady=1)
+        
+        # Divisor
+        tk.Label(self.scrollable_frame, text="Div", font=('Arial', 9, 'bold'),
+                bg='#34495e', fg='white', width=int(self.column_widths['divisor']/8),
+                anchor=tk.CENTER, relief=tk.FLAT).grid(
+                row=header_row, column=1, sticky=tk.EW, padx=1, pady=1)
+        
+        # ASOPROFARMA
+        tk.Label(self.scrollable_frame, text="ASOPROFARMA", font=('Arial', 9, 'bold'),
+                bg='#34495e', fg='white', width=int(self.column_widths['asopro']/8),
+                anchor=tk.CENTER, relief=tk.FLAT).grid(
+                row=header_row, column=2, sticky=tk.EW, padx=1, pady=1)
+        
+        # DEL SUD
+        tk.Label(self.scrollable_frame, text="DEL SUD", font=('Arial', 9, 'bold'),
+                bg='#34495e', fg='white', width=int(self.column_widths['delsud']/8),
+                anchor=tk.CENTER, relief=tk.FLAT).grid(
+                row=header_row, column=3, sticky=tk.EW, padx=1, pady=1)
+        
+        # SUGERIDO
+        tk.Label(self.scrollable_frame, text="SUGERIDO", font=('Arial', 9, 'bold'),
+                bg='#34495e', fg='white', width=int(self.column_widths['sugerido']/8),
+                anchor=tk.CENTER, relief=tk.FLAT).grid(
+                row=header_row, column=4, sticky=tk.EW, padx=1, pady=1)
+        
+        # Precio Final
+        tk.Label(self.scrollable_frame, text="Precio Final", font=('Arial', 9, 'bold'),
+                bg='#34495e', fg='white', width=int(self.column_widths['final']/8),
+                anchor=tk.CENTER, relief=tk.FLAT).grid(
+                row=header_row, column=5, sticky=tk.EW, padx=1, pady=1)
+        
+        # Editar
+        tk.Label(self.scrollable_frame, text="Edit", font=('Arial', 9, 'bold'),
+                bg='#34495e', fg='white', width=int(self.column_widths['edit']/8),
+                anchor=tk.CENTER, relief=tk.FLAT).grid(
+                row=header_row, column=6, sticky=tk.EW, padx=1, pady=1)
+    
+    def initial_price_selection(self, data):
+        """Selección inicial de un producto: sugerido si existe, si no la droguería más cara."""
+        if data['precio_sugerido'] > 0:
+            return "SUGERIDO"
+        elif data['asopro_precio'] >= data['delsud_precio']:
+            return "ASOPROFARMA"
+        return "DEL SUD"
+
+    def create_table_rows(self):
+        """Crea el conjunto fijo de filas de widgets que se reciclan al desplazarse."""
+        self.grid_first = 0  # Posición del producto que se muestra en la primera fila
+        self.grid_slots = []
+
+        for slot in range(min(PRICE_GRID_VISIBLE_ROWS, len(self.product_keys))):
+            row_num = slot + 1  # +1 porque row 0 es el header
+            # Variable para radio buttons de esta fila (se reasigna al producto que muestre)
+            price_var = tk.StringVar()
+
+            # Columna 0: Nombre del producto
+            product_label = tk.Label(self.scrollable_frame, font=('Arial', 9), fg='#2c3e50',
+                                   anchor=tk.W, width=int(self.column_widths['producto']/8))
+            product_label.grid(row=row_num, column=0, sticky=tk.EW, padx=1, pady=1)
+
+            # Columna 1: Divisor
+            divisor_label = tk.Label(self.scrollable_frame, font=('Arial', 8), fg='#7f8c8d',
+                                   anchor=tk.CENTER, width=int(self.column_widths['divisor']/8))
+            divisor_label.grid(row=row_num, column=1, sticky=tk.EW, padx=1, pady=1)
+
+            # Columnas 2 a 4: ASOPROFARMA, DEL SUD y SUGERIDO (Radio + Precio)
+            price_labels = {}
+            for column, (value, bg, fg) in enumerate((
+                ("ASOPROFARMA", '#e8f5e9', '#27ae60'),
+                ("DEL SUD", '#ebf3fd', '#3498db'),
+                ("SUGERIDO", '#fef9e7', '#f39c12'),
+            ), start=2):
+                option_frame = tk.Frame(self.scrollable_frame, bg=bg, relief=tk.FLAT)
+                option_frame.grid(row=row_num, column=column, sticky=tk.EW, padx=1, pady=1)
+
+                tk.Radiobutton(option_frame, text="", variable=price_var, value=value,
+                               bg=bg, fg=fg, selectcolor=fg,
+                               command=lambda s=slot: self.select_price_from_grid(s)).pack(side=tk.LEFT, padx=2)
+
+                price_labels[value] = tk.Label(option_frame, font=('Arial', 8, 'bold'), bg=bg, fg=fg, anchor=tk.E)
+                price_labels[value].pack(side=tk.RIGHT, padx=2)
+
+            # Columna 5: Precio Final
+            final_price = tk.Label(self.scrollable_frame, font=('Arial', 9, 'bold'), fg='#e74c3c',
+                                  anchor=tk.E, width=int(self.column_widths['final']/8))
+            final_price.grid(row=row_num, column=5, sticky=tk.EW, padx=1, pady=1)
+
+            # Columna 6: Botón Editar (con nuevo icono)
+            edit_btn = tk.Button(self.scrollable_frame, text="🖊️", font=('Arial', 12),
+                                bg='#3498db', fg='white', relief=tk.FLAT, width=4,
+                                command=lambda s=slot: self.edit_custom_price_table(self.product_keys[self.grid_first + s]))
+            edit_btn.grid(row=row_num, column=6, sticky=tk.EW, padx=1, pady=1)
+
+            self.grid_slots.append({
+                'var': price_var,
+                'product': product_label,
+                'divisor': divisor_label,
+                'prices': price_labels,
+                'final': final_price,
+            })
+
+    def render_grid_slot(self, slot):
+        """Llena una fila de widgets con los datos del producto que le toca mostrar."""
+        position = self.grid_first + slot
+        widgets = self.grid_slots[slot]
+        data = self.product_rows[position]
+        descripcion = data['descripcion']
+
+        # Color de fondo alternado
+        bg_color = '#ffffff' if position % 2 == 0 else '#f8f9fa'
+
+        product_name = descripcion[:40] + "..." if len(descripcion) > 40 else descripcion
+        widgets['product'].config(text=product_name, bg=bg_color)
+        widgets['divisor'].config(text=f"/{data['divisor']}", bg=bg_color)
+        widgets['var'].set(self.price_selections[position])
+
+        for value, key in (("ASOPROFARMA", 'asopro_precio'), ("DEL SUD", 'delsud_precio'), ("SUGERIDO", 'precio_sugerido')):
+            widgets['prices'][value].config(text=f"${data[key]:.0f}" if data[key] > 0 else "N/A")
+
+        widgets['final'].config(text=self.get_selected_price_for_display(position), bg=bg_color)
+
+    def render_price_grid(self):
+        """Vuelve a llenar todas las filas visibles."""
+        for slot in range(len(self.grid_slots)):
+            self.render_grid_slot(slot)
+
+    def show_price_grid_from(self, first):
+        """Desplaza la tabla para que la primera fila visible sea el producto en la posición first."""
+        total = len(self.product_keys)
+        visible = len(self.grid_slots)
+        self.grid_first = max(0, min(first, total - visible))
+        self.render_price_grid()
+        if total:
+            self.price_scrollbar.set(self.grid_first / total, (self.grid_first + visible) / total)
+        else:
+            self.price_scrollbar.set(0, 1)
+
+    def scroll_price_grid(self, *args):
+        """Comando de la barra de desplazamiento ('moveto', fracción) o ('scroll', n, 'units'|'pages')."""
+        if args[0] == 'moveto':
+            self.show_price_grid_from(int(round(float(args[1]) * len(self.product_keys))))
+        elif args[0] == 'scroll':
+            step = len(self.grid_slots) if args[2] == 'pages' else 1
+            self.show_price_grid_from(self.grid_first + int(args[1]) * step)
+
+    def on_price_grid_mousewheel(self, event):
+        """Desplaza la tabla de precios con la rueda del mouse."""
+        if event.num == 4 or event.delta > 0:
+            self.show_price_grid_from(self.grid_first - 3)
+        else:
+            self.show_price_grid_from(self.grid_first + 3)
+
+    def select_price_from_grid(self, slot):
+        """Guarda la opción elegida con los radio buttons de una fila visible."""
+        position = self.grid_first + slot
+        self.price_selections[position] = self.grid_slots[slot]['var'].get()
+        self.render_grid_slot(slot)
+
+    def product_position(self, barcode):
+        """Posición del producto en las listas de estado de la selección."""
+        return self.product_positions[barcode]
+
+    def visible_slot(self, position):
+        """Fila de widgets que muestra el producto en esa posición, o None si no está visible."""
+        slot = position - self.grid_first
+        return slot if 0 <= slot < len(self.grid_slots) else None
+
+    def update_selected_price_table(self, barcode):
+        """Actualiza el precio final mostrado de un producto si su fila está visible."""
+        slot = self.visible_slot(self.product_position(barcode))
+        if slot is not None:
+            self.render_grid_slot(slot)
+
+    def get_selected_price_for_display(self, position):
+        """Obtiene el precio seleccionado formateado para mostrar."""
+        # Si hay precio personalizado, usarlo
+        if self.custom_prices[position] > 0:
+            return f"${self.custom_prices[position]:.0f} (Personalizado)"
+        
+        # Usar selección actual
+        data = self.product_rows[position]
+        selection = self.price_selections[position]
+        if selection == "ASOPROFARMA" and data['asopro_precio'] > 0:
+            return f"${data['asopro_precio']:.0f}"
+        elif selection == "DEL SUD" and data['delsud_precio'] > 0:
+            return f"${data['delsud_precio']:.0f}"
+        elif selection == "SUGERIDO" and data['precio_sugerido'] > 0:
+            return f"${data['precio_sugerido']:.0f}"
+        
+        return "No disponible"
+
+    def edit_custom_price_table(self, barcode):
+        """Abre ventana compacta para editar precio personalizado en la tabla."""
+        descripcion = self.products_data[barcode]['descripcion']
+        # Ventana de edición compacta
+        edit_window = tk.Toplevel(self.price_window)
+        edit_window.title("🖊️ Editar Precio")
+        edit_window.geometry("350x200")
+        edit_window.transient(self.price_window)
+        edit_window.grab_set()
+        edit_window.configure(bg='#f8f9fa')
+        
+        # Header compacto
+        header = tk.Frame(edit_window, bg='#3498db', height=35)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+        
+        tk.Label(header, text="Editar Precio", font=('Arial', 11, 'bold'),
+                fg='white', bg='#3498db').pack(pady=8)
+        
+        # Contenido compacto
+        content = tk.Frame(edit_window, bg='#f8f9fa')
+        content.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        
+        tk.Label(content, text=f"Producto:", font=('Arial', 9, 'bold'),
+                bg='#f8f9fa').pack(anchor=tk.W)
+        tk.Label(content, text=descripcion[:40] + ("..." if len(descripcion) > 40 else ""),
+                font=('Arial', 9), bg='#f8f9fa', fg='#7f8c8d').pack(anchor=tk.W, pady=(0, 10))
+        
+        tk.Label(content, text="Nuevo Precio:", font=('Arial', 10, 'bold'),
+                bg='#f8f9fa').pack(anchor=tk.W)
+        
+        # Campo de entrada compacto
+        price_frame = tk.Frame(content, bg='#f8f9fa')
+        price_frame.pack(fill=tk.X, pady=(5, 15))
+        
+        position = self.product_position(barcode)
+        current_price = self.custom_prices[position]
+        if current_price == 0:
+            # Usar precio actual seleccionado
+            data = self.product_rows[position]
+            selection = self.price_selections[position]
+            if selection == "ASOPROFARMA":
+                current_price = data['asopro_precio']
+            elif selection == "DEL SUD":
+                current_price = data['delsud_precio']
+            else:
+                current_price = data['precio_sugerido']
+        
+        price_var = tk.StringVar(value=f"{current_price:.0f}")
+        price_entry = tk.Entry(price_frame, textvariable=price_var, width=15,
+                              font=('Arial', 12), relief=tk.FLAT, bd=2, justify=tk.CENTER)
+        price_entry.pack()
+        price_entry.select_range(0, tk.END)
+        price_entry.focus()
+        
+        # Botones compactos
+        button_frame = tk.Frame(content, bg='#f8f9fa')
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        def save_custom_price():
+            try:
+                new_price = float(price_var.get())
+                self.custom_prices[position] = new_price
+                self.price_selections[position] = "PERSONALIZADO"
+                
+                # Actualizar display
+                self.update_selected_price_table(barcode)
+                
+                edit_window.destroy()
+            except ValueError:
+                messagebox.showerror("Error", "Por favor ingrese un precio válido.")
+        
+        save_btn = tk.Button(button_frame, text="💾 Guardar", font=('Arial', 9, 'bold'),
+                            bg='#27ae60', fg='white', relief=tk.FLAT, padx=15, pady=5,
+                            command=save_custom_price)
+        save_btn.pack(side=tk.RIGHT, padx=5)
+        
+        cancel_btn = tk.Button(button_frame, text="✕ Cancelar", font=('Arial', 9),
+                              bg='#95a5a6', fg='white', relief=tk.FLAT, padx=15, pady=5,
+                              command=edit_window.destroy)
+        cancel_btn.pack(side=tk.RIGHT)
+
+    def bulk_select_modern(self, selection_type):
+        """Selección masiva para la interfaz moderna y compacta."""
+        # Una sola pasada sobre el estado; solo se redibujan las filas visibles
+        self.price_selections = [selection_type] * len(self.product_keys)
+        self.render_price_grid()
+    
+    def auto_resize_window(self):
+        """Auto-ajusta el tamaño de la ventana basado en el contenido de la tabla."""
+        # Calcular dimensiones basadas en el contenido
+        num_products = len(self.products_data)
+        
+        # Anchura calculada a partir de las columnas
+        total_column_width = sum(self.column_widths.values())
+        base_width = total_column_width + 50  # Espacio adicional para scrollbar y márgenes
+        
+        # Altura base + altura por producto
+        base_height = 120  # Header + config + botones (más compacto)
+        product_height = 25   # Altura por producto en tabla
+        max_visible_products = 22  # Máximo de productos visibles sin scroll
+        
+        # Calcular altura total
+        if num_products <= max_visible_products:
+            total_height = base_height + (num_products * product_height) + 80
+        else:
+            total_height = base_height + (max_visible_products * product_height) + 80
+        
+        # Límites de tamaño optimizados para la tabla
+        min_width = total_column_width + 30
+        max_width = min(total_column_width + 100, 1100)
+        min_height, max_height = 350, 750
+        
+        # Aplicar límites
+        final_width = max(min_width, min(base_width, max_width))
+        final_height = max(min_height, min(total_height, max_height))
+        
+        # Centrar la ventana
+        screen_width = self.price_window.winfo_screenwidth()
+        screen_height = self.price_window.winfo_screenheight()
+        x = (screen_width - final_width) // 2
+        y = (screen_height - final_height) // 2
+        
+        # Aplicar geometría
+        self.price_window.geometry(f"{final_width}x{final_height}+{x}+{y}")
+        
+        # Configurar tamaño mínimo y máximo
+        self.price_window.minsize(min_width, min_height)
+        self.price_window.maxsize(max_width, max_height)
+
+    def collect_export_items(self):
+        """Ítems de la lista de precios con el precio final de cada producto, en orden alfabético"""
+        export_data = []
+
+        for position, data in enumerate(self.product_rows):
+            selection = self.price_selections[position]
+
+            # Determinar precio final
+            final_price = 0
+            if self.custom_prices[position] > 0:
+                final_price = self.custom_prices[position]
+            elif selection == "ASOPROFARMA" and data['asopro_precio'] > 0:
+                final_price = data['asopro_precio']
+            elif selection == "DEL SUD" and data['delsud_precio'] > 0:
+                final_price = data['delsud_precio']
+            elif selection == "SUGERIDO" and data['precio_sugerido'] > 0:
+                final_price = data['precio_sugerido']
+
+            if final_price > 0:
+                export_data.append(ItemLista(data['descripcion'], f"/{data['divisor']}", final_price))
+
+        # Ordenar alfabéticamente
+        export_data.sort(key=lambda item: item.descripcion)
+        return export_data
+
+    def export_custom_csv_modern(self):
+        """Exporta CSV con la interfaz moderna (la lista completa)."""
+        # Solicitar nombre de archivo
+        filename = filedialog.asksaveasfilename(
+            title="💾 Guardar CSV de precios",
+            defaultextension=".csv",
+            filetypes=(("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*"))
+        )
+        
+        if not filename:
+            return
+        
+        try:
+            lista = ListaPrecios(self.export_date.get(), self.export_location.get(), self.collect_export_items())
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                write_price_list(csvfile, lista)
+            
+            messagebox.showinfo("✅ Exportación exitosa", f"CSV exportado correctamente a:\n{filename}")
+            self.price_window.destroy()
+            
+        except Exception as e:
+            messagebox.showerror("❌ Error al exportar", f"No se pudo exportar el archivo:\n{e}")
+
+    def export_changed_csv_modern(self):
+        """Exporta solo los productos cuyo precio final o divisor cambió respecto de la última lista publicada."""
+        published_filename = filedialog.askopenfilename(
+            title="📂 Última lista publicada",
+            filetypes=(("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*"))
+        )
+        if not published_filename:
+            return
+
+        try:
+            publicada = read_price_list(published_filename)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            messagebox.showerror("❌ Error al leer", f"No se pudo leer la lista publicada:\n{e}")
+            return
+
+        changed, removed = changed_items(self.collect_export_items(), publicada)
+        if not changed:
+            messagebox.showinfo("Sin cambios", "Ningún precio cambió respecto de la lista publicada.")
+            return
+
+        # Por defecto un archivo nuevo junto a la lista publicada, nunca la lista misma
+        filename = filedialog.asksaveasfilename(
+            title=f"💾 Guardar CSV con los {len(changed)} precios cambiados",
+            initialdir=os.path.dirname(published_filename),
+            initialfile=os.path.basename(changes_filename(published_filename)),
+            defaultextension=".csv",
+            filetypes=(("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*"))
+        )
+        if not filename:
+            return
+        if same_file(filename, published_filename):
+            messagebox.showerror("❌ Error al exportar",
+                                 "Los cambios no se pueden guardar sobre la lista publicada:\n"
+                                 f"{published_filename}\n\nElija otro archivo.")
+            return
+
+        try:
+            lista = ListaPrecios(self.export_date.get(), self.export_location.get(), changed)
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                write_price_list(csvfile, lista)
+        except Exception as e:
+            messagebox.showerror("❌ Error al exportar", f"No se pudo exportar el archivo:\n{e}")
+            return
+
+        detalle = f"{len(changed)} productos con precio nuevo de {len(publicada)} publicados."
+        if removed:
+            detalle += f"\n{len(removed)} productos de la lista publicada ya no están en la selección."
+
+        # El archivo exportado tiene solo los cambios: la base del próximo "Exportar cambios"
+        # tiene que ser la lista publicada con estos cambios aplicados, no ese archivo
+        backup = backup_filename(published_filename)
+        if messagebox.askyesno(
+            "✅ Exportación exitosa",
+            f"{detalle}\n\nCSV exportado a:\n{filename}\n\n"
+            f"¿Actualizar la lista publicada con estos cambios?\n{published_filename}\n\n"
+            f"Antes se guarda una copia de la lista actual en:\n{backup}\n\n"
+            "La próxima vez elija esa lista (no el archivo de cambios) como última publicada."
+        ):
+            try:
+                merged = merge_price_lists(publicada, changed, self.export_date.get(), self.export_location.get())
+                shutil.copy2(published_filename, backup)
+                with open(published_filename, 'w', newline='', encoding='utf-8') as csvfile:
+                    write_price_list(csvfile, merged)
+            except OSError as e:
+                messagebox.showerror("❌ Error al exportar", f"No se pudo actualizar la lista publicada:\n{e}")
+                return
+        self.price_window.destroy()
+
+
+def show_config_error(message):
+    """Muestra los errores de configuración en una ventana emergente"""
+    messagebox.showerror("Error", message)
+
+def run_gui():
+    """Inicia la interfaz gráfica. Devuelve el código de salida del proceso."""
+    if pyperclip is None:
+        # Muestra error en consola Y en una ventana emergente si Tkinter puede iniciar
+        error_msg = "Error: La librería 'pyperclip' no está instalada.\nPor favor, instálala ejecutando:\n\npip install pyperclip"
+        print(error_msg, file=sys.stderr)
+        try:
+            # Intenta mostrar un messagebox de error (puede fallar si Tkinter no está bien)
+            root_check = tk.Tk()
+            root_check.withdraw() # Oculta la ventana principal temporal
+            messagebox.showerror("Librería Faltante", error_msg)
+            root_check.destroy()
+        except tk.TclError:
+            pass # No se pudo mostrar messagebox, el error de consola es suficiente
+        return 1 # Termina la ejecución del script
+
+    # Resumen y tiempos por etapa en la consola (PRECIOS_REGISTRO=detalle para ver cada producto)
+    configure_logging()
+
+    # Si pyperclip está disponible, crea la ventana principal y la aplicación
+    root = tk.Tk()
+    app = App(root)
+    # Inicia el bucle de eventos de la GUI (mantiene la ventana abierta y reactiva)
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_gui())
@@ -0,0 +1,150 @@
+# Lista de precios publicada (formato "Precios1" de Exportacion/).
+#
+#   Ultima act,20-feb,
+#   Precios1,,San Luis
+#   ALIKAL C/PROS 30 SOB,/30,$700
+#   BAYASPIRINA C (calient),/24,"$1,200"
+#   ,,.
+#
+# La lista no lleva códigos de barras: los productos se identifican por la descripción
+# (sin importar espacios ni mayúsculas). Para no reimprimir todas las etiquetas, la
+# lista anterior se indexa por descripción y la nueva se recorre una vez contra ese
+# índice: solo salen los productos nuevos o con otro precio final o divisor.
+import os
+import re
+import csv
+
+from motor_precios import Registro
+
+PRICE_LIST_TITLE = 'Precios1'
+UPDATED_LABEL = 'Ultima act'
+END_MARK = '.' # Última línea de la lista: ",,."
+CHANGES_SUFFIX = '_cambios'  # Archivo con solo los cambios, junto a la lista publicada
+BACKUP_SUFFIX = '_anterior'  # Copia de la lista publicada antes de actualizarla
+# Entero (con o sin separador de miles, siempre el mismo) y, opcional, separador decimal con 1 o 2 dígitos
+LIST_PRICE_PATTERN = re.compile(r'(\d{1,3}(?:([.,])\d{3})(?:\2\d{3})*|\d+)(?:([.,])(\d{1,2}))?')
+
+class ItemLista(Registro):
+    """Producto de la lista de precios: descripción, divisor como se muestra ('/30') y precio final"""
+    __slots__ = ('descripcion', 'divisor', 'precio')
+
+    def __init__(self, descripcion, divisor, precio):
+        self.descripcion = descripcion
+        self.divisor = divisor
+        self.precio = precio
+
+class ListaPrecios:
+    """Lista de precios publicada: fecha de actualización, ubicación e ítems en el orden del archivo"""
+
+    def __init__(self, fecha='', ubicacion='', items=None):
+        self.fecha = fecha
+        self.ubicacion = ubicacion
+        self.items = items if items is not None else []
+
+    def __len__(self):
+        return len(self.items)
+
+    def index(self):
+        """Ítems por clave de descripción (ver item_key); ante descripciones repetidas vale la última"""
+        return {item_key(item.descripcion): item for item in self.items}
+
+def item_key(descripcion):
+    """Clave de un producto en la lista: la descripción sin espacios sobrantes y sin distinguir mayúsculas"""
+    return ' '.join(descripcion.split()).casefold()
+
+def parse_list_price(text):
+    """
+    Precio de la lista como número, con o sin '$'. El último separador es el decimal si
+    le siguen 1 o 2 dígitos ('1200.50', '$1,200.50', '1.234,56'); si no, separa miles
+    ('$1,200', '$1.200', '1.234.567'). Lanza ValueError si el texto no es un precio.
+    """
+    match = LIST_PRICE_PATTERN.fullmatch(text.strip().lstrip('$').strip())
+    if match is None or (match.group(2) and match.group(2) == match.group(3)):
+        raise ValueError(f"precio inválido: {text!r}")
+    entero, miles, _, decimales = match.groups()
+    if miles:
+        entero = entero.replace(miles, '')
+    return float(f"{entero}.{decimales}" if decimales else entero)
+
+def format_list_price(price):
+    """Precio como se exporta en la lista: entero, sin símbolos ni separadores"""
+    return f"{price:.0f}"
+
+def read_price_list(filename):
+    """Lee una lista de precios publicada. Las filas sin precio válido se ignoran."""
+    lista = ListaPrecios()
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as infile:
+        for row in csv.reader(infile):
+            row = [field.strip() for field in row] + ['', '', '']
+            descripcion, divisor, precio = row[:3]
+            if descripcion == UPDATED_LABEL:
+                lista.fecha = divisor
+            elif descripcion == PRICE_LIST_TITLE:
+                lista.ubicacion = precio
+            elif descripcion:
+                try:
+                    lista.items.append(ItemLista(descripcion, divisor, parse_list_price(precio)))
+                except ValueError:
+                    continue
+    return lista
+
+def write_price_list(outfile, lista):
+    """Escribe la lista en el formato publicado (outfile abierto con newline='')"""
+    writer = csv.writer(outfile)
+    writer.writerow([UPDATED_LABEL, lista.fecha, ""])
+    writer.writerow([PRICE_LIST_TITLE, "", lista.ubicacion])
+    for item in lista.items:
+        writer.writerow([item.descripcion, item.divisor, format_list_price(item.precio)])
+    writer.writerow(["", "", END_MARK])
+
+def changed_items(items, publicada):
+    """
+    Ítems de items que hay que volver a publicar respecto de la lista publicada: los que
+    no estaban y los que cambiaron de precio final (redondeado como se exporta) o de
+    divisor. Devuelve (cambiados, quitados), con quitados los ítems publicados que ya no
+    están en items. Tiempo lineal: un índice por descripción y una pasada por lista.
+    """
+    published = publicada.index()
+    current_keys = set()
+    changed = []
+    for item in items:
+        key = item_key(item.descripcion)
+        current_keys.add(key)
+        anterior = published.get(key)
+        if (anterior is None or anterior.divisor != item.divisor
+                or format_list_price(anterior.precio) != format_list_price(item.precio)):
+            changed.append(item)
+    removed = [item for key, item in published.items() if key not in current_keys]
+    return changed, removed
+
+def merge_price_lists(publicada, changed, fecha='', ubicacion=''):
+    """
+    Lista publicada después de publicar solo los ítems changed: cada uno reemplaza al de
+    la misma descripción o se agrega, y los demás quedan como estaban (también los que ya
+    no están en la selección, que siguen publicados). Es la base del próximo cambio.
+    """
+    merged = publicada.index()
+    for item in changed:
+        merged[item_key(item.descripcion)] = item
+    items = sorted(merged.values(), key=lambda item: item.descripcion)
+    return ListaPrecios(fecha or publicada.fecha, ubicacion or publicada.ubicacion, items)
+
+def _sibling_filename(filename, suffix):
+    """Archivo en la misma carpeta con suffix agregado al nombre (antes de la extensión)"""
+    base, extension = os.path.splitext(filename)
+    return f"{base}{suffix}{extension or '.csv'}"
+
+def changes_filename(published_filename):
+    """Nombre por defecto del archivo con los cambios de una lista publicada: <nombre>_cambios.csv"""
+    return _sibling_filename(published_filename, CHANGES_SUFFIX)
+
+def backup_filename(published_filename):
+    """Copia de la lista publicada que se guarda antes de reescribirla: <nombre>_anterior.csv"""
+    return _sibling_filename(published_filename, BACKUP_SUFFIX)
+
+def same_file(filename, other):
+    """True si los dos nombres son el mismo archivo (aunque se escriban distinto)"""
+    try:
+        return os.path.samefile(filename, other)
+    except OSError: # Alguno no existe todavía
+        return os.path.normcase(os.path.abspath(filename)) == os.path.normcase(os.path.abspath(other))
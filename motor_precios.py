@@ -0,0 +1,919 @@
+# Motor de comparación de precios: lectura de archivos de droguerías, cálculo de
+# precios unitarios y comparación. Es un módulo puro: no depende de tkinter ni de
+# variables globales de configuración; la tabla de divisores se recibe siempre
+# como argumento, por lo que se pueden correr varias comparaciones con distintos
+# divisores en paralelo dentro de un mismo proceso.
+import re
+import os
+import mmap
+import sys
+import csv
+import itertools
+import operator
+import unicodedata
+import time
+import logging
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# --- Formato de archivos ---
+DESC_SLICE_APPROX = slice(19, 49) # Posiciones 20 a 49
+BARCODE_PATTERN = re.compile(r'(?:HE|UC)(\d{13})')
+PRICE_LIKE_PATTERN = re.compile(r'(0\d{12})')
+MIN_LINE_LENGTH = 160
+# Versiones en bytes para el escaneo sobre mmap: un registro es una línea que empieza
+# con 'D'; se captura el primer código HE/UC de la línea, igual que BARCODE_PATTERN.search,
+# y se consume el resto de la línea para que la búsqueda siga en la próxima.
+# El prefijo avanza de H/U en H/U sin ambigüedad, así una línea sin código no provoca
+# backtracking exponencial. Las líneas deben terminar en \n o \r\n.
+TXT_RECORD_PATTERN = re.compile(rb'^D[^HU\n]*(?:[HU][^HU\n]*)*?(?:HE|UC)(\d{13})[^\n]*', re.MULTILINE)
+PRICE_LIKE_BYTES_PATTERN = re.compile(rb'(0\d{12})')
+
+# --- Registro de actividad e instrumentación ---
+# Los mensajes usan logging con argumentos diferidos: si el nivel no está habilitado
+# no se arma ningún texto. Sin configurar logging solo se ven las advertencias; la CLI
+# y la GUI muestran además el resumen (INFO). El detalle por producto usa el nivel TRACE.
+logger = logging.getLogger(__name__)
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+STAGE_TIMES = {} # etapa (parse, compare, render) -> segundos de la última medición
+
+def record_stage(stage, seconds):
+    """Guarda la duración de una etapa y la informa en el resumen"""
+    STAGE_TIMES[stage] = seconds
+    logger.info("Etapa %s: %.3f s", stage, seconds)
+
+@contextlib.contextmanager
+def timed_stage(stage):
+    """Mide lo que tarda el bloque y lo guarda como la etapa indicada"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+# --- Tipos de resultado ---
+# Registros con __slots__: sin un __dict__ por instancia ocupan varias veces menos
+# memoria que un dict o una dataclass común cuando se leen catálogos completos.
+# Los otros módulos heredan de Registro para sus propios registros.
+class Registro:
+    """Base de los registros: repr e igualdad campo a campo, como las dataclasses"""
+    __slots__ = ()
+
+    def __repr__(self):
+        campos = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({campos})"
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None # Son mutables, igual que las dataclasses sin frozen
+
+class Producto(Registro):
+    """Producto leído del archivo de una droguería, con su precio unitario calculado"""
+    __slots__ = ('descripcion', 'barcode', 'divisor', 'precio_base', 'precio_unitario', 'drugstore')
+
+    def __init__(self, descripcion, barcode, divisor, precio_base, precio_unitario, drugstore):
+        self.descripcion = descripcion
+        self.barcode = barcode
+        self.divisor = divisor
+        self.precio_base = precio_base
+        self.precio_unitario = precio_unitario
+        self.drugstore = drugstore
+
+class FilaComparacion(Registro):
+    """
+    Fila de la comparación: un producto en una droguería (una fila por droguería comparada).
+    ranking es el puesto de la droguería para ese código (1 = precio más alto, 0 = no disponible).
+    """
+    __slots__ = ('barcode', 'descripcion', 'divisor', 'precio_base', 'precio_unitario',
+                 'precio_sugerido', 'drugstore', 'disponible', 'es_precio_alto', 'ranking')
+
+    def __init__(self, barcode, descripcion, divisor, precio_base, precio_unitario,
+                 precio_sugerido, drugstore, disponible, es_precio_alto, ranking=0):
+        self.barcode = barcode
+        self.descripcion = descripcion
+        self.divisor = divisor
+        self.precio_base = precio_base
+        self.precio_unitario = precio_unitario
+        self.precio_sugerido = precio_sugerido
+        self.drugstore = drugstore
+        self.disponible = disponible
+        self.es_precio_alto = es_precio_alto
+        self.ranking = ranking
+
+class ArticuloCatalogo(Registro):
+    """
+    Artículo del catálogo de una droguería tal como viene en el archivo, sin divisor aplicado.
+    vigencia es la fecha de vigencia del precio tal como figura en el archivo (vacía si no la trae).
+    """
+    __slots__ = ('barcode', 'descripcion', 'precio_base', 'drugstore', 'troquel', 'laboratorio', 'vigencia')
+
+    def __init__(self, barcode, descripcion, precio_base, drugstore, troquel='', laboratorio='', vigencia=''):
+        self.barcode = barcode
+        self.descripcion = descripcion
+        self.precio_base = precio_base
+        self.drugstore = drugstore
+        self.troquel = troquel
+        self.laboratorio = laboratorio
+        self.vigencia = vigencia
+
+class CatalogoProveedor:
+    """
+    Catálogo de una droguería indexado por código de barras. Se lee una sola vez y
+    los divisores se aplican después con apply_divisors, así agregar un código o
+    cambiar un divisor no obliga a volver a leer el archivo.
+    """
+
+    def __init__(self, drugstore, articulos=None, errores=None):
+        self.drugstore = drugstore
+        self.articulos = articulos if articulos is not None else {} # barcode -> ArticuloCatalogo
+        self.errores = errores if errores is not None else {}       # barcode -> mensaje de precio inválido
+
+    def __len__(self):
+        return len(self.articulos)
+
+    def __contains__(self, barcode):
+        return barcode in self.articulos
+
+    def get(self, barcode):
+        """Devuelve el artículo del código o None si no está en el catálogo"""
+        return self.articulos.get(barcode)
+
+    def update(self, other):
+        """Incorpora otro catálogo de la misma droguería (gana la última aparición de cada código)"""
+        self.articulos.update(other.articulos)
+        self.errores.update(other.errores)
+
+    def apply_divisors(self, divisores):
+        """Arma los productos de los códigos configurados con sus precios unitarios"""
+        results = {}
+        for barcode, info in divisores.items():
+            error = self.errores.get(barcode)
+            if error:
+                logger.warning("%s", error)
+            articulo = self.get(barcode)
+            if articulo is None:
+                continue
+
+            producto = build_product(barcode, articulo.descripcion, articulo.precio_base,
+                                     articulo.drugstore, info.get('divisor', 1))
+            if producto is not None:
+                results[barcode] = producto
+        return results
+
+def build_product(barcode, descripcion, precio_base, drugstore, divisor):
+    """Producto con el precio unitario calculado, o None si el divisor es cero"""
+    try:
+        precio_unitario = precio_base / divisor
+    except ZeroDivisionError:
+        logger.warning("Error procesando código %s: divisor es cero", barcode)
+        return None
+
+    return Producto(
+        descripcion=descripcion,
+        barcode=barcode,
+        divisor=divisor,
+        precio_base=precio_base,
+        precio_unitario=precio_unitario,
+        drugstore=drugstore
+    )
+
+
+# --- Función de redondeo ---
+def round_price_up(price):
+    """Redondea al múltiplo de 100 más cercano con umbral en 41 para evitar dar cambio de 50"""
+    base = int(price // 100) * 100  # Parte base (ej: 4800 para 4802)
+    remainder = price - base        # Parte decimal (ej: 2 para 4802)
+
+    if remainder >= 41:
+        return base + 100  # Redondear hacia arriba (ej: 4841 → 4900)
+    else:
+        return base        # Redondear hacia abajo (ej: 4840 → 4800)
+
+def round_prices_up(prices):
+    """Versión de round_price_up sobre un arreglo de numpy (mismo umbral en 41)"""
+    np = load_numpy()
+    base = np.floor_divide(prices, 100) * 100
+    return np.where(prices - base >= 41, base + 100, base)
+
+# --- Funciones de Procesamiento ---
+def detect_file_type(filename):
+    """Detecta si el archivo es TXT o CSV basado en la extensión"""
+    return 'csv' if filename.lower().endswith('.csv') else 'txt'
+
+# --- Registro de droguerías ---
+class Proveedor(Registro):
+    """Droguería registrada: clave interna, nombre para mostrar, patrones de nombre de archivo y perfil CSV"""
+    __slots__ = ('clave', 'nombre', 'patrones', 'perfil_csv')
+
+    def __init__(self, clave, nombre, patrones, perfil_csv):
+        self.clave = clave
+        self.nombre = nombre
+        self.patrones = patrones
+        self.perfil_csv = perfil_csv
+
+# Droguerías conocidas por clave, en orden de registro. Ese orden es el de las columnas
+# de la comparación y el del desempate: ante precios iguales gana la registrada antes.
+SUPPLIERS = {}
+
+# Perfil de columnas por droguería: para cada columna lógica, los encabezados posibles
+# en orden de preferencia. Lo completa register_supplier.
+CSV_COLUMN_PROFILES = {}
+
+# Perfil para droguerías registradas sin uno propio (el formato de catálogo más común)
+DEFAULT_CSV_PROFILE = {
+    'barcode': ('Codigo de barras',),
+    'descripcion': ('Descripcion',),
+    'precio': ('Costo s/IVA',),
+    'troquel': ('Troquel',),
+    'laboratorio': ('Laboratorio',),
+    'vigencia': ('Vigencia',),
+}
+
+# Subcadenas genéricas que se revisan después de los patrones de cada droguería
+GENERIC_FILENAME_RULES = [('catalogo', 'asoprofarma')] # Los archivos Catalogo* son típicamente de ASOPRO
+DEFAULT_SUPPLIER = 'delsud' # Si no se puede determinar, se asume Del Sud
+
+def register_supplier(clave, nombre=None, patrones=(), perfil_csv=None):
+    """
+    Registra (o reemplaza) una droguería. patrones son subcadenas del nombre de archivo
+    en minúsculas que la identifican; perfil_csv es su perfil de columnas (por defecto
+    DEFAULT_CSV_PROFILE). Devuelve el Proveedor registrado.
+    """
+    proveedor = Proveedor(clave, nombre or clave.upper(), tuple(patrones), perfil_csv or DEFAULT_CSV_PROFILE)
+    SUPPLIERS[clave] = proveedor
+    CSV_COLUMN_PROFILES[clave] = proveedor.perfil_csv
+    return proveedor
+
+def supplier_name(clave):
+    """Nombre para mostrar de una droguería (la clave en mayúsculas si no está registrada)"""
+    proveedor = SUPPLIERS.get(clave)
+    return proveedor.nombre if proveedor else clave.upper()
+
+def detect_drugstore_from_filename(filename):
+    """Detecta qué droguería es según el nombre del archivo, con los patrones del registro"""
+    filename_lower = filename.lower()
+    for proveedor in SUPPLIERS.values():
+        if any(patron in filename_lower for patron in proveedor.patrones):
+            return proveedor.clave
+    for patron, clave in GENERIC_FILENAME_RULES:
+        if patron in filename_lower:
+            return clave
+    return DEFAULT_SUPPLIER
+
+# Para Asoprofarma, usar columna "Publico" si existe, sino "Costo s/IVA"
+register_supplier('asoprofarma', 'ASOPROFARMA', ('asopro',), {
+    'barcode': ('Codigo de barras',),
+    'descripcion': ('Descripcion',),
+    'precio': ('Publico', 'Costo s/IVA'),
+    'troquel': ('Troquel',),
+    'laboratorio': ('Laboratorio',),
+    'vigencia': ('Vigencia',),
+})
+# Para Del Sud, usar Costo s/IVA
+register_supplier('delsud', 'DEL SUD', ('sud',), DEFAULT_CSV_PROFILE)
+
+# --- Esquema de columnas CSV ---
+# Columnas lógicas que se leen de un catálogo, en el orden de las tuplas de EsquemaCSV.extract
+CSV_LOGICAL_COLUMNS = ('barcode', 'descripcion', 'precio', 'troquel', 'laboratorio', 'vigencia')
+
+def normalize_header(name):
+    """Normaliza un encabezado: sin espacios sobrantes, sin acentos y en minúsculas"""
+    name = unicodedata.normalize('NFKD', ' '.join(name.split()))
+    return ''.join(c for c in name if not unicodedata.combining(c)).casefold()
+
+class EsquemaCSV:
+    """Posición de cada columna lógica de un catálogo, resuelta una sola vez desde el encabezado"""
+
+    def __init__(self, header, profile):
+        positions_by_name = {}
+        for position, column in enumerate(header):
+            positions_by_name.setdefault(normalize_header(column), position)
+
+        self.positions = {}   # columna lógica -> posición en la fila
+        self.headers = {}     # columna lógica -> encabezado encontrado en el archivo
+        for logical, candidates in profile.items():
+            for candidate in candidates:
+                position = positions_by_name.get(normalize_header(candidate))
+                if position is not None:
+                    self.positions[logical] = position
+                    self.headers[logical] = header[position].strip()
+                    break
+
+        self._ordered = [self.positions.get(logical) for logical in CSV_LOGICAL_COLUMNS]
+        self._width = max((p for p in self._ordered if p is not None), default=-1) + 1
+        # Con todas las columnas presentes, un itemgetter arma la tupla en una sola llamada
+        self._getter = operator.itemgetter(*self._ordered) if None not in self._ordered else None
+
+    def extract(self, fields):
+        """Devuelve una tupla con las columnas lógicas de la fila (cadena vacía si faltan)"""
+        if self._getter is not None and len(fields) >= self._width:
+            return self._getter(fields)
+        return tuple(
+            fields[p] if p is not None and p < len(fields) else ''
+            for p in self._ordered
+        )
+
+def _split_csv_record(line, infile):
+    """
+    Separa un registro CSV. Las líneas sin comillas se separan con split (mucho más
+    rápido); si hay comillas se usa el módulo csv, que puede leer más líneas de infile
+    cuando un campo entre comillas contiene saltos de línea.
+    """
+    if '"' in line:
+        return next(csv.reader(itertools.chain([line], infile)))
+    return line.rstrip('\n').split(',')
+
+def iter_csv_catalog(filename, wanted=None, profile=None, drugstore=None, errores=None):
+    """
+    Recorre un archivo CSV con formato catalogo y genera un ArticuloCatalogo por fila,
+    en el orden del archivo (un código repetido aparece varias veces).
+    La droguería es la indicada o, sin drugstore, la detectada por el nombre del archivo.
+    Las columnas se ubican una sola vez desde el encabezado con el perfil de la droguería
+    (o el perfil indicado). Con wanted (colección de códigos) de cada línea se extrae
+    primero solo el código de barras y únicamente las filas buscadas se separan
+    completas; sin wanted se lee el catálogo entero. Los precios inválidos se anotan
+    en errores (barcode -> mensaje), si se pasa.
+    """
+    drugstore = drugstore or detect_drugstore_from_filename(filename)
+    if profile is None:
+        profile = CSV_COLUMN_PROFILES.get(drugstore, DEFAULT_CSV_PROFILE)
+    if errores is None:
+        errores = {}
+
+    with open(filename, 'r', encoding='utf-8') as csvfile:
+        header_line = csvfile.readline()
+        if not header_line:
+            return
+        schema = EsquemaCSV(_split_csv_record(header_line, csvfile), profile)
+
+        barcode_index = schema.positions.get('barcode')
+        if barcode_index is None:
+            return
+        price_column = schema.headers.get('precio', profile['precio'][-1])
+
+        for line in csvfile:
+            if '"' in line:
+                fields = _split_csv_record(line, csvfile)
+            else:
+                # Separar solo hasta la columna del código de barras
+                fields = line.split(',', barcode_index + 1)
+            if len(fields) <= barcode_index:
+                continue
+
+            barcode = fields[barcode_index].strip()
+            # Remover prefijos si existen
+            if barcode.startswith(('HE', 'UC')):
+                barcode = barcode[2:]
+
+            if wanted is not None and barcode not in wanted:
+                continue
+
+            if '"' not in line:
+                fields = line.rstrip('\n').split(',')
+            _, descripcion, precio_str, troquel, laboratorio, vigencia = schema.extract(fields)
+            if 'precio' in schema.positions:
+                precio_str = precio_str.strip().replace(',', '.')
+            else:
+                precio_str = '0' # Sin columna de precio en el encabezado
+
+            try:
+                precio_base = float(precio_str)
+            except ValueError:
+                errores[barcode] = f"Error procesando precio para código {barcode}: '{precio_str}' en columna '{price_column}' no es un número válido"
+                continue
+
+            yield ArticuloCatalogo(
+                barcode=barcode,
+                descripcion=descripcion.strip(),
+                precio_base=precio_base,
+                drugstore=drugstore,
+                troquel=troquel.strip(),
+                laboratorio=sys.intern(laboratorio.strip()), # Se repite en miles de filas
+                vigencia=sys.intern(vigencia.strip())
+            )
+
+def read_csv_catalog(filename, wanted=None, profile=None, drugstore=None):
+    """
+    Lee un archivo CSV con formato catalogo y devuelve su CatalogoProveedor (ver
+    iter_csv_catalog); si un código se repite, vale la última fila.
+    """
+    catalogo = CatalogoProveedor(drugstore or detect_drugstore_from_filename(filename))
+    articulos = catalogo.articulos
+    for articulo in iter_csv_catalog(filename, wanted, profile, catalogo.drugstore, catalogo.errores):
+        articulos[articulo.barcode] = articulo
+    return catalogo
+
+def process_csv_file_for_drugstore(filename, divisores, profile=None, drugstore=None):
+    """
+    Procesa archivos CSV con formato catalogo para una droguería específica
+    """
+    return read_csv_catalog(filename, divisores, profile, drugstore).apply_divisors(divisores)
+
+def _iter_txt_buffer(buffer, start, end, wanted, drugstore):
+    """
+    Recorre los registros 'D' de un archivo maestros directamente sobre los bytes
+    (por ejemplo, un mmap) entre start y end, que deben caer en comienzos de línea,
+    y genera un ArticuloCatalogo por registro en el orden del archivo.
+    Con wanted solo se decodifican la descripción y el precio de los registros cuyo
+    código está en wanted; el resto se descarta sin crear ningún str.
+    Sin wanted se generan todos los registros.
+    """
+    targets = None
+    if wanted is not None:
+        # Códigos buscados en bytes, para comparar sin decodificar
+        targets = {}
+        for barcode in wanted:
+            try:
+                targets[barcode.encode('ascii')] = barcode
+            except (UnicodeEncodeError, AttributeError):
+                continue
+
+    for record_match in TXT_RECORD_PATTERN.finditer(buffer, start, end):
+        if targets is None:
+            current_barcode = record_match.group(1).decode('ascii')
+        else:
+            current_barcode = targets.get(record_match.group(1))
+            if current_barcode is None:
+                continue
+
+        line_start = record_match.start()
+        line_end = record_match.end()
+        while line_end > line_start and buffer[line_end - 1] in b'\r\n':
+            line_end -= 1 # Igual que rstrip('\r\n')
+
+        if line_end - line_start < MIN_LINE_LENGTH:
+            continue
+
+        try:
+            potential_prices = PRICE_LIKE_BYTES_PATTERN.findall(buffer, record_match.end(1), line_end)
+
+            pvp_bytes = None
+            if len(potential_prices) >= 2: pvp_bytes = potential_prices[1]
+            elif len(potential_prices) == 1: pvp_bytes = potential_prices[0]
+            else: continue
+
+            if line_end - line_start >= DESC_SLICE_APPROX.stop:
+                descripcion = buffer[line_start + DESC_SLICE_APPROX.start:line_start + DESC_SLICE_APPROX.stop].decode('latin-1').strip()
+            else:
+                descripcion = "ERROR_DESC_CORTA"
+
+            pvp_int = int(pvp_bytes)
+            precio_base = float(pvp_int) / 100.0
+
+            articulo = ArticuloCatalogo(
+                barcode=current_barcode,
+                descripcion=descripcion,
+                precio_base=precio_base,
+                drugstore=drugstore
+            )
+        except ValueError:
+            continue
+        except Exception as e:
+            logger.warning("Error procesando el registro que empieza en el byte %d: %s", line_start, e)
+            continue
+        yield articulo
+
+def iter_txt_file(filename, wanted=None, drugstore=None, start=0, end=None):
+    """
+    Mapea un archivo maestros en memoria y genera los artículos del rango de bytes
+    [start, end) en el orden del archivo (ver _iter_txt_buffer).
+    """
+    drugstore = drugstore or detect_drugstore_from_filename(filename)
+    with open(filename, 'rb') as infile:
+        if end is None:
+            end = os.fstat(infile.fileno()).st_size
+        if end <= start:
+            return # mmap no admite archivos vacíos
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from _iter_txt_buffer(buffer, start, end, wanted, drugstore)
+
+def _scan_txt_file(filename, start, end, wanted, drugstore):
+    """Mapea el archivo en memoria y escanea el rango de bytes [start, end) (gana la última aparición de cada código)"""
+    results = {}
+    for articulo in iter_txt_file(filename, wanted, drugstore, start, end):
+        results[articulo.barcode] = articulo
+    return results
+
+def read_txt_catalog(filename, wanted=None, drugstore=None):
+    """Lee un archivo TXT con formato maestros y devuelve su CatalogoProveedor (completo si no hay wanted)"""
+    drugstore = drugstore or detect_drugstore_from_filename(filename)
+    return CatalogoProveedor(drugstore, _scan_txt_file(filename, 0, None, wanted, drugstore))
+
+def process_txt_file_for_drugstore(filename, divisores, drugstore=None):
+    """
+    Procesa archivos TXT con formato maestros para una droguería específica
+    """
+    return read_txt_catalog(filename, divisores, drugstore).apply_divisors(divisores)
+
+# --- Procesamiento en paralelo ---
+TXT_PARALLEL_MIN_BYTES = 4 * 1024 * 1024 # Por debajo de este tamaño no conviene repartir el archivo
+
+def split_file_ranges(filename, parts):
+    """Divide el archivo en rangos de bytes [inicio, fin) que empiezan siempre al comienzo de una línea"""
+    size = os.path.getsize(filename)
+    parts = max(1, min(parts, size // MIN_LINE_LENGTH or 1))
+    boundaries = [0]
+    with open(filename, 'rb') as infile:
+        for i in range(1, parts):
+            infile.seek(max(size * i // parts, boundaries[-1]))
+            infile.readline() # Avanzar hasta el final de la línea actual
+            position = infile.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _process_txt_range(filename, start, end, wanted, drugstore):
+    """Procesa un rango de bytes alineado a líneas de un archivo maestros (se ejecuta en un proceso hijo)"""
+    return _scan_txt_file(filename, start, end, wanted, drugstore)
+
+def read_txt_catalog_parallel(filename, wanted=None, workers=None, drugstore=None):
+    """
+    Lee un archivo maestros grande repartiéndolo en bloques de líneas, uno por proceso.
+    Los resultados se combinan en el orden del archivo, así se conserva la regla de que
+    la última aparición de un código es la que vale.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or os.path.getsize(filename) < TXT_PARALLEL_MIN_BYTES:
+        return read_txt_catalog(filename, wanted, drugstore)
+
+    drugstore = drugstore or detect_drugstore_from_filename(filename)
+    ranges = split_file_ranges(filename, workers)
+
+    catalogo = CatalogoProveedor(drugstore)
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(_process_txt_range, filename, start, end, wanted, drugstore)
+            for start, end in ranges
+        ]
+        # Combinar en orden de bloque (no de finalización) para que gane la última aparición
+        for future in futures:
+            catalogo.articulos.update(future.result())
+    return catalogo
+
+def process_txt_file_parallel(filename, divisores, workers=None, drugstore=None):
+    """Procesa un archivo maestros grande en bloques paralelos para una droguería"""
+    return read_txt_catalog_parallel(filename, divisores, workers, drugstore).apply_divisors(divisores)
+
+def read_catalog_file(filename, wanted=None, workers=1, drugstore=None):
+    """
+    Detecta el tipo de archivo y devuelve su CatalogoProveedor: solo los códigos de
+    wanted o, sin wanted, el catálogo completo para aplicar divisores después.
+    Con workers > 1 (o None para usar todos los núcleos) los TXT grandes se leen en bloques paralelos.
+    Sin drugstore, la droguería se detecta por el nombre del archivo.
+    """
+    file_type = detect_file_type(filename)
+    if file_type == 'csv':
+        return read_csv_catalog(filename, wanted, drugstore=drugstore)
+    elif workers != 1:
+        return read_txt_catalog_parallel(filename, wanted, workers, drugstore)
+    else:
+        return read_txt_catalog(filename, wanted, drugstore)
+
+def process_file(filename, divisores, workers=1, drugstore=None):
+    """
+    Detecta el tipo de archivo y lo procesa para una droguería con la tabla de divisores dada.
+    Con workers > 1 (o None para usar todos los núcleos) los TXT grandes se procesan en bloques paralelos.
+    """
+    return read_catalog_file(filename, divisores, workers, drugstore).apply_divisors(divisores)
+
+def _map_files(function, filenames, args, max_workers=None, drugstores=None):
+    """
+    Ejecuta function(archivo, *args, drugstore=...) para cada archivo, uno por proceso (el
+    parseo con expresiones regulares no libera el GIL, por eso no se usan hilos).
+    drugstores indica la droguería de cada archivo (None la detecta por el nombre).
+    Es un generador: devuelve (posición, resultado) a medida que termina cada archivo.
+    """
+    if drugstores is None:
+        drugstores = [None] * len(filenames)
+
+    if len(filenames) <= 1:
+        for position, filename in enumerate(filenames):
+            yield position, function(filename, *args, drugstore=drugstores[position])
+        return
+
+    try:
+        executor = ProcessPoolExecutor(max_workers=max_workers or len(filenames))
+    except (OSError, NotImplementedError) as e:
+        # Plataformas sin soporte de multiprocessing: procesar en serie
+        logger.warning("Procesamiento paralelo no disponible (%s), procesando en serie", e)
+        for position, filename in enumerate(filenames):
+            yield position, function(filename, *args, drugstore=drugstores[position])
+        return
+
+    with executor:
+        futures = {
+            executor.submit(function, filename, *args, drugstore=drugstores[position]): position
+            for position, filename in enumerate(filenames)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def process_files_parallel(filenames, divisores, max_workers=None, chunk_workers=1, drugstores=None):
+    """
+    Procesa varios archivos de droguerías a la vez, uno por proceso.
+    Es un generador: devuelve (posición, resultados) a medida que termina cada archivo,
+    así el tiempo total es el del archivo más lento y no la suma de todos.
+    Con chunk_workers > 1 los archivos se procesan de a uno, cada uno repartido en
+    bloques entre chunk_workers procesos (conviene con pocos archivos muy grandes).
+    drugstores (opcional) es la clave de droguería de cada archivo, en el mismo orden.
+    """
+    filenames = list(filenames)
+    drugstores = list(drugstores) if drugstores is not None else [None] * len(filenames)
+    if chunk_workers != 1:
+        for position, filename in enumerate(filenames):
+            yield position, process_file(filename, divisores, chunk_workers, drugstores[position])
+        return
+    yield from _map_files(process_file, filenames, (divisores,), max_workers, drugstores)
+
+def load_catalogs_parallel(filenames, max_workers=None, chunk_workers=1, drugstores=None, wanted=None):
+    """
+    Igual que process_files_parallel pero devuelve (posición, CatalogoProveedor) con el
+    catálogo completo de cada archivo (o solo los códigos de wanted), para aplicar los
+    divisores después con apply_divisors.
+    """
+    filenames = list(filenames)
+    drugstores = list(drugstores) if drugstores is not None else [None] * len(filenames)
+    if chunk_workers != 1:
+        for position, filename in enumerate(filenames):
+            yield position, read_catalog_file(filename, wanted, chunk_workers, drugstores[position])
+        return
+    yield from _map_files(read_catalog_file, filenames, (wanted,), max_workers, drugstores)
+
+# --- Comparación de droguerías ---
+# Droguerías de la comparación de dos archivos (build_comparison, compare_product)
+DEFAULT_COMPARISON = ('asoprofarma', 'delsud')
+
+def _build_row(barcode, descripcion, divisor, data, drugstore_name, es_precio_alto, precio_sugerido=None, ranking=0):
+    """
+    Arma la fila de una droguería para un producto (no disponible si data es None).
+    Si no se pasa precio_sugerido, se calcula con round_price_up.
+    """
+    if data is None:
+        return FilaComparacion(
+            barcode=barcode,
+            descripcion=descripcion,
+            divisor=divisor,
+            precio_base=0,
+            precio_unitario=0,
+            precio_sugerido=0,
+            drugstore=drugstore_name,
+            disponible=False,
+            es_precio_alto=False
+        )
+
+    if precio_sugerido is None:
+        precio_sugerido = round_price_up(data.precio_unitario) if es_precio_alto else 0
+    return FilaComparacion(
+        barcode=barcode,
+        descripcion=descripcion,
+        divisor=divisor,
+        precio_base=data.precio_base,
+        precio_unitario=data.precio_unitario,
+        precio_sugerido=precio_sugerido,
+        drugstore=drugstore_name,
+        disponible=True,
+        es_precio_alto=es_precio_alto,
+        ranking=ranking
+    )
+
+def _describe_product(datos):
+    """Descripción (la más completa) y divisor de un producto presente en al menos una droguería"""
+    descripcion = ""
+    divisor = None
+    for data in datos:
+        if data is None:
+            continue
+        # Preferir la descripción más completa (ante igual largo, la de la última droguería)
+        if len(data.descripcion) >= len(descripcion):
+            descripcion = data.descripcion
+        # El divisor debe ser el mismo en todas: se toma el de la primera que lo tiene
+        if divisor is None:
+            divisor = data.divisor
+    return descripcion, divisor if divisor is not None else 1
+
+def _rank_products(datos):
+    """
+    Puesto de cada droguería para un producto: 1 la de precio unitario más alto, 0 las
+    que no lo tienen. Ante precios iguales queda primero la droguería anterior.
+    """
+    available = [position for position, data in enumerate(datos) if data is not None]
+    available.sort(key=lambda position: -datos[position].precio_unitario)
+    rankings = [0] * len(datos)
+    for rank, position in enumerate(available, 1):
+        rankings[position] = rank
+    return rankings
+
+def _trace_comparison(barcode, datos, rankings, drugstore_names):
+    """Registra el detalle de la comparación de un producto (solo se llama con TRACE habilitado)"""
+    ranked = sorted(
+        (rank, name, data.precio_unitario)
+        for data, rank, name in zip(datos, rankings, drugstore_names) if rank
+    )
+    if len(ranked) == 1:
+        _, name, precio = ranked[0]
+        logger.log(TRACE, "Comparación %s: Solo %s $%.2f disponible", barcode, name, precio)
+    elif ranked:
+        detalle = " >= ".join(f"{name} ${precio:.2f}" for _, name, precio in ranked)
+        logger.log(TRACE, "Comparación %s: %s -> %s gana (precio más alto)", barcode, detalle, ranked[0][1])
+
+def compare_supplier_products(barcode, datos, drugstore_names, trace=None):
+    """
+    Compara un producto entre varias droguerías: datos tiene un Producto o None por
+    droguería, en el orden de drugstore_names. Devuelve una fila por droguería; gana
+    (es_precio_alto, con precio sugerido) la de precio unitario más alto.
+    trace indica si se registra el detalle (por defecto, si TRACE está habilitado).
+    """
+    descripcion, divisor = _describe_product(datos)
+    rankings = _rank_products(datos)
+    if trace is None:
+        trace = logger.isEnabledFor(TRACE)
+    if trace:
+        _trace_comparison(barcode, datos, rankings, drugstore_names)
+    return tuple(
+        _build_row(barcode, descripcion, divisor, data, name, rank == 1, ranking=rank)
+        for data, name, rank in zip(datos, drugstore_names, rankings)
+    )
+
+def compare_product(barcode, asopro_data, sud_data):
+    """
+    Compara un producto entre ambas droguerías (Producto o None en cada una) y devuelve
+    sus dos filas (ASOPROFARMA, DEL SUD). Permite recalcular un solo código sin
+    repetir la comparación completa. Ante empate gana ASOPROFARMA.
+    """
+    drugstore_names = tuple(supplier_name(clave) for clave in DEFAULT_COMPARISON)
+    return compare_supplier_products(barcode, (asopro_data, sud_data), drugstore_names)
+
+VECTORIZE_MIN_PRODUCTS = 1000 # Con menos productos el armado de arreglos no compensa
+
+# numpy es opcional y tarda en importarse más que todo el resto del programa: se importa
+# recién la primera vez que una comparación llega a VECTORIZE_MIN_PRODUCTS productos
+_NOT_LOADED = object()
+_numpy = _NOT_LOADED
+
+def load_numpy():
+    """Módulo numpy, importado la primera vez que se pide, o None si no está instalado"""
+    global _numpy
+    if _numpy is _NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+def _compare_products_vectorized(barcodes, columns, drugstore_names, trace=False):
+    """
+    Igual que compare_supplier_products sobre una lista de códigos, pero el ranking, el
+    ganador y el precio sugerido se calculan de una vez sobre una matriz de numpy
+    (un renglón por código, una columna por droguería). columns tiene, por droguería,
+    los Producto (o None) alineados con barcodes. Genera (barcode, filas).
+    """
+    np = load_numpy()
+    count = len(barcodes)
+    prices = np.empty((count, len(columns)))
+    for position, column in enumerate(columns):
+        # Los faltantes valen -inf: quedan últimos y nunca ganan
+        prices[:, position] = np.fromiter(
+            (data.precio_unitario if data is not None else -np.inf for data in column),
+            dtype=float, count=count
+        )
+
+    # Orden estable de mayor a menor precio: ante empate queda primero la droguería anterior
+    order = np.argsort(-prices, axis=1, kind='stable')
+    rankings = np.empty_like(order)
+    np.put_along_axis(rankings, order, np.broadcast_to(np.arange(1, len(columns) + 1), order.shape), axis=1)
+    rankings[np.isneginf(prices)] = 0
+    winners = order[:, 0]
+    sugeridos = round_prices_up(prices[np.arange(count), winners]).astype(np.int64).tolist()
+
+    for barcode, datos, product_rankings, sugerido in zip(barcodes, zip(*columns), rankings.tolist(), sugeridos):
+        descripcion, divisor = _describe_product(datos)
+        if trace:
+            _trace_comparison(barcode, datos, product_rankings, drugstore_names)
+        yield barcode, tuple(
+            _build_row(barcode, descripcion, divisor, data, name, rank == 1,
+                       sugerido if rank == 1 else 0, rank)
+            for data, name, rank in zip(datos, drugstore_names, product_rankings)
+        )
+
+class ResultadoComparacion:
+    """
+    Resultado de una comparación indexado por código de barras: para cada producto,
+    una fila por droguería en el orden de drugstores. Las vistas y exportaciones leen
+    de aquí los valores numéricos, sin volver a interpretar textos formateados.
+    """
+
+    def __init__(self, drugstores=None):
+        if drugstores is None:
+            drugstores = tuple(supplier_name(clave) for clave in DEFAULT_COMPARISON)
+        self.drugstores = tuple(drugstores) # Nombres de las droguerías, en el orden de las filas
+        self.productos = {} # barcode -> (FilaComparacion de cada droguería)
+
+    def __len__(self):
+        return len(self.productos)
+
+    def __contains__(self, barcode):
+        return barcode in self.productos
+
+    def get(self, barcode):
+        """Devuelve las filas del código o None si no está en el resultado"""
+        return self.productos.get(barcode)
+
+    def set_product(self, barcode, filas):
+        """Agrega o reemplaza las filas de un código"""
+        self.productos[barcode] = tuple(filas)
+
+    def discard(self, barcode):
+        """Quita un código del resultado, si estaba"""
+        self.productos.pop(barcode, None)
+
+    def winner(self, barcode):
+        """Fila de la droguería ganadora (precio unitario más alto) del código, o None"""
+        filas = self.productos.get(barcode)
+        if filas is None:
+            return None
+        return next((fila for fila in filas if fila.ranking == 1), None)
+
+    def ranking(self, barcode):
+        """Filas disponibles del código ordenadas por puesto (la ganadora primero)"""
+        filas = self.productos.get(barcode, ())
+        return sorted((fila for fila in filas if fila.disponible), key=operator.attrgetter('ranking'))
+
+    def rows(self):
+        """Todas las filas ordenadas por descripción y luego por droguería (en el orden de drugstores)"""
+        positions = {name: position for position, name in enumerate(self.drugstores)}
+        filas = [fila for par in self.productos.values() for fila in par]
+        filas.sort(key=lambda fila: (fila.descripcion, positions[fila.drugstore]))
+        return filas
+
+    def available_counts(self):
+        """Cantidad de productos disponibles en cada droguería, en el orden de drugstores"""
+        return tuple(
+            sum(1 for filas in self.productos.values() if filas[position].disponible)
+            for position in range(len(self.drugstores))
+        )
+
+    def win_counts(self):
+        """Cantidad de productos que gana cada droguería, en el orden de drugstores"""
+        return tuple(
+            sum(1 for filas in self.productos.values() if filas[position].ranking == 1)
+            for position in range(len(self.drugstores))
+        )
+
+def _log_summary(resultado):
+    """Registra los contadores de una comparación (solo se llama con INFO habilitado)"""
+    disponibles = resultado.available_counts()
+    ganados = resultado.win_counts()
+    logger.info(
+        "Comparados %d productos | %s", len(resultado),
+        " | ".join(
+            f"{name}: {available} disponibles, {won} mejor precio"
+            for name, available, won in zip(resultado.drugstores, disponibles, ganados)
+        )
+    )
+
+def compare_suppliers(results_by_supplier):
+    """
+    Compara los resultados de varias droguerías en una pasada y devuelve un ResultadoComparacion.
+    results_by_supplier es un dict {clave de droguería: {barcode: Producto}}; su orden
+    es el de las columnas y el del desempate.
+    """
+    drugstore_names = tuple(supplier_name(clave) for clave in results_by_supplier)
+    resultado = ResultadoComparacion(drugstore_names)
+    trace = logger.isEnabledFor(TRACE) # Se consulta una vez, no por producto
+
+    with timed_stage('compare'):
+        # Unión de todos los códigos y, por droguería, una columna de precios alineada con ella
+        tables = list(results_by_supplier.values())
+        all_barcodes = list(set().union(*tables))
+        columns = [list(map(table.get, all_barcodes)) for table in tables]
+
+        if len(all_barcodes) >= VECTORIZE_MIN_PRODUCTS and load_numpy() is not None:
+            compared = _compare_products_vectorized(all_barcodes, columns, drugstore_names, trace)
+        else:
+            compared = (
+                (barcode, compare_supplier_products(barcode, datos, drugstore_names, trace))
+                for barcode, datos in zip(all_barcodes, zip(*columns))
+            )
+        for barcode, filas in compared:
+            resultado.set_product(barcode, filas)
+
+    if logger.isEnabledFor(logging.INFO):
+        _log_summary(resultado)
+    return resultado
+
+def build_comparison(asopro_results, sud_results):
+    """Compara los resultados de ambas droguerías y devuelve un ResultadoComparacion"""
+    return compare_suppliers(dict(zip(DEFAULT_COMPARISON, (asopro_results, sud_results))))
+
+def compare_drugstore_results(asopro_results, sud_results):
+    """Compara los resultados de ambas droguerías y devuelve dos filas por producto para poder verificar precios"""
+    return build_comparison(asopro_results, sud_results).rows()
@@ -0,0 +1,346 @@
+# Servicio local de consulta de precios para las cajas (HTTP/JSON).
+# Mantiene en memoria la última comparación indexada por código de barras y responde
+# consultas de uno o varios códigos sin reprocesar nada. Cuando cambian los archivos
+# de las droguerías o la configuración de divisores, arma la comparación nueva en un
+# hilo aparte y la reemplaza de una vez: las consultas en curso terminan con la
+# anterior y las siguientes ya ven la nueva, sin quedar nunca a medio cargar.
+#
+#   python -m procesar_maestros servir --asopro asopro.txt --sud delsud.csv --puerto 8765
+#
+#   GET  /precio/<codigo>            un producto (404 si no está)
+#   GET  /precios?codigos=A,B,C      varios productos (null los que no están)
+#   POST /precios {"codigos": [...]} igual, con los códigos en el cuerpo
+#   GET  /estado                     productos cargados y fecha de la última carga
+#   POST /recargar                   vuelve a procesar los archivos ya mismo
+#
+# Con --desde-instantanea el servicio no procesa archivos: abre con mmap la instantánea
+# de la comparación que publica otro proceso (compare o servir con --instantanea) y la
+# vuelve a abrir cuando cambia. Arrancar así no carga nada en memoria.
+import os
+import json
+import time
+import logging
+import threading
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from motor_precios import ResultadoComparacion
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1' # Solo conexiones desde el mismo equipo
+DEFAULT_PORT = 8765
+DEFAULT_INTERVAL = 5.0 # Segundos entre revisiones de los archivos
+MAX_BATCH = 10_000 # Códigos por consulta de varios productos
+MAX_BODY = 1 << 20 # Bytes del cuerpo de un POST (de sobra para MAX_BATCH códigos)
+
+class IndicePrecios:
+    """
+    Foto de una comparación lista para consultar: por código de barras, el precio
+    sugerido de la droguería ganadora y el precio unitario en cada droguería.
+    No se modifica después de armada; para actualizar se arma otra.
+    """
+
+    def __init__(self, resultado, cargado=None):
+        self.drugstores = resultado.drugstores
+        self.cargado = cargado if cargado is not None else time.time()
+        self.productos = {
+            barcode: self._describe(barcode, filas) for barcode, filas in resultado.productos.items()
+        }
+        self._init_usage()
+
+    def _init_usage(self):
+        """Cuenta de consultas en curso, para cerrar el índice reemplazado cuando terminan"""
+        self._usage_lock = threading.Lock()
+        self._in_use = 0
+        self._retired = False
+
+    def acquire(self):
+        """Marca el índice como usado por una consulta"""
+        with self._usage_lock:
+            self._in_use += 1
+
+    def release(self):
+        """Termina una consulta; si el índice ya fue reemplazado y era la última, lo cierra"""
+        with self._usage_lock:
+            self._in_use -= 1
+            close = self._retired and not self._in_use
+        if close:
+            self.close()
+
+    def retire(self):
+        """El índice fue reemplazado: se cierra ya o cuando termine la última consulta que lo usa"""
+        with self._usage_lock:
+            self._retired = True
+            close = not self._in_use
+        if close:
+            self.close()
+
+    def close(self):
+        """Libera lo que tenga abierto el índice (nada si está en memoria)"""
+
+    @staticmethod
+    def _describe(barcode, filas):
+        """Datos de un código tal como se devuelven en las consultas"""
+        ganadora = next((fila for fila in filas if fila.ranking == 1), filas[0])
+        return {
+            'barcode': barcode,
+            'descripcion': ganadora.descripcion,
+            'divisor': ganadora.divisor,
+            'precio_sugerido': ganadora.precio_sugerido,
+            'drogueria': ganadora.drugstore if ganadora.disponible else None,
+            'precios': {
+                fila.drugstore: fila.precio_unitario if fila.disponible else None for fila in filas
+            },
+        }
+
+    def __len__(self):
+        return len(self.productos)
+
+    def lookup(self, barcode):
+        """Datos del código o None si no está en la comparación"""
+        return self.productos.get(barcode)
+
+    def lookup_many(self, barcodes):
+        """Datos de varios códigos (None en los que no están), por código"""
+        productos = self.productos
+        return {barcode: productos.get(barcode) for barcode in barcodes}
+
+class IndiceInstantanea(IndicePrecios):
+    """
+    Igual que IndicePrecios pero sobre una InstantaneaComparacion abierta: no arma nada
+    al cargarse y cada consulta lee del archivo mapeado solo los códigos pedidos.
+    """
+
+    def __init__(self, instantanea, cargado=None):
+        self.drugstores = instantanea.drugstores
+        self.cargado = cargado if cargado is not None else time.time()
+        self.instantanea = instantanea
+        self._init_usage()
+
+    def close(self):
+        # Sin esperar al recolector: en Windows el archivo mapeado no se puede reemplazar
+        self.instantanea.close()
+
+    def __len__(self):
+        return len(self.instantanea)
+
+    def lookup(self, barcode):
+        filas = self.instantanea.get(barcode)
+        return self._describe(barcode, filas) if filas is not None else None
+
+    def lookup_many(self, barcodes):
+        return {barcode: self.lookup(barcode) for barcode in barcodes}
+
+class ServicioPrecios:
+    """
+    Mantiene el IndicePrecios vigente. build es una función sin argumentos que procesa
+    los archivos y devuelve un ResultadoComparacion; watched son los archivos (de las
+    droguerías y de configuración) cuyo cambio obliga a volver a armarlo. index_factory
+    arma el índice con lo que devuelve build (IndiceInstantanea si build abre una instantánea).
+    """
+
+    def __init__(self, build, watched=(), interval=DEFAULT_INTERVAL, index_factory=IndicePrecios):
+        self.build = build
+        self.watched = list(watched)
+        self.interval = interval
+        self.index_factory = index_factory
+        self.indice = IndicePrecios(ResultadoComparacion(), cargado=0)
+        self.ultimo_error = None
+        self._stamps = None   # Estado de los archivos con que se armó el índice vigente
+        self._pending = None  # Estado distinto visto en la revisión anterior (aún sin recargar)
+        self._reload_lock = threading.Lock()
+        self._index_lock = threading.Lock() # Reemplazo del índice frente a las consultas que lo toman
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def _file_stamps(self):
+        """Tamaño y fecha de modificación de los archivos vigilados (None si falta alguno)"""
+        stamps = []
+        for path in self.watched:
+            try:
+                stat = os.stat(path)
+                stamps.append((path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                stamps.append((path, None, None))
+        return tuple(stamps)
+
+    def reload(self):
+        """Arma la comparación de nuevo y reemplaza el índice vigente; devuelve el índice nuevo"""
+        with self._reload_lock:
+            stamps = self._file_stamps()
+            try:
+                indice = self.index_factory(self.build())
+            except Exception as e:
+                self.ultimo_error = str(e)
+                raise
+            # Cada consulta usa un índice completo: el anterior se cierra cuando termina
+            # la última consulta que lo tomó
+            with self._index_lock:
+                anterior, self.indice = self.indice, indice
+            anterior.retire()
+            self._stamps = stamps
+            self._pending = None
+            self.ultimo_error = None
+        logger.info("Índice de precios cargado: %d productos", len(indice))
+        return indice
+
+    @contextlib.contextmanager
+    def current_index(self):
+        """Índice vigente para una consulta; no se cierra mientras la consulta lo use"""
+        with self._index_lock:
+            indice = self.indice
+            indice.acquire()
+        try:
+            yield indice
+        finally:
+            indice.release()
+
+    def reload_if_changed(self):
+        """
+        Recarga si los archivos cambiaron y ya no cambian: un estado nuevo tiene que
+        repetirse en dos revisiones seguidas, así no se lee un archivo a medio copiar.
+        Devuelve True si recargó.
+        """
+        stamps = self._file_stamps()
+        if stamps == self._stamps:
+            self._pending = None
+            return False
+        if stamps != self._pending:
+            self._pending = stamps
+            return False
+        self.reload()
+        return True
+
+    def _watch(self):
+        """Bucle del hilo que revisa los archivos cada interval segundos"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Se sigue respondiendo con el índice anterior
+                logger.error("No se pudo recargar la comparación: %s", e)
+
+    def start_watching(self):
+        """Empieza a revisar los archivos en un hilo aparte"""
+        if self._watcher is None and self.watched:
+            self._watcher = threading.Thread(target=self._watch, name="vigilar-precios", daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        """Detiene la revisión de archivos"""
+        self._stop.set()
+
+    def status(self):
+        """Estado del servicio para /estado"""
+        indice = self.indice
+        return {
+            'productos': len(indice),
+            'droguerias': list(indice.drugstores),
+            'cargado': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(indice.cargado)) if indice.cargado else None,
+            'archivos': self.watched,
+            'error': self.ultimo_error,
+        }
+
+    def make_server(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Crea el servidor HTTP (port 0 elige uno libre); se atiende con serve_forever"""
+        server = ThreadingHTTPServer((host, port), ManejadorPrecios)
+        server.daemon_threads = True
+        server.servicio = self
+        return server
+
+class ManejadorPrecios(BaseHTTPRequestHandler):
+    """Atiende las consultas HTTP contra el índice vigente del servicio"""
+    protocol_version = 'HTTP/1.1' # Conexiones persistentes: las cajas consultan seguido
+    server_version = 'ServicioPrecios'
+
+    def log_message(self, format, *args):
+        """Una línea por consulta solo con el nivel de detalle habilitado"""
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+    def send_json(self, status, data):
+        """Responde data como JSON con el código de estado indicado"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_batch(self, barcodes):
+        """Responde la consulta de varios códigos"""
+        if len(barcodes) > MAX_BATCH:
+            self.send_json(413, {'error': f"Se admiten hasta {MAX_BATCH} códigos por consulta"})
+            return
+        with self.server.servicio.current_index() as indice:
+            productos = indice.lookup_many(barcodes)
+        self.send_json(200, {'productos': productos})
+
+    def read_body(self, required):
+        """
+        Cuerpo del POST según Content-Length, o None si es inválido (ya respondido con el
+        error). Sin Content-Length el cuerpo es vacío, salvo que required lo exija.
+        """
+        header = self.headers.get('Content-Length')
+        if header is None:
+            if required or 'Transfer-Encoding' in self.headers:
+                self.close_connection = True # El cuerpo que haya quedó sin leer
+                self.send_json(411, {'error': "Falta Content-Length"})
+                return None
+            return b''
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self.send_json(400, {'error': f"Content-Length inválido: {header}"})
+            return None
+        if length > MAX_BODY:
+            self.close_connection = True
+            self.send_json(413, {'error': f"El cuerpo admite hasta {MAX_BODY} bytes"})
+            return None
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith('/precio/'):
+            barcode = unquote(url.path[len('/precio/'):]).strip()
+            with self.server.servicio.current_index() as indice:
+                producto = indice.lookup(barcode)
+            if producto is None:
+                self.send_json(404, {'error': f"Código {barcode} no encontrado", 'barcode': barcode})
+            else:
+                self.send_json(200, producto)
+        elif url.path == '/precios':
+            codigos = ','.join(parse_qs(url.query).get('codigos', []))
+            self.send_batch([codigo.strip() for codigo in codigos.split(',') if codigo.strip()])
+        elif url.path == '/estado':
+            self.send_json(200, self.server.servicio.status())
+        else:
+            self.send_json(404, {'error': "Ruta desconocida"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self.read_body(required=url.path == '/precios')
+        if body is None:
+            return
+        if url.path == '/precios':
+            try:
+                codigos = json.loads(body or b'{}').get('codigos', [])
+                if not isinstance(codigos, list):
+                    raise ValueError("'codigos' debe ser una lista")
+            except (ValueError, AttributeError) as e:
+                self.send_json(400, {'error': f"Cuerpo inválido: {e}"})
+                return
+            self.send_batch([str(codigo).strip() for codigo in codigos])
+        elif url.path == '/recargar':
+            try:
+                indice = self.server.servicio.reload()
+            except Exception as e:
+                self.send_json(500, {'error': f"No se pudo recargar: {e}"})
+                return
+            self.send_json(200, {'productos': len(indice)})
+        else:
+            self.send_json(404, {'error': "Ruta desconocida"})
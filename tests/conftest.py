@@ -0,0 +1,21 @@
+# Configuración común de las pruebas: los módulos del programa están en la raíz del
+# repositorio (no es un paquete) y las pruebas usan los catálogos de ejemplo.
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SAMPLES_DIR = os.path.join(ROOT, 'Precios de drogueria')
+ESPECIALIDADES = os.path.join(SAMPLES_DIR, 'CatalogoEspecialidades.csv')
+PERFUMERIA = os.path.join(SAMPLES_DIR, 'CatalogoPerfumeria.csv')
+CONFIG_FILE = os.path.join(ROOT, 'divisores_config.json')
+
+@pytest.fixture
+def divisores():
+    """Tabla de divisores de la configuración de ejemplo"""
+    import procesar_maestros
+    return procesar_maestros.load_config(CONFIG_FILE)['divisores']
@@ -0,0 +1,74 @@
+# Cache de catálogos: un archivo leído del cache da los mismos productos y advertencias que al procesarlo.
+import logging
+import shutil
+
+import pytest
+
+import motor_precios
+from conftest import ESPECIALIDADES, PERFUMERIA
+from cache_catalogos import CacheCatalogos
+
+CSV_CON_ERRORES = (
+    "Troquel, Codigo de barras, Descripcion, Laboratorio, Costo s/IVA, Vigencia\n"
+    "1, 7790000000001, PRODUCTO UNO, LAB, 1000.50, 01/07/2025\n"
+    "2, 7790000000002, PRODUCTO DOS, LAB, sin precio, 01/07/2025\n"
+    "3, 7790000000003, PRODUCTO TRES, LAB, 300, 01/07/2025\n"
+)
+DIVISORES = {'7790000000001': {'divisor': 2}, '7790000000002': {'divisor': 1}, '7790000000009': {'divisor': 1}}
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheCatalogos(str(tmp_path / 'cache.sqlite3'))
+
+def process(cache, filenames, divisores, drugstores):
+    return dict(cache.process_files(filenames, divisores, drugstores=drugstores))
+
+def price_warnings(caplog):
+    return sorted(record.getMessage() for record in caplog.records
+                  if record.levelno == logging.WARNING and 'precio' in record.getMessage())
+
+def test_mismos_productos_que_sin_cache(cache, tmp_path, divisores):
+    filenames = [ESPECIALIDADES, PERFUMERIA]
+    drugstores = ['asoprofarma', 'delsud']
+    esperado = dict(motor_precios.process_files_parallel(filenames, divisores, drugstores=drugstores))
+    assert process(cache, filenames, divisores, drugstores) == esperado
+    assert process(cache, filenames, divisores, drugstores) == esperado # Desde el cache
+
+    # El mismo contenido con otro nombre se encuentra por el hash
+    copia = str(tmp_path / 'copia.csv')
+    shutil.copyfile(PERFUMERIA, copia)
+    assert process(cache, [copia], divisores, ['delsud'])[0] == esperado[1]
+
+def test_catalogo_completo(cache, divisores):
+    catalogo = motor_precios.read_catalog_file(PERFUMERIA, drugstore='delsud')
+    cache.store_catalog(PERFUMERIA, catalogo)
+    guardado = cache.load_catalog(PERFUMERIA, 'delsud')
+    assert guardado.to_catalog().articulos == catalogo.articulos
+    guardado.close()
+    assert cache.lookup(PERFUMERIA, divisores, 'delsud') == catalogo.apply_divisors(divisores)
+
+@pytest.mark.parametrize('completo', [False, True])
+def test_advertencias_desde_el_cache(cache, tmp_path, caplog, completo):
+    filename = str(tmp_path / 'catalogo.csv')
+    with open(filename, 'w', encoding='utf-8') as outfile:
+        outfile.write(CSV_CON_ERRORES)
+    if completo:
+        cache.store_catalog(filename, motor_precios.read_catalog_file(filename, drugstore='delsud'))
+
+    with caplog.at_level(logging.WARNING):
+        primera = process(cache, [filename], DIVISORES, ['delsud'])
+    advertencias = price_warnings(caplog)
+    assert len(advertencias) == 1 and '7790000000002' in advertencias[0]
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        assert process(cache, [filename], DIVISORES, ['delsud']) == primera
+    assert price_warnings(caplog) == advertencias
+
+    # Con el SQLite, sin la instantánea
+    if completo:
+        shutil.rmtree(cache.snapshot_dir)
+        caplog.clear()
+        with caplog.at_level(logging.WARNING):
+            assert process(cache, [filename], DIVISORES, ['delsud']) == primera
+        assert price_warnings(caplog) == advertencias
@@ -0,0 +1,196 @@
+# Modo delta: la diferencia por líneas es igual a comparar los dos catálogos completos.
+import csv
+import json
+import shutil
+import logging
+
+import pytest
+
+import procesar_maestros
+from conftest import ESPECIALIDADES, PERFUMERIA
+from motor_precios import read_catalog_file
+from delta_precios import ADDED, REMOVED, REPRICED, DESCRIBED, diff_files, diff_catalogs
+from instantanea_precios import InstantaneaComparacion
+
+def modified_copy(source, target, configured=()):
+    """
+    Copia el catálogo con cambios en líneas sin comillas: de cada 50 una con otro precio,
+    una con otra descripción, una quitada y una con el precio al triple. Agrega un
+    producto nuevo. Los códigos de configured (si están) cambian de precio.
+    """
+    with open(source, encoding='utf-8', newline='') as infile:
+        lines = infile.readlines()
+    output = [lines[0]]
+    for number, line in enumerate(lines[1:]):
+        ending = line[len(line.rstrip('\r\n')):]
+        fields = line.rstrip('\r\n').split(',')
+        if '"' not in line and (number % 50 in (1, 2, 3, 4) or fields[1].strip() in configured):
+            if number % 50 == 3:
+                continue
+            if number % 50 == 2:
+                fields[3] = fields[3] + ' NUEVA'
+            else:
+                factor = 3 if number % 50 == 4 else 1.1
+                fields[9] = fields[10] = f" {float(fields[9]) * factor:.3f}"
+            line = ','.join(fields) + ending
+        output.append(line)
+    nuevo = lines[1].rstrip('\r\n').split(',')
+    nuevo[1] = nuevo[2] = ' 7799999999999'
+    output.append(','.join(nuevo) + '\r\n')
+    with open(target, 'w', encoding='utf-8', newline='') as outfile:
+        outfile.writelines(output)
+
+def as_tuples(diferencia):
+    return {barcode: (cambio.tipo, cambio.anterior, cambio.nuevo) for barcode, cambio in diferencia.cambios.items()}
+
+@pytest.mark.parametrize('source, drugstore', [(PERFUMERIA, 'delsud'), (ESPECIALIDADES, 'asoprofarma')])
+def test_igual_que_comparar_catalogos(tmp_path, caplog, source, drugstore):
+    target = str(tmp_path / 'nuevo.csv')
+    modified_copy(source, target)
+    with caplog.at_level(logging.INFO, logger='delta_precios'):
+        diferencia = diff_files(source, target, drugstore)
+    # Solo se interpretaron las líneas distintas, no los catálogos completos
+    assert not any('catálogos completos' in record.getMessage() for record in caplog.records)
+    completa = diff_catalogs(read_catalog_file(source, drugstore=drugstore),
+                             read_catalog_file(target, drugstore=drugstore))
+    assert diferencia.drugstore == drugstore
+    assert as_tuples(diferencia) == as_tuples(completa)
+    for tipo in (ADDED, REMOVED, REPRICED, DESCRIBED):
+        assert diferencia.of_type(tipo)
+    assert '7799999999999' in diferencia
+    assert all(cambio.is_anomaly() for cambio in diferencia.anomalies())
+    assert any(abs(cambio.variacion - 2) < 1e-6 for cambio in diferencia.anomalies())
+
+def test_archivos_iguales(tmp_path):
+    assert len(diff_files(PERFUMERIA, PERFUMERIA, 'delsud')) == 0
+
+def test_encabezado_distinto(tmp_path):
+    target = str(tmp_path / 'nuevo.csv')
+    modified_copy(PERFUMERIA, target)
+    with open(target, encoding='utf-8', newline='') as infile:
+        content = infile.read()
+    with open(target, 'w', encoding='utf-8', newline='') as outfile:
+        outfile.write(content.replace('Troquel,', 'Troquel ,', 1))
+    completa = diff_catalogs(read_catalog_file(PERFUMERIA, drugstore='delsud'),
+                             read_catalog_file(target, drugstore='delsud'))
+    assert as_tuples(diff_files(PERFUMERIA, target, 'delsud')) == as_tuples(completa)
+
+def test_cli_usa_la_drogueria_de_la_opcion(tmp_path, caplog):
+    # CatalogoEspecialidades.csv por el nombre sería de ASOPROFARMA; con --sud es DEL SUD
+    target = str(tmp_path / 'CatalogoEspecialidades.csv')
+    modified_copy(ESPECIALIDADES, target)
+    out = str(tmp_path / 'cambios.csv')
+    with caplog.at_level(logging.INFO, logger='delta_precios'):
+        assert procesar_maestros.main(['delta', '--sud', target, '--anterior', f'delsud={ESPECIALIDADES}',
+                                       '--out', out, '--sin-cache']) == 0
+    assert any(record.getMessage().startswith('Delta delsud:') for record in caplog.records)
+    with open(out, encoding='utf-8') as infile:
+        rows = list(csv.DictReader(infile))
+    assert rows and {row['Droguería'] for row in rows} == {'DEL SUD'}
+
+def test_instantanea_igual_a_comparar_de_nuevo(tmp_path, divisores):
+    config = procesar_maestros.load_config(procesar_maestros.default_config_path())
+    anterior = str(tmp_path / 'asopro_anterior.csv')
+    nuevo = str(tmp_path / 'asopro_nuevo.csv')
+    shutil.copyfile(ESPECIALIDADES, anterior)
+    modified_copy(anterior, nuevo, configured=set(divisores))
+    snapshot = str(tmp_path / 'comparacion.snap')
+    common = ['--sud', PERFUMERIA, '--sin-cache', '--config', procesar_maestros.default_config_path()]
+
+    assert procesar_maestros.main(['compare', '--asopro', anterior, '--out', str(tmp_path / 'a.csv'),
+                                   '--instantanea', snapshot] + common) == 0
+    assert procesar_maestros.main(['delta', '--asopro', nuevo, '--anterior', f'asoprofarma={anterior}',
+                                   '--out', str(tmp_path / 'cambios.csv'), '--instantanea', snapshot] + common) == 0
+
+    esperado = procesar_maestros.compare_files(
+        [('asoprofarma', nuevo, 'asoprofarma'), ('delsud', PERFUMERIA, 'delsud')], config['divisores'])
+    with InstantaneaComparacion(snapshot) as instantanea:
+        assert instantanea.to_result().productos == esperado.productos
+
+def test_instantanea_de_compare_y_delta_con_la_misma_drogueria(tmp_path):
+    # CatalogoPerfumeria.csv por el nombre sería de ASOPROFARMA (columna Publico); con --sud
+    # compare y delta lo leen los dos como DEL SUD (Costo s/IVA)
+    (tmp_path / 'anterior').mkdir()
+    (tmp_path / 'nuevo').mkdir()
+    anterior = str(tmp_path / 'anterior' / 'CatalogoPerfumeria.csv')
+    nuevo = str(tmp_path / 'nuevo' / 'CatalogoPerfumeria.csv')
+    shutil.copyfile(PERFUMERIA, anterior)
+    with open(anterior, encoding='utf-8', newline='') as infile:
+        lines = infile.readlines()
+    divisores = {}
+    for number, line in enumerate(lines[1:], 1):
+        fields = line.rstrip('\r\n').split(',')
+        if '"' in line or number % 40:
+            continue
+        divisores[fields[1].strip()] = {'divisor': 2}
+        if number % 80 == 0:
+            fields[9], fields[10] = ' 9999.000', ' 19999.000' # Costo y Publico distintos
+            lines[number] = ','.join(fields) + line[len(line.rstrip('\r\n')):]
+    with open(nuevo, 'w', encoding='utf-8', newline='') as outfile:
+        outfile.writelines(lines)
+    config = str(tmp_path / 'config.json')
+    with open(config, 'w', encoding='utf-8') as outfile:
+        json.dump({'divisores': divisores}, outfile)
+
+    snapshot = str(tmp_path / 'comparacion.snap')
+    completa = str(tmp_path / 'completa.snap')
+    common = ['--asopro', ESPECIALIDADES, '--sin-cache', '--config', config]
+    assert procesar_maestros.main(['compare', '--sud', anterior, '--out', str(tmp_path / 'a.csv'),
+                                   '--instantanea', snapshot] + common) == 0
+    assert procesar_maestros.main(['delta', '--sud', nuevo, '--anterior', f'delsud={anterior}',
+                                   '--out', str(tmp_path / 'cambios.csv'), '--instantanea', snapshot] + common) == 0
+    assert procesar_maestros.main(['compare', '--sud', nuevo, '--out', str(tmp_path / 'b.csv'),
+                                   '--instantanea', completa] + common) == 0
+
+    with InstantaneaComparacion(snapshot) as actualizada, InstantaneaComparacion(completa) as esperada:
+        productos = actualizada.to_result().productos
+        assert productos == esperada.to_result().productos
+    precios = {fila.precio_base for filas in productos.values() for fila in filas if fila.drugstore == 'DEL SUD'}
+    assert 9999.0 in precios and 19999.0 not in precios
+
+CABECERA = "Troquel, Codigo de barras, Descripcion, Laboratorio, Costo s/IVA, Vigencia\r\n"
+
+def write_lines(path, lines):
+    with open(path, 'w', encoding='utf-8', newline='') as outfile:
+        outfile.write(CABECERA + ''.join(line + '\r\n' for line in lines))
+    return str(path)
+
+def full_diff(anterior, nuevo):
+    return diff_catalogs(read_catalog_file(anterior, drugstore='delsud'), read_catalog_file(nuevo, drugstore='delsud'))
+
+@pytest.mark.parametrize('anteriores, nuevas', [
+    # Se quita la segunda línea de X: vale la primera, que no cambió (precio, no baja)
+    (["1, 7790000000001, X, LAB, 10, 01/07/2025", "2, 7790000000002, Y, LAB, 5, 01/07/2025",
+      "3, 7790000000001, X, LAB, 20, 01/07/2025"],
+     ["1, 7790000000001, X, LAB, 10, 01/07/2025", "2, 7790000000002, Y, LAB, 5, 01/07/2025"]),
+    # Se agrega otra línea de X, que ya estaba en una línea sin cambios (precio, no alta)
+    (["1, 7790000000001, X, LAB, 10, 01/07/2025", "2, 7790000000002, Y, LAB, 5, 01/07/2025"],
+     ["1, 7790000000001, X, LAB, 10, 01/07/2025", "2, 7790000000002, Y, LAB, 5, 01/07/2025",
+      "3, 7790000000001, X, LAB, 30, 01/07/2025"]),
+    # La última línea de X cambia de lugar sin cambiar: X no cambió
+    (["1, 7790000000001, X, LAB, 10, 01/07/2025", "3, 7790000000001, X, LAB, 20, 01/07/2025",
+      "2, 7790000000002, Y, LAB, 5, 01/07/2025"],
+     ["3, 7790000000001, X, LAB, 20, 01/07/2025", "1, 7790000000001, X, LAB, 10, 01/07/2025",
+      "2, 7790000000002, Y, LAB, 7, 01/07/2025"]),
+], ids=['linea_quitada', 'linea_agregada', 'orden_cambiado'])
+def test_codigo_repetido_en_lineas_sin_cambios(tmp_path, anteriores, nuevas):
+    anterior = write_lines(tmp_path / 'anterior.csv', anteriores)
+    nuevo = write_lines(tmp_path / 'nuevo.csv', nuevas)
+    diferencia = diff_files(anterior, nuevo, 'delsud')
+    assert as_tuples(diferencia) == as_tuples(full_diff(anterior, nuevo))
+    assert all(cambio.tipo == REPRICED for cambio in diferencia.cambios.values())
+    assert diferencia.anomalies() # Los cambios al doble o a la mitad se marcan
+
+def test_registros_de_varias_lineas(tmp_path, caplog):
+    # El precio cambia en la segunda línea física de un registro con un salto dentro de comillas
+    anterior = write_lines(tmp_path / 'anterior.csv', [
+        '1, 7790000000001,"CREMA\r\nGRANDE", LAB, 10, 01/07/2025',
+        '2, 7790000000002, TIJERA 5", LAB, 5, 01/07/2025'])
+    nuevo = write_lines(tmp_path / 'nuevo.csv', [
+        '1, 7790000000001,"CREMA\r\nGRANDE", LAB, 25, 01/07/2025',
+        '2, 7790000000002, TIJERA 5", LAB, 5, 01/07/2025'])
+    with caplog.at_level(logging.INFO, logger='delta_precios'):
+        diferencia = diff_files(anterior, nuevo, 'delsud')
+    assert any('varias líneas' in record.getMessage() for record in caplog.records)
+    assert as_tuples(diferencia) == as_tuples(full_diff(anterior, nuevo))
+    assert diferencia.of_type(REPRICED)[0].barcode == '7790000000001'
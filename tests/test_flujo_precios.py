@@ -0,0 +1,93 @@
+# Comparación en flujo: con o sin archivos temporales da las mismas filas que la comparación en memoria.
+import os
+import random
+
+import pytest
+
+import motor_precios
+import procesar_maestros
+import flujo_precios
+from benchmark_precios import write_txt_catalog, synthetic_divisors
+from conftest import ESPECIALIDADES, PERFUMERIA
+from motor_precios import ArticuloCatalogo
+
+CLAVES = ['asoprofarma', 'delsud', 'maestros']
+
+@pytest.fixture
+def maestros(tmp_path):
+    """Archivo maestros con cada código dos veces y otro precio en la segunda (vale la última)"""
+    partes = []
+    for seed in (1, 2):
+        parte = str(tmp_path / f'parte{seed}.txt')
+        write_txt_catalog(parte, 500, seed)
+        with open(parte, 'rb') as infile:
+            partes.append(infile.read())
+    filename = str(tmp_path / 'maestros.txt')
+    with open(filename, 'wb') as outfile:
+        outfile.write(b''.join(partes))
+    return filename
+
+@pytest.fixture
+def temporales(tmp_path):
+    directory = tmp_path / 'temporales'
+    directory.mkdir()
+    return str(directory)
+
+def by_barcode(filas, claves=CLAVES):
+    """Filas en el orden del flujo: por código y, dentro del código, por droguería"""
+    positions = {motor_precios.supplier_name(clave): position for position, clave in enumerate(claves)}
+    return sorted(filas, key=lambda fila: (fila.barcode, positions[fila.drugstore]))
+
+def compare_in_memory(filenames, divisores):
+    catalogos = [motor_precios.read_catalog_file(filename, drugstore=clave) for filename, clave in zip(filenames, CLAVES)]
+    if divisores is None:
+        divisores = {barcode: {'divisor': 1} for catalogo in catalogos for barcode in catalogo.articulos}
+    return motor_precios.compare_suppliers({
+        clave: catalogo.apply_divisors(divisores) for clave, catalogo in zip(CLAVES, catalogos)
+    })
+
+@pytest.mark.parametrize('chunk_size', [3, 50, 1000, flujo_precios.SORT_CHUNK_SIZE])
+def test_orden_externo_igual_que_dict(temporales, chunk_size):
+    rng = random.Random(chunk_size)
+    articulos = [
+        ArticuloCatalogo(f"779{rng.randrange(300):010d}", f"PRODUCTO, \"{index}\"", rng.randrange(1, 10 ** 6) / 100, 'delsud')
+        for index in range(2000)
+    ]
+    ultimos = {}
+    for articulo in articulos:
+        ultimos[articulo.barcode] = (articulo.barcode, articulo.descripcion, articulo.precio_base)
+
+    assert list(flujo_precios.sorted_articles(iter(articulos), chunk_size, temporales)) == sorted(ultimos.values())
+    assert os.listdir(temporales) == [] # Los archivos temporales se borran al terminar
+
+@pytest.mark.parametrize('chunk_size', [40, 100_000])
+@pytest.mark.parametrize('completo', [False, True], ids=['con_divisores', 'catalogo_completo'])
+def test_flujo_igual_que_en_memoria(maestros, temporales, chunk_size, completo):
+    filenames = [ESPECIALIDADES, PERFUMERIA, maestros]
+    divisores = None if completo else {
+        **procesar_maestros.load_config(procesar_maestros.default_config_path())['divisores'],
+        **synthetic_divisors(500, 200),
+    }
+    esperado = compare_in_memory(filenames, divisores).rows()
+    filas = list(flujo_precios.stream_comparison(filenames, divisores, CLAVES, CLAVES, chunk_size, temporales))
+
+    assert len({fila.barcode for fila in filas}) > 100
+    assert [fila.barcode for fila in filas] == sorted(fila.barcode for fila in filas) # Sale en orden de código
+    assert filas == by_barcode(esperado)
+    assert os.listdir(temporales) == []
+
+def test_cli_flujo_igual_que_compare(tmp_path, temporales):
+    common = ['compare', '--asopro', ESPECIALIDADES, '--sud', PERFUMERIA, '--sin-cache',
+              '--config', procesar_maestros.default_config_path()]
+    normal = tmp_path / 'normal.csv'
+    flujo = tmp_path / 'flujo.csv'
+    assert procesar_maestros.main(common + ['--out', str(normal)]) == 0
+    assert procesar_maestros.main(common + ['--out', str(flujo), '--flujo', '--bloque', '3',
+                                            '--temporales', temporales]) == 0
+
+    normal_lines = normal.read_text(encoding='utf-8').splitlines()
+    flujo_lines = flujo.read_text(encoding='utf-8').splitlines()
+    assert len(normal_lines) > 1
+    assert flujo_lines[0] == normal_lines[0]
+    assert sorted(flujo_lines[1:]) == sorted(normal_lines[1:])
+    assert os.listdir(temporales) == []
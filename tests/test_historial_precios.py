@@ -0,0 +1,81 @@
+# Historial de precios: importaciones en orden, del mismo día y fuera de orden.
+import sqlite3
+
+import pytest
+
+from motor_precios import ArticuloCatalogo, CatalogoProveedor
+from historial_precios import HistorialPrecios
+
+BARCODE = '7790000000001'
+
+def catalogo(precio, vigencia='', drugstore='delsud'):
+    """Catálogo de un solo código con el precio y la vigencia dados"""
+    articulo = ArticuloCatalogo(BARCODE, 'PRODUCTO X 30', precio, drugstore, vigencia=vigencia)
+    return CatalogoProveedor(drugstore, {BARCODE: articulo})
+
+def trayectoria(historial):
+    return [(punto.vigencia, punto.precio_base, punto.precio_anterior) for punto in historial.trajectory(BARCODE)]
+
+def ultimo(historial):
+    with sqlite3.connect(historial.path) as conn:
+        return conn.execute("SELECT vigencia, precio_base FROM ultimos WHERE barcode = ?", (BARCODE,)).fetchone()
+
+@pytest.fixture
+def historial(tmp_path):
+    return HistorialPrecios(str(tmp_path / 'historial.sqlite3'))
+
+def test_en_orden(historial):
+    assert historial.record_catalog(catalogo(100), '2025-06-10') == 1
+    assert historial.record_catalog(catalogo(100), '2025-06-15') == 0
+    assert historial.record_catalog(catalogo(120), '2025-06-20') == 1
+    assert trayectoria(historial) == [('2025-06-10', 100, None), ('2025-06-20', 120, 100)]
+    assert ultimo(historial) == ('2025-06-20', 120)
+
+def test_precio_cambia_sin_cambiar_vigencia(historial):
+    historial.record_catalog(catalogo(100, '01/06/2025'), '2025-06-05')
+    historial.record_catalog(catalogo(110, '01/06/2025'), '2025-06-10')
+    historial.record_catalog(catalogo(115, '01/06/2025'), '2025-06-12')
+    assert trayectoria(historial) == [
+        ('2025-06-01', 100, None), ('2025-06-10', 110, 100), ('2025-06-12', 115, 110)
+    ]
+    assert ultimo(historial) == ('2025-06-12', 115)
+
+def test_mismo_dia(historial):
+    historial.record_catalog(catalogo(100), '2025-06-10')
+    historial.record_catalog(catalogo(120), '2025-06-20')
+    # Corrección del mismo día: reemplaza al último y conserva su precio anterior
+    assert historial.record_catalog(catalogo(125), '2025-06-20') == 1
+    assert trayectoria(historial) == [('2025-06-10', 100, None), ('2025-06-20', 125, 100)]
+    assert ultimo(historial) == ('2025-06-20', 125)
+    # Volver a importar el mismo precio no cambia nada
+    assert historial.record_catalog(catalogo(125), '2025-06-20') == 0
+
+def test_fuera_de_orden(historial):
+    historial.record_catalog(catalogo(100), '2025-06-10')
+    historial.record_catalog(catalogo(120), '2025-06-20')
+    assert historial.record_catalog(catalogo(90), '2025-06-01') == 1
+    assert trayectoria(historial) == [
+        ('2025-06-01', 90, None), ('2025-06-10', 100, 90), ('2025-06-20', 120, 100)
+    ]
+    assert ultimo(historial) == ('2025-06-20', 120)
+    # El último sigue siendo 120: una importación posterior con ese precio no es un cambio
+    assert historial.record_catalog(catalogo(120), '2025-06-25') == 0
+
+def test_fuera_de_orden_entre_dos_puntos(historial):
+    historial.record_catalog(catalogo(100), '2025-06-10')
+    historial.record_catalog(catalogo(120), '2025-06-20')
+    # El precio 120 ya regía el 15: el punto del 20 deja de ser un cambio
+    assert historial.record_catalog(catalogo(120), '2025-06-15') == 1
+    assert trayectoria(historial) == [('2025-06-10', 100, None), ('2025-06-15', 120, 100)]
+    assert ultimo(historial) == ('2025-06-15', 120)
+    # Un precio igual al vigente en esa fecha no agrega nada
+    assert historial.record_catalog(catalogo(100), '2025-06-12') == 0
+    assert len(trayectoria(historial)) == 2
+
+def test_cambios_desde(historial):
+    historial.record_catalog(catalogo(100), '2025-06-10')
+    historial.record_catalog(catalogo(120), '2025-06-20')
+    historial.record_catalog(catalogo(90), '2025-06-01')
+    cambios = historial.changed_since('2025-06-05')
+    assert [(punto.vigencia, punto.precio_base) for punto in cambios] == [('2025-06-10', 100), ('2025-06-20', 120)]
+    assert cambios[0].variacion == pytest.approx(100 / 90 - 1)
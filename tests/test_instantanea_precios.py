@@ -0,0 +1,104 @@
+# Instantáneas binarias: lo que se lee de vuelta es igual a lo que se guardó.
+import os
+
+import pytest
+
+import procesar_maestros
+from conftest import ESPECIALIDADES, PERFUMERIA
+from motor_precios import ArticuloCatalogo, CatalogoProveedor, read_catalog_file
+from instantanea_precios import (
+    InstantaneaCatalogo, InstantaneaComparacion, write_catalog_snapshot, write_comparison_snapshot
+)
+
+@pytest.fixture(scope='module')
+def catalogo():
+    return read_catalog_file(PERFUMERIA, drugstore='delsud')
+
+def test_catalogo(tmp_path, catalogo, divisores):
+    path = str(tmp_path / 'catalogo.snap')
+    write_catalog_snapshot(path, catalogo)
+    with InstantaneaCatalogo(path) as instantanea:
+        assert len(instantanea) == len(catalogo)
+        assert instantanea.drugstore == 'delsud'
+        assert list(instantanea.barcodes()) == sorted(catalogo.articulos)
+        assert instantanea.to_catalog().articulos == catalogo.articulos
+        assert instantanea.errores == catalogo.errores
+        for barcode in list(catalogo.articulos)[::97]:
+            assert instantanea.get(barcode) == catalogo.get(barcode)
+        assert instantanea.get('0000000000000') is None
+        assert '0000000000000' not in instantanea
+        assert instantanea.apply_divisors(divisores) == catalogo.apply_divisors(divisores)
+
+def test_textos_con_caracteres_de_control(tmp_path):
+    articulos = {
+        '1': ArticuloCatalogo('1', 'CREMA\x1fX 50', 10.5, 'delsud', '12\x1f', 'LAB\nS.A.', ''),
+        '22': ArticuloCatalogo('22', '', 0.0, 'delsud', '', '', '01/07/2025'),
+        '3': ArticuloCatalogo('3', 'AÑIL ÜBER', 1e9, 'delsud', 'ñ', '', '\x1f'),
+    }
+    path = str(tmp_path / 'catalogo.snap')
+    write_catalog_snapshot(path, CatalogoProveedor('delsud', articulos))
+    with InstantaneaCatalogo(path) as instantanea:
+        assert instantanea.to_catalog().articulos == articulos
+        assert instantanea.get('22') == articulos['22']
+
+def test_catalogo_vacio(tmp_path):
+    path = str(tmp_path / 'vacio.snap')
+    write_catalog_snapshot(path, CatalogoProveedor('delsud'))
+    with InstantaneaCatalogo(path) as instantanea:
+        assert len(instantanea) == 0
+        assert instantanea.get('1') is None
+
+def test_comparacion(tmp_path, divisores):
+    resultado = procesar_maestros.compare_files(
+        [('asoprofarma', ESPECIALIDADES, 'asoprofarma'), ('delsud', PERFUMERIA, 'delsud')], divisores)
+    path = str(tmp_path / 'comparacion.snap')
+    write_comparison_snapshot(path, resultado)
+    with InstantaneaComparacion(path) as instantanea:
+        assert instantanea.drugstores == resultado.drugstores
+        assert instantanea.to_result().productos == resultado.productos
+        for barcode, filas in resultado.productos.items():
+            assert instantanea.get(barcode) == filas
+
+def test_divisores_float(tmp_path, divisores):
+    # Un divisor 2.0 de la configuración se muestra "/2.0", igual que en la comparación en vivo
+    sources = [('asoprofarma', ESPECIALIDADES, 'asoprofarma'), ('delsud', PERFUMERIA, 'delsud')]
+    comparados = sorted(procesar_maestros.compare_files(sources, divisores).productos)
+    configurados = dict(divisores)
+    enteros, decimales = comparados[:3], comparados[3:6]
+    for barcode in decimales:
+        configurados[barcode] = {'divisor': float(configurados[barcode].get('divisor', 1))}
+    configurados[decimales[0]] = {'divisor': 2.5}
+    resultado = procesar_maestros.compare_files(sources, configurados)
+    path = str(tmp_path / 'comparacion.snap')
+    write_comparison_snapshot(path, resultado)
+    with InstantaneaComparacion(path) as instantanea:
+        for barcode in enteros + decimales:
+            filas = instantanea.get(barcode)
+            assert type(filas[0].divisor) is type(resultado.productos[barcode][0].divisor)
+            assert [procesar_maestros.format_result_row(fila) for fila in filas] == \
+                [procesar_maestros.format_result_row(fila) for fila in resultado.productos[barcode]]
+        assert instantanea.to_result().rows() == resultado.rows()
+
+def test_error_al_escribir_no_deja_archivos(tmp_path, monkeypatch, catalogo):
+    def fail(*args):
+        raise PermissionError("sin permiso")
+    monkeypatch.setattr(os, 'chmod', fail)
+    descriptors = len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else None
+    with pytest.raises(PermissionError):
+        write_catalog_snapshot(str(tmp_path / 'catalogo.snap'), catalogo)
+    assert os.listdir(tmp_path) == []
+    if descriptors is not None:
+        assert len(os.listdir('/proc/self/fd')) == descriptors # El descriptor de mkstemp se cerró
+
+def test_archivo_que_no_es_instantanea(tmp_path, catalogo):
+    path = tmp_path / 'otro.snap'
+    path.write_bytes(b'no es una instantanea')
+    with pytest.raises(ValueError):
+        InstantaneaCatalogo(str(path))
+    path.write_bytes(b'')
+    with pytest.raises(ValueError):
+        InstantaneaCatalogo(str(path))
+    # Un catálogo no se abre como comparación
+    write_catalog_snapshot(str(path), catalogo)
+    with pytest.raises(ValueError):
+        InstantaneaComparacion(str(path))
@@ -0,0 +1,121 @@
+# Catálogos CSV: el filtrado previo por código da lo mismo que leer todo con csv.DictReader y filtrar después.
+import csv
+import random
+
+import pytest
+
+import motor_precios
+from conftest import ESPECIALIDADES, PERFUMERIA
+
+BARCODES = [f"779{index:010d}" for index in range(60)] # Pocos códigos: muchos se repiten
+HEADER = (" Codigo de barras, Codigo de barras 2, Descripcion, Descripcion extendida,"
+          " Laboratorio, Costo s/IVA, Vigencia")
+
+def reference_parse(filename, drugstore, wanted=None):
+    """
+    Lectura de un catálogo con csv.DictReader tal como era antes del filtrado previo:
+    devuelve (barcode -> (descripcion, precio_base), códigos con precio inválido).
+    """
+    def column(row, name, default=''):
+        return row.get(name, row.get(' ' + name, default))
+
+    results, invalid = {}, set()
+    with open(filename, 'r', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            barcode = column(row, 'Codigo de barras').strip()
+            if barcode.startswith(('HE', 'UC')):
+                barcode = barcode[2:]
+            if wanted is not None and barcode not in wanted:
+                continue
+            price_column = 'Publico' if drugstore == 'asoprofarma' and ('Publico' in row or ' Publico' in row) else 'Costo s/IVA'
+            try:
+                precio_base = float(column(row, price_column, '0').replace(',', '.'))
+            except ValueError:
+                invalid.add(barcode)
+                continue
+            results[barcode] = (column(row, 'Descripcion').strip(), precio_base)
+    return results, invalid
+
+def parsed(catalogo):
+    return {barcode: (articulo.descripcion, articulo.precio_base) for barcode, articulo in catalogo.articulos.items()}
+
+def random_row(rng, publico):
+    """
+    Fila al azar: códigos con y sin prefijo HE/UC, descripciones entre comillas con
+    comas, comillas dobles o saltos de línea, comillas sueltas después de un espacio
+    (que el módulo csv toma como texto), precios con coma decimal y precios inválidos.
+    """
+    barcode = rng.choice(BARCODES)
+    prefixed = rng.choice(('', '', 'HE', 'UC')) + barcode
+    prefixed = f'"{prefixed}"' if rng.random() < 0.1 else ' ' + prefixed
+    description = rng.choice((
+        ' CREMA X 30G',
+        '"CREMA, HUMECTANTE"',
+        ' "SIN CIERRE',
+        '"GEL ""PLUS"" 50ML"',
+        '"ALCOHOL\nEN GEL"',
+        ' JARABE 5" ML',
+        ' ÑANDÚ AÑEJO',
+    ))
+    def price():
+        cents = rng.randrange(1, 10 ** 7)
+        return rng.choice((
+            f" {cents / 100:.3f}",
+            f'"{cents // 100},{cents % 100:02d}"',
+            f"{cents / 100:.2f} ",
+            ' sin precio',
+            '',
+        ))
+    fields = [prefixed, f" {barcode}", description, ' ', ' LAB', price()]
+    if publico:
+        fields.append(price())
+    fields.append(' 01/07/2025')
+    return ','.join(fields)
+
+def write_random_csv(filename, rows, seed, publico=False):
+    """Escribe un catálogo de rows filas al azar con finales \\n y \\r\\n mezclados"""
+    rng = random.Random(seed)
+    header = HEADER.replace(' Costo s/IVA,', ' Costo s/IVA, Publico,') if publico else HEADER
+    with open(filename, 'w', encoding='utf-8', newline='') as outfile:
+        outfile.write(header + '\r\n')
+        for _ in range(rows):
+            outfile.write(random_row(rng, publico) + rng.choice(('\n', '\r\n')))
+    return filename
+
+@pytest.fixture
+def wanted():
+    return {barcode: {'divisor': 1} for barcode in BARCODES[::4]}
+
+def check_equivalent(filename, drugstore, wanted):
+    """El catálogo filtrado es el completo restringido a wanted, y los dos son iguales a la referencia"""
+    completo = motor_precios.read_csv_catalog(filename, drugstore=drugstore)
+    filtrado = motor_precios.read_csv_catalog(filename, wanted, drugstore=drugstore)
+
+    esperado, invalidos = reference_parse(filename, drugstore)
+    assert parsed(completo) == esperado
+    assert set(completo.errores) == invalidos
+
+    esperado, invalidos = reference_parse(filename, drugstore, wanted)
+    assert parsed(filtrado) == esperado
+    assert set(filtrado.errores) == invalidos
+    assert filtrado.articulos == {barcode: articulo for barcode, articulo in completo.articulos.items() if barcode in wanted}
+    return esperado
+
+@pytest.mark.parametrize('filename', [ESPECIALIDADES, PERFUMERIA], ids=['especialidades', 'perfumeria'])
+@pytest.mark.parametrize('drugstore', ['asoprofarma', 'delsud'])
+def test_catalogos_de_ejemplo(filename, drugstore, divisores):
+    check_equivalent(filename, drugstore, divisores)
+
+@pytest.mark.parametrize('seed', range(1, 6))
+@pytest.mark.parametrize('publico', [False, True], ids=['costo', 'publico'])
+def test_catalogos_al_azar(tmp_path, wanted, seed, publico):
+    filename = write_random_csv(str(tmp_path / 'catalogo.csv'), 1000, seed, publico)
+    for drugstore in ('asoprofarma', 'delsud'):
+        assert check_equivalent(filename, drugstore, wanted)
+
+def test_productos_filtrados(tmp_path, wanted):
+    filename = write_random_csv(str(tmp_path / 'catalogo.csv'), 1000, 7, publico=True)
+    completo = motor_precios.read_csv_catalog(filename, drugstore='asoprofarma')
+    productos = motor_precios.process_csv_file_for_drugstore(filename, wanted, drugstore='asoprofarma')
+    assert productos
+    assert productos == completo.apply_divisors(wanted)
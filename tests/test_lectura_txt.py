@@ -0,0 +1,150 @@
+# Archivos maestros (TXT): el escaneo sobre bytes da lo mismo que el parser por líneas original,
+# y la lectura en bloques paralelos lo mismo que leer el archivo entero.
+import random
+
+import pytest
+
+import motor_precios
+from motor_precios import MIN_LINE_LENGTH, BARCODE_PATTERN, PRICE_LIKE_PATTERN, DESC_SLICE_APPROX
+
+BARCODES = [f"779{index:010d}" for index in range(40)] # Pocos códigos: muchos se repiten
+FILLER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789.-/ÑÁÉÍÓÚñáéíóú°"
+
+def random_record(rng):
+    """
+    Línea al azar de un archivo maestros: en general un registro 'D' válido, pero también
+    líneas cortas, de otro tipo, sin código, con varios códigos HE/UC o con una sola cifra
+    parecida a un precio, y con caracteres latin-1 en el medio.
+    """
+    kind = rng.random()
+    if kind < 0.05:
+        return ''
+    first = 'D' if kind < 0.85 else rng.choice('HTd ')
+    description = ''.join(rng.choice(FILLER) for _ in range(30))
+    parts = [first, f"{rng.randrange(10 ** 8):08d}".ljust(18), description]
+    for _ in range(rng.choice((0, 1, 1, 1, 2, 3))):
+        parts.append(rng.choice(('HE', 'UC', 'H', 'U', 'HU', 'EU')) + rng.choice(BARCODES))
+        parts.append(rng.choice((' ', 'H', 'U', 'x')))
+    for _ in range(rng.choice((0, 1, 2, 2, 2, 3))):
+        number = rng.randrange(10 ** 12)
+        parts.append(rng.choice(('0', '0', '1')) + f"{number:012d}" + rng.choice(('', ' ', '  ')))
+    line = ''.join(parts)
+    length = rng.choice((len(line), MIN_LINE_LENGTH - 1, MIN_LINE_LENGTH, MIN_LINE_LENGTH + 30))
+    return line.ljust(length)
+
+def write_random_txt(filename, rows, seed, final_newline=True):
+    """Escribe un archivo maestros de rows líneas al azar con finales \\n y \\r\\n mezclados"""
+    rng = random.Random(seed)
+    lines = [random_record(rng) + rng.choice(('\n', '\r\n')) for _ in range(rows)]
+    if not final_newline:
+        lines[-1] = lines[-1].rstrip('\r\n')
+    with open(filename, 'w', encoding='latin-1', newline='') as outfile:
+        outfile.writelines(lines)
+    return filename
+
+def reference_parse(filename, wanted=None):
+    """
+    Parser por líneas de los archivos maestros tal como era antes del escaneo sobre
+    bytes: barcode -> (descripcion, precio_base), gana la última aparición.
+    """
+    results = {}
+    with open(filename, 'r', encoding='latin-1') as infile:
+        for line in infile:
+            line = line.rstrip('\r\n')
+            if not line.startswith('D') or len(line) < MIN_LINE_LENGTH:
+                continue
+            barcode_match = BARCODE_PATTERN.search(line)
+            if not barcode_match:
+                continue
+            barcode = barcode_match.group(1)
+            if wanted is not None and barcode not in wanted:
+                continue
+            prices = PRICE_LIKE_PATTERN.findall(line, barcode_match.end())
+            if not prices:
+                continue
+            descripcion = line[DESC_SLICE_APPROX].strip() if len(line) >= DESC_SLICE_APPROX.stop else "ERROR_DESC_CORTA"
+            results[barcode] = (descripcion, int(prices[1] if len(prices) >= 2 else prices[0]) / 100.0)
+    return results
+
+def parsed(catalogo):
+    return {barcode: (articulo.descripcion, articulo.precio_base) for barcode, articulo in catalogo.articulos.items()}
+
+@pytest.fixture(params=[(1, True), (2, False)], ids=['con_salto_final', 'sin_salto_final'])
+def maestros(request, tmp_path):
+    seed, final_newline = request.param
+    return write_random_txt(str(tmp_path / 'maestros.txt'), 2000, seed, final_newline)
+
+@pytest.fixture
+def wanted():
+    return {barcode: {'divisor': divisor} for barcode, divisor in zip(BARCODES[::3], (1, 2, 10, 30) * 4)}
+
+@pytest.mark.parametrize('seed', range(3, 8))
+@pytest.mark.parametrize('filtrado', [False, True], ids=['completo', 'con_wanted'])
+def test_escaneo_igual_que_parser_por_lineas(tmp_path, wanted, seed, filtrado):
+    filename = write_random_txt(str(tmp_path / 'maestros.txt'), 1500, seed, final_newline=seed % 2 == 0)
+    codes = wanted if filtrado else None
+    esperado = reference_parse(filename, codes)
+    assert esperado
+    assert parsed(motor_precios.read_txt_catalog(filename, codes, 'delsud')) == esperado
+
+def test_casos_limite(tmp_path):
+    code_a, code_b, code_c, code_d = BARCODES[:4]
+    price = lambda cents: f"{cents:013d}"
+    lines = [
+        "H ENCABEZADO".ljust(MIN_LINE_LENGTH),
+        # Dos precios: vale el segundo; la descripción lleva caracteres latin-1
+        f"D00000001{' ' * 10}{'ÑANDÚ AÑEJO 30°'.ljust(30)}HE{code_a}  {price(1000)}  {price(2550)}".ljust(MIN_LINE_LENGTH),
+        # Una línea de un carácter menos que el mínimo se ignora
+        f"D00000002{' ' * 10}{'CORTO'.ljust(30)}UC{code_b}  {price(100)}  {price(200)}".ljust(MIN_LINE_LENGTH - 1),
+        # Vale el primer código: el segundo (buscado) no cuenta
+        f"D00000003{' ' * 10}{'DOS CODIGOS'.ljust(30)}UC{code_c}  HE{code_b}  {price(300)}".ljust(MIN_LINE_LENGTH),
+        # Sin cifras parecidas a un precio después del código
+        f"D00000004{' ' * 10}{'SIN PRECIO'.ljust(30)}HE{code_b}  1234567890123".ljust(MIN_LINE_LENGTH),
+        # Un solo precio y 'H' y 'U' sueltas antes del código
+        f"DHU0000005{' ' * 9}{'HUESO U'.ljust(30)}HHEUUC{code_d}  {price(9999)}".ljust(MIN_LINE_LENGTH),
+        # Registro que no empieza con 'D'
+        f" D0000006{' ' * 10}{'OTRO TIPO'.ljust(30)}HE{code_b}  {price(1)}  {price(2)}".ljust(MIN_LINE_LENGTH),
+    ]
+    filename = str(tmp_path / 'maestros.txt')
+    with open(filename, 'w', encoding='latin-1', newline='') as outfile:
+        outfile.write('\r\n'.join(lines)) # Sin salto final
+
+    esperado = {code_a: ('ÑANDÚ AÑEJO 30°', 25.5), code_c: ('DOS CODIGOS', 3.0), code_d: ('HUESO U', 99.99)}
+    assert reference_parse(filename) == esperado
+    assert parsed(motor_precios.read_txt_catalog(filename, drugstore='delsud')) == esperado
+    # Con wanted, el código buscado que no es el primero de la línea no aparece
+    assert parsed(motor_precios.read_txt_catalog(filename, {code_b: {}}, 'delsud')) == {}
+
+def test_archivo_vacio(tmp_path):
+    filename = str(tmp_path / 'vacio.txt')
+    open(filename, 'w').close()
+    assert motor_precios.read_txt_catalog(filename, drugstore='delsud').articulos == {}
+    assert motor_precios.process_txt_file_for_drugstore(filename, {BARCODES[0]: {}}, 'delsud') == {}
+
+@pytest.mark.parametrize('parts', [1, 2, 3, 7, 16])
+def test_rangos_alineados_a_lineas(maestros, parts):
+    with open(maestros, 'rb') as infile:
+        data = infile.read()
+    ranges = motor_precios.split_file_ranges(maestros, parts)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert 1 <= len(ranges) <= parts
+    for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert start < end == next_start
+        assert data[next_start - 1:next_start] == b'\n'
+
+@pytest.mark.parametrize('workers', [2, 3, 7])
+@pytest.mark.parametrize('filtrado', [False, True], ids=['completo', 'con_wanted'])
+def test_paralelo_igual_que_serial(maestros, wanted, monkeypatch, workers, filtrado):
+    monkeypatch.setattr(motor_precios, 'TXT_PARALLEL_MIN_BYTES', 0)
+    codes = wanted if filtrado else None
+    serial = motor_precios.read_txt_catalog(maestros, codes, 'delsud')
+    paralelo = motor_precios.read_txt_catalog_parallel(maestros, codes, workers, 'delsud')
+    assert serial.articulos # El archivo al azar tiene registros válidos
+    assert paralelo.articulos == serial.articulos
+
+def test_productos_en_paralelo(maestros, wanted, monkeypatch):
+    monkeypatch.setattr(motor_precios, 'TXT_PARALLEL_MIN_BYTES', 0)
+    esperado = motor_precios.process_txt_file_for_drugstore(maestros, wanted, 'delsud')
+    assert esperado
+    assert motor_precios.process_txt_file_parallel(maestros, wanted, 4, 'delsud') == esperado
+    assert motor_precios.process_file(maestros, wanted, workers=4, drugstore='delsud') == esperado
@@ -0,0 +1,91 @@
+# Lista de precios publicada: lectura de precios, diferencias y lista base después de publicar cambios.
+import io
+import os
+
+import pytest
+
+from conftest import ROOT
+from lista_precios import (
+    ItemLista, ListaPrecios, parse_list_price, read_price_list, write_price_list, changed_items,
+    merge_price_lists, changes_filename, backup_filename, same_file
+)
+
+PUBLISHED_SAMPLE = os.path.join(ROOT, 'Exportacion', 'Precios (1) - Precios1.csv')
+
+@pytest.mark.parametrize('text, price', [
+    ('700', 700),
+    ('$700', 700),
+    ('$ 700', 700),
+    ('1200.50', 1200.5),
+    ('1200,5', 1200.5),
+    ('$1,200', 1200),
+    ('$1.200', 1200),
+    ('$1,200.50', 1200.5),
+    ('1.234,56', 1234.56),
+    ('1.234.567', 1234567),
+    ('1,234,567.89', 1234567.89),
+])
+def test_parse_list_price(text, price):
+    assert parse_list_price(text) == pytest.approx(price)
+
+@pytest.mark.parametrize('text', ['', '$', 'abc', '1.234.56', '1,2345', '1.234,567', '1,234.567,89'])
+def test_parse_list_price_invalido(text):
+    with pytest.raises(ValueError):
+        parse_list_price(text)
+
+def test_lectura_de_la_lista_de_ejemplo():
+    lista = read_price_list(PUBLISHED_SAMPLE)
+    assert (lista.fecha, lista.ubicacion) == ('20-feb', 'San Luis')
+    assert len(lista) == 25
+    precios = {item.descripcion: (item.divisor, item.precio) for item in lista.items}
+    assert precios['ALIKAL C/PROS 30 SOB'] == ('/30', 700)
+    assert precios['BAYASPIRINA C (calient)'] == ('/24', 1200)
+    assert precios['NEXT FORTE 50 UNI 5,5 GR SOB'] == ('/50', 1950)
+
+def test_escritura_y_lectura():
+    lista = ListaPrecios('20-feb', 'San Luis', [ItemLista('A', '/2', 1200.4), ItemLista('B, C', '/3', 850)])
+    outfile = io.StringIO(newline='')
+    write_price_list(outfile, lista)
+    assert outfile.getvalue().splitlines() == [
+        'Ultima act,20-feb,', 'Precios1,,San Luis', 'A,/2,1200', '"B, C",/3,850', ',,.'
+    ]
+
+def test_changed_items():
+    publicada = ListaPrecios(items=[
+        ItemLista('ALIKAL 30 SOB', '/30', 700),
+        ItemLista('MIGRAL 20 CMP', '/2', 4500),
+        ItemLista('TAFIROL 30 CMP', '/3', 2600),
+        ItemLista('UVASAL 30 SOB', '/15', 850),
+    ])
+    items = [
+        ItemLista('alikal  30 sob', '/30', 700.3),   # Igual: mismo precio redondeado y otra escritura
+        ItemLista('MIGRAL 20 CMP', '/2', 4700),      # Otro precio
+        ItemLista('TAFIROL 30 CMP', '/30', 2600),    # Otro divisor
+        ItemLista('SERTAL 20 CMP', '/2', 5850),      # Nuevo
+    ]
+    changed, removed = changed_items(items, publicada)
+    assert [item.descripcion for item in changed] == ['MIGRAL 20 CMP', 'TAFIROL 30 CMP', 'SERTAL 20 CMP']
+    assert [item.descripcion for item in removed] == ['UVASAL 30 SOB']
+
+def test_la_lista_actualizada_es_la_base_del_proximo_cambio():
+    publicada = read_price_list(PUBLISHED_SAMPLE)
+    items = [ItemLista(item.descripcion, item.divisor, item.precio) for item in publicada.items]
+    items[0].precio += 100
+    changed, _ = changed_items(items, publicada)
+    assert len(changed) == 1
+
+    merged = merge_price_lists(publicada, changed, '21-feb')
+    assert (merged.fecha, merged.ubicacion, len(merged)) == ('21-feb', 'San Luis', len(publicada))
+    assert changed_items(items, merged) == ([], [])
+
+def test_archivos_junto_a_la_lista_publicada(tmp_path):
+    publicada = tmp_path / 'Precios1.csv'
+    publicada.write_text("Ultima act,20-feb,\n", encoding='utf-8')
+    assert changes_filename(str(publicada)) == str(tmp_path / 'Precios1_cambios.csv')
+    assert backup_filename(str(publicada)) == str(tmp_path / 'Precios1_anterior.csv')
+    assert changes_filename(str(tmp_path / 'lista')) == str(tmp_path / 'lista_cambios.csv')
+
+    # La lista misma, escrita de otra forma, no sirve como destino de los cambios
+    assert same_file(str(publicada), str(tmp_path / '.' / 'Precios1.csv'))
+    assert not same_file(changes_filename(str(publicada)), str(publicada))
+    assert same_file(str(tmp_path / 'nueva.csv'), str(tmp_path / 'sub' / '..' / 'nueva.csv'))
@@ -0,0 +1,100 @@
+# Servicio de consulta de precios sobre los catálogos de ejemplo, en un puerto local libre.
+import json
+import threading
+import http.client
+
+import pytest
+
+import procesar_maestros
+from conftest import ESPECIALIDADES, PERFUMERIA
+from servicio_precios import ServicioPrecios, IndiceInstantanea, MAX_BODY
+from instantanea_precios import write_comparison_snapshot, InstantaneaComparacion
+
+SOURCES = [('asoprofarma', ESPECIALIDADES, 'asoprofarma'), ('delsud', PERFUMERIA, 'delsud')]
+
+@pytest.fixture(scope='module')
+def resultado():
+    divisores = procesar_maestros.load_config(procesar_maestros.default_config_path())['divisores']
+    return procesar_maestros.compare_files(SOURCES, divisores)
+
+@pytest.fixture
+def servidor(resultado):
+    servicio = ServicioPrecios(lambda: resultado)
+    servicio.reload()
+    server = servicio.make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def request(server, method, path, body=None, headers=None):
+    """Hace una consulta y devuelve (estado, JSON de la respuesta)"""
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    try:
+        if headers is None:
+            conn.request(method, path, body=body)
+        else:
+            conn.putrequest(method, path)
+            for name, value in headers.items():
+                conn.putheader(name, value)
+            conn.endheaders(body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+def test_precio(servidor, resultado):
+    barcode = next(iter(resultado.productos))
+    ganadora = resultado.winner(barcode)
+    status, data = request(servidor, 'GET', f'/precio/{barcode}')
+    assert status == 200
+    assert data['precio_sugerido'] == ganadora.precio_sugerido
+    assert data['drogueria'] == ganadora.drugstore
+    assert request(servidor, 'GET', '/precio/0000000000000')[0] == 404
+
+def test_precios(servidor, resultado):
+    barcodes = sorted(resultado.productos)[:3]
+    status, data = request(servidor, 'GET', '/precios?codigos=' + ','.join(barcodes + ['123']))
+    assert status == 200
+    assert sorted(data['productos']) == sorted(barcodes + ['123'])
+    assert data['productos']['123'] is None
+
+    status, data = request(servidor, 'POST', '/precios', json.dumps({'codigos': barcodes}))
+    assert status == 200
+    assert all(data['productos'][barcode]['barcode'] == barcode for barcode in barcodes)
+
+def test_estado(servidor, resultado):
+    status, data = request(servidor, 'GET', '/estado')
+    assert status == 200
+    assert data['productos'] == len(resultado)
+    assert data['droguerias'] == ['ASOPROFARMA', 'DEL SUD']
+
+@pytest.mark.parametrize('headers, status', [
+    ({'Content-Length': 'abc'}, 400),
+    ({'Content-Length': '-1'}, 400),
+    ({'Content-Length': str(MAX_BODY + 1)}, 413),
+    ({}, 411),
+])
+def test_post_invalido(servidor, headers, status):
+    assert request(servidor, 'POST', '/precios', headers=headers)[0] == status
+    # El servicio sigue atendiendo
+    assert request(servidor, 'GET', '/estado')[0] == 200
+
+def test_post_cuerpo_invalido(servidor):
+    assert request(servidor, 'POST', '/precios', '[1, 2]')[0] == 400
+    assert request(servidor, 'POST', '/precios', '{"codigos": "123"}')[0] == 400
+
+def test_instantanea_reemplazada_se_cierra(tmp_path, resultado):
+    path = str(tmp_path / 'comparacion.snap')
+    write_comparison_snapshot(path, resultado)
+    servicio = ServicioPrecios(lambda: InstantaneaComparacion(path), [path], index_factory=IndiceInstantanea)
+    primera = servicio.reload().instantanea
+
+    with servicio.current_index() as indice:
+        servicio.reload()
+        # La consulta en curso sigue usando la anterior hasta terminar
+        assert not primera._buffer.closed
+        assert indice.lookup(next(iter(resultado.productos))) is not None
+    assert primera._buffer.closed
+    servicio.indice.retire()